@@ -0,0 +1,176 @@
+"""
+Agregação dos itens de uma lista de compras.
+
+Itens com o mesmo ingredient_id e família de unidade viram uma linha só, com
+as quantidades convertidas para a unidade do primeiro item do grupo. Há duas
+implementações com o mesmo resultado:
+
+- aggregate_items: um laço em Python, mais rápido para listas pequenas;
+- aggregate_items_vectorized: nomes e unidades distintos são resolvidos uma
+  vez e codificados como inteiros, as quantidades são convertidas com NumPy
+  (via unidade base g/ml) e somadas por grupo com np.unique/bincount.
+  Compensa em listas consolidadas de muitas receitas.
+
+aggregate escolhe entre as duas pelo tamanho da lista e depois mescla nomes
+parecidos (fuzzy_match.py). As funções aceitam qualquer objeto com os campos
+de ShoppingItem e devolvem ListItem.
+"""
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from ingredients import resolve_ingredient
+from nutrition import ingredient_density
+from fuzzy_match import merge_similar
+from shopping_items import ListItem
+from units import MASS, VOLUME, convert_unit, get_best_unit, lookup_unit, normalize_unit, unit_family
+
+
+def _output(first, quantity: float, unit: str, recipe_ids: List[str], recipe_names: List[str],
+            merged_from: List[dict], keep_separate: bool) -> ListItem:
+    best_qty, best_unit = get_best_unit(quantity, unit)
+    return ListItem(first.ingredient_name, best_qty, best_unit, first.bought, recipe_ids, recipe_names,
+                    first.id, merged_from, keep_separate)
+
+
+@lru_cache(maxsize=8192)
+def _density(name: str):
+    """Densidade pelo nome canônico (o mesmo do ingredient_id do grupo), com o nome original como reserva"""
+    return ingredient_density(resolve_ingredient(name).name) or ingredient_density(name)
+
+
+def aggregate_items(items: Sequence) -> List[ListItem]:
+    """Agrega item a item, convertendo cada quantidade para a unidade do grupo"""
+    aggregated = {}
+
+    for item in items:
+        # Massa e volume se somam quando a densidade do ingrediente é conhecida
+        density = _density(item.ingredient_name)
+        unit_norm = normalize_unit(item.unit)
+        # Unidades desconhecidas só se agregam com a mesma unidade
+        key = (item.ingredient_id, unit_family(unit_norm, density) or unit_norm)
+
+        existing = aggregated.get(key)
+        if existing is not None:
+            # Converte com a densidade do grupo, como a versão vetorizada
+            converted_qty, converted_unit = convert_unit(item.quantity, unit_norm, existing['unit'],
+                                                         density=density or existing['density'])
+            if converted_unit != existing['unit']:
+                # Sem conversão possível: linha separada por unidade, nunca soma a quantidade crua
+                key = (item.ingredient_id, unit_norm)
+                existing = aggregated.get(key)
+                converted_qty = item.quantity
+
+        if existing is None:
+            aggregated[key] = {
+                'first': item,
+                'quantity': item.quantity,
+                'unit': unit_norm,
+                'density': density,
+                'recipe_ids': item.recipe_ids.copy(),
+                'recipe_names': item.recipe_names.copy(),
+                'merged_from': item.merged_from.copy(),
+                'keep_separate': item.keep_separate,
+            }
+            continue
+
+        existing['quantity'] += converted_qty
+        # Busca linear: barata nas listas pequenas que passam por aqui
+        for rid in item.recipe_ids:
+            if rid not in existing['recipe_ids']:
+                existing['recipe_ids'].append(rid)
+        for rname in item.recipe_names:
+            if rname not in existing['recipe_names']:
+                existing['recipe_names'].append(rname)
+        existing['merged_from'].extend(item.merged_from)
+        existing['keep_separate'] = existing['keep_separate'] or item.keep_separate
+
+    return [
+        _output(data['first'], data['quantity'], data['unit'], data['recipe_ids'], data['recipe_names'],
+                data['merged_from'], data['keep_separate'])
+        for data in aggregated.values()
+    ]
+
+
+def aggregate_items_vectorized(items: Sequence) -> List[ListItem]:
+    """Agrega com as quantidades em arrays: um grupo por (ingredient_id, família)"""
+    if not items:
+        return []
+
+    # Nomes e unidades distintos viram códigos inteiros; cada um é resolvido uma vez
+    name_codes: Dict[str, int] = {}
+    unit_codes: Dict[str, int] = {}
+    item_names = np.fromiter((name_codes.setdefault(item.ingredient_name, len(name_codes)) for item in items),
+                             dtype=np.int64, count=len(items))
+    item_units = np.fromiter((unit_codes.setdefault(item.unit, len(unit_codes)) for item in items),
+                             dtype=np.int64, count=len(items))
+    quantities = np.fromiter((item.quantity for item in items), dtype=np.float64, count=len(items))
+
+    # Por nome: código do ingredient_id e densidade (0 se desconhecida)
+    id_codes: Dict[int, int] = {}
+    name_first = {}
+    for item in items:
+        name_first.setdefault(item.ingredient_name, item)
+    name_id = np.array([id_codes.setdefault(name_first[name].ingredient_id, len(id_codes)) for name in name_codes],
+                       dtype=np.int64)
+    name_density = np.array([_density(name) or 0.0 for name in name_codes], dtype=np.float64)
+
+    # Por unidade: símbolo canônico, fator para a base e código da família
+    # (unidades desconhecidas são uma família própria com fator 1)
+    family_codes: Dict[str, int] = {MASS: 0}
+    unit_symbols = []
+    unit_factor = np.ones(len(unit_codes), dtype=np.float64)
+    unit_family_code = np.empty(len(unit_codes), dtype=np.int64)
+    unit_is_volume = np.zeros(len(unit_codes), dtype=bool)
+    for code, unit in enumerate(unit_codes):
+        info = lookup_unit(unit)
+        if info is None:
+            symbol = normalize_unit(unit)
+            unit_family_code[code] = family_codes.setdefault(f"?{symbol}", len(family_codes))
+        else:
+            symbol = info.symbol
+            unit_factor[code] = info.factor
+            unit_family_code[code] = family_codes.setdefault(info.family, len(family_codes))
+            unit_is_volume[code] = info.family == VOLUME
+        unit_symbols.append(symbol)
+
+    # Volume de ingrediente com densidade conhecida conta como massa (em g)
+    densities = name_density[item_names]
+    as_mass = unit_is_volume[item_units] & (densities > 0)
+    families = np.where(as_mass, family_codes[MASS], unit_family_code[item_units])
+    to_base = unit_factor[item_units] * np.where(as_mass, densities, 1.0)
+
+    keys = name_id[item_names] * len(family_codes) + families
+    _, first_index, groups = np.unique(keys, return_index=True, return_inverse=True)
+    # Soma já na unidade do primeiro item de cada grupo (na ordem da lista, como no laço)
+    totals = np.bincount(groups, weights=quantities * to_base / to_base[first_index][groups])
+
+    # Grupos na ordem em que aparecem na lista; itens de cada grupo em ordem
+    order = np.argsort(first_index, kind='stable')
+    members = np.split(np.argsort(groups, kind='stable'), np.cumsum(np.bincount(groups))[:-1])
+
+    result = []
+    for group in order.tolist():
+        first = int(first_index[group])
+        quantity = float(totals[group])
+        group_items = [items[i] for i in members[group].tolist()]
+        recipe_ids = list(dict.fromkeys(chain.from_iterable(item.recipe_ids for item in group_items)))
+        recipe_names = list(dict.fromkeys(chain.from_iterable(item.recipe_names for item in group_items)))
+        merged_from = list(chain.from_iterable(item.merged_from for item in group_items))
+        keep_separate = any(item.keep_separate for item in group_items)
+        result.append(_output(items[first], quantity, unit_symbols[item_units[first]], recipe_ids, recipe_names,
+                              merged_from, keep_separate))
+    return result
+
+
+def aggregate(items: Sequence, vectorize_min_items: int, fuzzy_min_similarity: float = 0.0) -> List[ListItem]:
+    """Agregação exata e, se fuzzy_min_similarity > 0, mesclagem de nomes parecidos"""
+    if len(items) >= vectorize_min_items:
+        result = aggregate_items_vectorized(items)
+    else:
+        result = aggregate_items(items)
+    if fuzzy_min_similarity > 0:
+        result = merge_similar(result, fuzzy_min_similarity)
+    return result
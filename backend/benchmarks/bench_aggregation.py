@@ -0,0 +1,138 @@
+"""
+Benchmark of shopping-list aggregation (aggregation.py)
+
+Consolidated lists of 100, 1k and 10k items are built by repeating the
+recipes in fixtures/shopping_items.json with varied quantities, each copy
+counting as a different recipe. Three implementations are timed:
+
+- legacy: aggregate_ingredients before aggregation.py (linear membership
+  checks on recipe_ids/recipe_names), kept here as the baseline;
+- loop: aggregate_items;
+- vectorized: aggregate_items_vectorized.
+
+The outputs of loop and vectorized are checked against legacy. Pydantic
+model construction is left out of the baseline (see bench_shopping_items.py
+for the full request path).
+
+Usage: python backend/benchmarks/bench_aggregation.py [--sizes 100,1000,10000] [--repeat 5]
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregation import aggregate_items, aggregate_items_vectorized  # noqa: E402
+from nutrition import ingredient_density  # noqa: E402
+from shopping_items import ListItem  # noqa: E402
+from units import convert_unit, get_best_unit, normalize_unit, unit_family  # noqa: E402
+
+ITEMS_PATH = Path(__file__).parent / 'fixtures' / 'shopping_items.json'
+
+
+def legacy_aggregate(items: list) -> List[dict]:
+    """aggregate_ingredients before aggregation.py, without the model construction"""
+    aggregated = {}
+    for item in items:
+        density = ingredient_density(item.ingredient_name)
+        unit_norm = normalize_unit(item.unit)
+        key = (item.ingredient_id, unit_family(unit_norm, density) or unit_norm)
+        if key not in aggregated:
+            aggregated[key] = {
+                'ingredient_name': item.ingredient_name,
+                'quantity': item.quantity,
+                'unit': unit_norm,
+                'bought': item.bought,
+                'recipe_ids': item.recipe_ids.copy(),
+                'recipe_names': item.recipe_names.copy(),
+                'id': item.id
+            }
+            continue
+        existing = aggregated[key]
+        converted_qty, _ = convert_unit(item.quantity, unit_norm, existing['unit'], density=density)
+        existing['quantity'] += converted_qty
+        for rid in item.recipe_ids:
+            if rid not in existing['recipe_ids']:
+                existing['recipe_ids'].append(rid)
+        for rname in item.recipe_names:
+            if rname not in existing['recipe_names']:
+                existing['recipe_names'].append(rname)
+
+    result = []
+    for data in aggregated.values():
+        best_qty, best_unit = get_best_unit(data['quantity'], data['unit'])
+        result.append({**data, 'quantity': best_qty, 'unit': best_unit})
+    return result
+
+
+def build_items(base: list, size: int, rng: random.Random) -> List[ListItem]:
+    items = []
+    copy = 0
+    while len(items) < size:
+        copy += 1
+        for entry in base:
+            if len(items) >= size:
+                break
+            recipe_name = f"{entry['recipe']} #{copy}"
+            items.append(ListItem(
+                ingredient_name=entry['name'],
+                quantity=round(entry['quantity'] * rng.choice((0.5, 1, 1.5, 2)), 3),
+                unit=entry['unit'],
+                recipe_ids=[f"{recipe_name}-id"],
+                recipe_names=[recipe_name],
+            ))
+    return items
+
+
+def same_result(expected: List[dict], actual: List[ListItem]) -> bool:
+    if len(expected) != len(actual):
+        return False
+    for a, b in zip(expected, (item.to_doc() for item in actual)):
+        if (a['id'], a['unit'], a['recipe_ids'], a['recipe_names']) != (b['id'], b['unit'], b['recipe_ids'], b['recipe_names']):
+            return False
+        if not math.isclose(a['quantity'], b['quantity'], rel_tol=1e-9, abs_tol=0.01):
+            return False
+    return True
+
+
+def best_time(aggregate, items: list, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        aggregate(items)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shopping-list aggregation")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    base = json.loads(ITEMS_PATH.read_text(encoding='utf-8'))
+    rng = random.Random(42)
+
+    print(f"{'items':>7} {'lines':>6} {'legacy ms':>10} {'loop ms':>10} {'vector ms':>10} {'speedup':>8}  match")
+    ok = True
+    for size in (int(value) for value in args.sizes.split(',')):
+        items = build_items(base, size, rng)
+        expected = legacy_aggregate(items)
+        matches = same_result(expected, aggregate_items(items)) and same_result(expected, aggregate_items_vectorized(items))
+        ok = ok and matches
+
+        legacy = best_time(legacy_aggregate, items, args.repeat)
+        loop = best_time(aggregate_items, items, args.repeat)
+        vectorized = best_time(aggregate_items_vectorized, items, args.repeat)
+        print(f"{size:>7} {len(expected):>6} {legacy * 1000:>10.2f} {loop * 1000:>10.2f} "
+              f"{vectorized * 1000:>10.2f} {legacy / vectorized:>7.1f}x  {'yes' if matches else 'NO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
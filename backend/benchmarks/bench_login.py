@@ -0,0 +1,116 @@
+"""
+Benchmark of password verification under a burst of logins (passwords.py)
+
+A burst of concurrent logins runs on one event loop next to a probe that
+stands in for non-auth requests: every --probe-interval ms it sleeps and
+records how late it woke up (event-loop stall). Two setups:
+
+- inline: passlib verify called directly in the coroutine, as the login
+  handler did before passwords.py;
+- executor: PasswordHasher.verify_and_update on its bounded thread pool.
+
+Reported: login throughput and probe latency (p50/p99/max) with no logins
+(idle), inline and executor. A final run stores hashes with a lower cost
+and checks that the first login rehashes them with the configured one.
+
+Usage: python backend/benchmarks/bench_login.py [--logins 40] [--concurrency 8] [--rounds 10] [--workers 2]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from passlib.context import CryptContext
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from passwords import PasswordHasher, bcrypt_rounds  # noqa: E402
+
+PASSWORD = "senha-de-teste"
+
+
+async def probe(stop: asyncio.Event, interval: float, delays: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - start - interval)
+
+
+async def run_burst(login, logins: int, concurrency: int, interval: float):
+    delays = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, interval, delays))
+    await asyncio.sleep(interval * 5)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with semaphore:
+            await login()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    return (logins / elapsed if logins else 0.0), delays
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def report(label: str, rate: float, delays: list):
+    ms = [delay * 1000 for delay in delays]
+    print(f"{label:<10} {rate:>10.1f} {statistics.median(ms):>10.2f} {percentile(ms, 0.99):>10.2f} {max(ms):>10.2f}")
+
+
+async def main_async(args) -> int:
+    hasher = PasswordHasher(rounds=args.rounds, max_workers=args.workers, max_pending=args.logins)
+    hashed = await hasher.hash(PASSWORD)
+    inline_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=args.rounds)
+    interval = args.probe_interval / 1000
+
+    async def idle_login():
+        await asyncio.sleep(0)
+
+    async def inline_login():
+        assert inline_context.verify(PASSWORD, hashed)
+
+    async def executor_login():
+        valid, _ = await hasher.verify_and_update(PASSWORD, hashed)
+        assert valid
+
+    print(f"bcrypt rounds={args.rounds}, {args.logins} logins, concurrency {args.concurrency}, "
+          f"{args.workers} worker threads\n")
+    print(f"{'':<10} {'logins/s':>10} {'probe p50':>10} {'probe p99':>10} {'probe max':>10}  (ms)")
+    report("idle", *await run_burst(idle_login, 0, args.concurrency, interval))
+    report("inline", *await run_burst(inline_login, args.logins, args.concurrency, interval))
+    report("executor", *await run_burst(executor_login, args.logins, args.concurrency, interval))
+
+    # Mudança de custo: o hash antigo confere e volta refeito com o custo novo
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds - 1).hash(PASSWORD)
+    valid, new_hash = await hasher.verify_and_update(PASSWORD, old_hash)
+    rehashed = valid and new_hash is not None and bcrypt_rounds(new_hash) == args.rounds
+    print(f"\nRehash on cost change ({args.rounds - 1} -> {args.rounds}): {'yes' if rehashed else 'NO'}")
+    hasher.close()
+    return 0 if rehashed else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password verification under a login burst")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--probe-interval", type=float, default=5.0, help="ms between probe requests")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
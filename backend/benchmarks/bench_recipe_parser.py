@@ -0,0 +1,111 @@
+"""
+Benchmark of the local clipboard recipe parser (recipe_parser.py)
+
+Runs the parser over a labelled corpus of pasted recipes and reports:
+- acceptance: how many texts clear the confidence threshold (i.e. skip the LLM)
+- false accepts: texts labelled as "needs LLM" that were accepted anyway
+- field accuracy on accepted recipes: name, portions, step count and
+  ingredients (name, quantity and unit all matching)
+- throughput in parses per second
+
+Usage: python backend/benchmarks/bench_recipe_parser.py [--threshold 0.85] [--iterations 2000]
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from recipe_parser import parse_recipe_text  # noqa: E402
+
+CORPUS_PATH = Path(__file__).parent / 'fixtures' / 'clipboard_corpus.json'
+
+
+def ingredient_matches(parsed: dict, expected: list) -> bool:
+    name, quantity, unit = expected[:3]
+    mandatory = expected[3] if len(expected) > 3 else True
+    return (
+        parsed['name'].lower() == name.lower()
+        and math.isclose(parsed['quantity'], quantity, rel_tol=0.01)
+        and parsed['unit'] == unit
+        and parsed['mandatory'] == mandatory
+    )
+
+
+def evaluate(corpus: list, threshold: float) -> dict:
+    stats = {
+        'texts': len(corpus), 'structured': 0, 'accepted': 0, 'false_accepts': 0,
+        'name_ok': 0, 'portions_ok': 0, 'steps_ok': 0,
+        'ingredients_expected': 0, 'ingredients_ok': 0,
+    }
+    for entry in corpus:
+        result = parse_recipe_text(entry['text'])
+        accepted = result.confidence >= threshold
+        expected = entry['expected']
+
+        if expected is None:
+            if accepted:
+                stats['false_accepts'] += 1
+                print(f"  ✗ false accept ({result.confidence}): {entry['text'][:50]!r}")
+            continue
+
+        stats['structured'] += 1
+        if not accepted:
+            print(f"  ✗ rejected ({result.confidence}): {expected['name']}")
+            continue
+        stats['accepted'] += 1
+
+        recipe = result.recipe
+        stats['name_ok'] += recipe['name'] == expected['name']
+        stats['portions_ok'] += recipe['portions'] == expected['portions']
+        stats['steps_ok'] += recipe['notes'].count('\n') == expected['steps']
+        stats['ingredients_expected'] += len(expected['ingredients'])
+        for parsed, wanted in zip(recipe['ingredients'], expected['ingredients']):
+            if ingredient_matches(parsed, wanted):
+                stats['ingredients_ok'] += 1
+            else:
+                print(f"  ✗ {expected['name']}: got {parsed}, expected {wanted}")
+    return stats
+
+
+def throughput(corpus: list, iterations: int) -> float:
+    texts = [entry['text'] for entry in corpus]
+    start = time.perf_counter()
+    for i in range(iterations):
+        parse_recipe_text(texts[i % len(texts)])
+    return iterations / (time.perf_counter() - start)
+
+
+def pct(part: int, total: int) -> str:
+    return f"{100 * part / total:.1f}%" if total else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local clipboard recipe parser")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = json.loads(CORPUS_PATH.read_text(encoding='utf-8'))
+    print(f"Corpus: {len(corpus)} texts, threshold {args.threshold}\n")
+    stats = evaluate(corpus, args.threshold)
+    rate = throughput(corpus, args.iterations)
+
+    accepted = stats['accepted']
+    print(f"\nAccepted (LLM skipped): {accepted}/{stats['structured']} structured texts "
+          f"({pct(accepted, stats['structured'])})")
+    print(f"False accepts:          {stats['false_accepts']}/{stats['texts'] - stats['structured']} unstructured texts")
+    print(f"Name accuracy:          {pct(stats['name_ok'], accepted)}")
+    print(f"Portions accuracy:      {pct(stats['portions_ok'], accepted)}")
+    print(f"Step count accuracy:    {pct(stats['steps_ok'], accepted)}")
+    print(f"Ingredient accuracy:    {stats['ingredients_ok']}/{stats['ingredients_expected']} "
+          f"({pct(stats['ingredients_ok'], stats['ingredients_expected'])})")
+    print(f"Throughput:             {rate:,.0f} parses/s ({1e6 / rate:.1f} µs/parse)")
+    return 0 if stats['false_accepts'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
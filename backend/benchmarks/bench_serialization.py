@@ -0,0 +1,255 @@
+"""
+Benchmark of the GET /recipes and GET /shopping-lists response path (fast_json.py)
+
+Builds 500 stored recipes and 200 stored shopping lists (documents shaped
+like the ones server.py writes, plus the Mongo _id and a stray legacy
+field) and serializes them two ways:
+
+- pydantic: what FastAPI does with response_model: the documents are
+  validated into List[Recipe] / List[ShoppingList], dumped in JSON mode
+  and encoded with json.dumps (the models are copied here since server.py
+  needs the full environment to import);
+- trusted: the documents as returned by the strict projection, defaults
+  merged in and encoded with orjson.
+
+Reported: ms per response (best of --repeat), responses/s and body size.
+Both bodies are decoded and compared; created_at is compared as a
+datetime (Pydantic writes "Z", the stored string keeps "+00:00").
+
+Usage: python backend/benchmarks/bench_serialization.py [--recipes 500] [--lists 200] [--repeat 20]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fast_json import model_defaults, model_projection  # noqa: E402
+from ingredients import ingredient_id  # noqa: E402
+
+ITEMS_PATH = Path(__file__).parent / 'fixtures' / 'shopping_items.json'
+
+
+class Ingredient(BaseModel):
+    """server.Ingredient"""
+    name: str
+    quantity: float
+    unit: str
+    mandatory: bool = True
+    ingredient_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def resolve_ingredient_id(self):
+        self.ingredient_id = ingredient_id(self.name)
+        return self
+
+
+class Recipe(BaseModel):
+    """server.Recipe"""
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    name: str
+    portions: int
+    link: Optional[str] = ""
+    notes: Optional[str] = ""
+    ingredients: List[Ingredient]
+    tempo_preparo: Optional[int] = 0
+    calorias_por_porcao: Optional[int] = 0
+    custo_estimado: Optional[float] = 0.0
+    restricoes: List[str] = []
+    imagem_url: Optional[str] = ""
+    is_suggestion: bool = False
+    suggestion_type: Optional[str] = ""
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ShoppingItem(BaseModel):
+    """server.ShoppingItem"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    ingredient_name: str
+    quantity: float
+    unit: str
+    bought: bool = False
+    recipe_ids: List[str] = []
+    recipe_names: List[str] = []
+    ingredient_id: Optional[int] = None
+    merged_from: List[dict] = []
+    keep_separate: bool = False
+
+    @model_validator(mode="after")
+    def resolve_ingredient_id(self):
+        self.ingredient_id = ingredient_id(self.ingredient_name)
+        return self
+
+
+class ShoppingList(BaseModel):
+    """server.ShoppingList"""
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    name: str
+    is_quick_list: bool = False
+    items: List[ShoppingItem] = []
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+RECIPE_PROJECTION = model_projection(Recipe, nested={"ingredients": Ingredient})
+RECIPE_DEFAULTS = model_defaults(Recipe)
+INGREDIENT_DEFAULTS = model_defaults(Ingredient)
+SHOPPING_LIST_PROJECTION = model_projection(ShoppingList, nested={"items": ShoppingItem})
+SHOPPING_LIST_DEFAULTS = model_defaults(ShoppingList)
+SHOPPING_ITEM_DEFAULTS = model_defaults(ShoppingItem)
+
+
+def project(doc: dict, projection: dict) -> dict:
+    """What Mongo returns for `projection` (one level of nesting, as in server.py)"""
+    fields = {}
+    for path in projection:
+        if path != "_id" and projection[path]:
+            head, _, tail = path.partition('.')
+            fields.setdefault(head, set())
+            if tail:
+                fields[head].add(tail)
+    projected = {}
+    for name, nested in fields.items():
+        if name not in doc:
+            continue
+        if nested:
+            projected[name] = [{k: v for k, v in sub.items() if k in nested} for sub in doc[name]]
+        else:
+            projected[name] = doc[name]
+    return projected
+
+
+def trusted_recipe(doc: dict) -> dict:
+    """server.trusted_recipe"""
+    recipe = {**RECIPE_DEFAULTS, **doc}
+    recipe['ingredients'] = [
+        {**INGREDIENT_DEFAULTS, **ing, 'ingredient_id': ingredient_id(ing['name'])}
+        for ing in doc.get('ingredients', [])
+    ]
+    return recipe
+
+
+def trusted_shopping_list(doc: dict) -> dict:
+    """server.trusted_shopping_list"""
+    shopping_list = {**SHOPPING_LIST_DEFAULTS, **doc}
+    shopping_list['items'] = [
+        {**SHOPPING_ITEM_DEFAULTS, **item, 'ingredient_id': ingredient_id(item['ingredient_name'])}
+        for item in doc.get('items', [])
+    ]
+    return shopping_list
+
+
+def stored_recipes(base: list, count: int, rng: random.Random) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    docs = []
+    for i in range(count):
+        entries = rng.sample(base, rng.randint(5, 15))
+        docs.append({
+            '_id': uuid.uuid4().hex[:24],
+            'id': str(uuid.uuid4()), 'user_id': 'u-1', 'name': f"Receita {i}", 'portions': rng.randint(1, 8),
+            'link': f"https://www.tudogostoso.com.br/receita/{i}", 'notes': "Servir quente. " * rng.randint(0, 5),
+            'ingredients': [{'name': e['name'], 'quantity': float(e['quantity']), 'unit': e['unit'],
+                             'mandatory': True, 'ingredient_id': ingredient_id(e['name'])} for e in entries],
+            'tempo_preparo': rng.randint(10, 120), 'calorias_por_porcao': rng.randint(100, 900),
+            'custo_estimado': round(rng.uniform(5, 80), 2), 'restricoes': ['vegetariano'] if i % 4 == 0 else [],
+            'imagem_url': "", 'is_suggestion': False, 'suggestion_type': "",
+            'created_at': (now - timedelta(hours=i)).isoformat(),
+            'legacy_field': "ignorado",
+        })
+    return docs
+
+
+def stored_lists(base: list, count: int, rng: random.Random) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    docs = []
+    for i in range(count):
+        entries = rng.sample(base, rng.randint(10, 40))
+        docs.append({
+            '_id': uuid.uuid4().hex[:24],
+            'id': str(uuid.uuid4()), 'user_id': 'u-1', 'name': f"Lista {i}", 'is_quick_list': i == 0,
+            'items': [{'id': str(uuid.uuid4()), 'ingredient_name': e['name'], 'quantity': float(e['quantity']),
+                       'unit': e['unit'], 'bought': rng.random() < 0.3, 'recipe_ids': ['r-1'],
+                       'recipe_names': [e['recipe']], 'ingredient_id': ingredient_id(e['name'])}
+                      for e in entries],
+            'created_at': (now - timedelta(days=i)).isoformat(),
+        })
+    return docs
+
+
+def pydantic_encoder(model):
+    adapter = TypeAdapter(List[model])
+
+    def encode(docs: List[dict]) -> bytes:
+        # fastapi.routing.serialize_response + JSONResponse.render
+        content = adapter.dump_python(adapter.validate_python(docs), mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                          separators=(",", ":")).encode("utf-8")
+    return encode
+
+
+def trusted_encoder(projection: dict, build):
+    def encode(docs: List[dict]) -> bytes:
+        return orjson.dumps([build(doc) for doc in docs])
+    return encode, projection
+
+
+def normalize(body: bytes):
+    decoded = json.loads(body)
+    for doc in decoded:
+        doc['created_at'] = datetime.fromisoformat(doc['created_at'].replace('Z', '+00:00'))
+    return decoded
+
+
+def best_time(encode, docs: List[dict], repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode(docs)
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recipe and shopping-list response path")
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--lists", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    base = json.loads(ITEMS_PATH.read_text(encoding='utf-8'))
+    cases = (
+        ("recipes", stored_recipes(base, args.recipes, rng), Recipe, RECIPE_PROJECTION, trusted_recipe),
+        ("lists", stored_lists(base, args.lists, rng), ShoppingList, SHOPPING_LIST_PROJECTION, trusted_shopping_list),
+    )
+
+    print(f"{'payload':>8} {'':>9} {'ms':>8} {'resp/s':>8} {'KiB':>8}")
+    ok = True
+    for label, stored, model, projection, build in cases:
+        # Mongo aplica as projeções antes da resposta chegar ao handler
+        full = [{k: v for k, v in doc.items() if k != '_id'} for doc in stored]
+        projected = [project(doc, projection) for doc in stored]
+        slow, slow_body = best_time(pydantic_encoder(model), full, args.repeat)
+        fast, fast_body = best_time(trusted_encoder(projection, build)[0], projected, args.repeat)
+        for name, elapsed, body in (("pydantic", slow, slow_body), ("trusted", fast, fast_body)):
+            print(f"{label:>8} {name:>9} {elapsed * 1000:>8.2f} {1 / elapsed:>8.1f} {len(body) / 1024:>8.1f}")
+        print(f"{'':>8} {'speedup':>9} {slow / fast:>7.1f}x")
+        ok = ok and normalize(slow_body) == normalize(fast_body)
+    print(f"\nSame content: {'yes' if ok else 'NO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Benchmark of the shopping-list request path (shopping_items.py)
+
+Simulates POST /shopping-lists/{id}/add-recipe on stored lists of 50, 200
+and 1000 lines: the stored documents are loaded, a recipe is added, the
+list is aggregated and the documents to write back are built.
+
+- pydantic: the previous path, every stored item validated into a
+  ShoppingItem, aggregated, rebuilt as ShoppingItem and dumped with
+  model_dump (the model is copied here since server.py needs the full
+  environment to import);
+- slots: ListItem read from and written to the documents directly.
+
+Reported per request: latency (best of --repeat), peak memory allocated
+while handling it and memory blocks still held afterwards (the documents
+to write), both from tracemalloc.
+
+Usage: python backend/benchmarks/bench_shopping_items.py [--sizes 50,200,1000] [--repeat 20]
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregation import aggregate_items  # noqa: E402
+from ingredients import ingredient_id  # noqa: E402
+from shopping_items import items_from_docs, items_to_docs, recipe_items  # noqa: E402
+
+ITEMS_PATH = Path(__file__).parent / 'fixtures' / 'shopping_items.json'
+
+
+class ShoppingItem(BaseModel):
+    """server.ShoppingItem"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    ingredient_name: str
+    quantity: float
+    unit: str
+    bought: bool = False
+    recipe_ids: List[str] = []
+    recipe_names: List[str] = []
+    ingredient_id: Optional[int] = None
+    merged_from: List[dict] = []
+    keep_separate: bool = False
+
+    @model_validator(mode="after")
+    def resolve_ingredient_id(self):
+        self.ingredient_id = ingredient_id(self.ingredient_name)
+        return self
+
+
+def pydantic_request(stored: List[dict], recipe: dict) -> List[dict]:
+    current_items = [ShoppingItem(**item) for item in stored]
+    current_items.extend(
+        ShoppingItem(ingredient_name=ing['name'], quantity=ing['quantity'], unit=ing['unit'],
+                     bought=False, recipe_ids=[recipe['id']], recipe_names=[recipe['name']])
+        for ing in recipe['ingredients']
+    )
+    aggregated = [ShoppingItem.model_construct(**item.to_doc()) for item in aggregate_items(current_items)]
+    return [item.model_dump() for item in aggregated]
+
+
+def slots_request(stored: List[dict], recipe: dict) -> List[dict]:
+    current_items = items_from_docs(stored)
+    current_items.extend(recipe_items(recipe, 1.0))
+    return items_to_docs(aggregate_items(current_items))
+
+
+def stored_list(base: list, size: int) -> List[dict]:
+    """Already aggregated list: the fixture ingredients plus distinct extra lines"""
+    docs = []
+    seen = set()
+    for entry in base:
+        if entry['name'] not in seen:
+            seen.add(entry['name'])
+            docs.append(entry)
+    docs = docs[:size]
+    docs += [{'name': f"Item extra {i}", 'quantity': 1 + i % 7, 'unit': 'g'} for i in range(size - len(docs))]
+    return [
+        {'id': str(uuid.uuid4()), 'ingredient_name': entry['name'], 'quantity': float(entry['quantity']),
+         'unit': entry['unit'], 'bought': False, 'recipe_ids': ['r-1'], 'recipe_names': ['Receita'],
+         'ingredient_id': ingredient_id(entry['name'])}
+        for entry in docs
+    ]
+
+
+def measure(request, stored: List[dict], recipe: dict, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request(stored, recipe)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    docs = request(stored, recipe)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    return best, blocks, peak, docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shopping-list request path")
+    parser.add_argument("--sizes", default="50,200,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    base = json.loads(ITEMS_PATH.read_text(encoding='utf-8'))
+    first_recipe = base[0]['recipe']
+    recipe = {
+        'id': 'r-2',
+        'name': first_recipe,
+        'ingredients': [{'name': entry['name'], 'quantity': entry['quantity'], 'unit': entry['unit']}
+                        for entry in base if entry['recipe'] == first_recipe],
+    }
+
+    print(f"{'lines':>6} {'':>9} {'ms/request':>11} {'peak KiB':>9} {'held blocks':>12}")
+    ok = True
+    for size in (int(value) for value in args.sizes.split(',')):
+        stored = stored_list(base, size)
+        results = {}
+        for label, request in (("pydantic", pydantic_request), ("slots", slots_request)):
+            latency, blocks, peak, docs = measure(request, stored, recipe, args.repeat)
+            results[label] = (latency, docs)
+            print(f"{size:>6} {label:>9} {latency * 1000:>11.3f} {peak / 1024:>9.1f} {blocks:>12}")
+        strip_ids = [[{k: v for k, v in doc.items() if k != 'id'} for doc in docs] for _, docs in results.values()]
+        ok = ok and strip_ids[0] == strip_ids[1]
+        print(f"{'':>6} {'speedup':>9} {results['pydantic'][0] / results['slots'][0]:>10.1f}x")
+    print(f"\nSame documents: {'yes' if ok else 'NO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark of the unit registry (units.py)
+
+- Conversion throughput: the previous convert_unit (mass/volume dicts rebuilt
+  on every call, metric units only) against the registry-based one.
+- Shopping-list length: items from a realistic set of recipes aggregated by
+  ingredient name with each implementation (the previous one keeps
+  incompatible units apart; the registry also merges kitchen measures,
+  count-unit plurals and, with the ingredient density, mass with volume).
+
+Usage: python backend/benchmarks/bench_units.py [--conversions 200000]
+"""
+import argparse
+import json
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from nutrition import ingredient_density  # noqa: E402
+from units import convert_unit, normalize_ingredient_name, normalize_unit, unit_family  # noqa: E402
+
+ITEMS_PATH = Path(__file__).parent / 'fixtures' / 'shopping_items.json'
+
+
+def legacy_convert_unit(quantity: float, from_unit: str, to_unit: str) -> tuple:
+    """convert_unit before the registry, kept here as the baseline"""
+    from_unit = from_unit.lower().strip()
+    to_unit = to_unit.lower().strip()
+    mass_conversions = {'g': 1, 'grama': 1, 'gramas': 1, 'kg': 1000, 'kilo': 1000, 'quilograma': 1000,
+                        'quilogramas': 1000, 'mg': 0.001, 'miligrama': 0.001, 'miligramas': 0.001}
+    volume_conversions = {'ml': 1, 'mililitro': 1, 'mililitros': 1, 'l': 1000, 'litro': 1000, 'litros': 1000,
+                          'cl': 10, 'centilitro': 10, 'centilitros': 10}
+    if from_unit in mass_conversions and to_unit in mass_conversions:
+        return quantity * mass_conversions[from_unit] / mass_conversions[to_unit], to_unit
+    if from_unit in volume_conversions and to_unit in volume_conversions:
+        return quantity * volume_conversions[from_unit] / volume_conversions[to_unit], to_unit
+    return quantity, from_unit
+
+
+def legacy_normalize_unit(unit: str) -> str:
+    unit_lower = unit.lower().strip()
+    mapping = {'g': 'g', 'grama': 'g', 'gramas': 'g', 'kg': 'kg', 'kilo': 'kg', 'quilograma': 'kg',
+               'quilogramas': 'kg', 'mg': 'mg', 'miligrama': 'mg', 'miligramas': 'mg', 'ml': 'ml',
+               'mililitro': 'ml', 'mililitros': 'ml', 'l': 'l', 'litro': 'l', 'litros': 'l', 'cl': 'cl',
+               'centilitro': 'cl', 'centilitros': 'cl'}
+    return mapping.get(unit_lower, unit)
+
+
+def legacy_name(name: str) -> str:
+    normalized = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('ASCII')
+    return ' '.join(normalized.lower().strip().split())
+
+
+def legacy_list_length(items: list) -> int:
+    """Number of lines produced by the previous aggregate_ingredients"""
+    aggregated = {}
+    for item in items:
+        key = legacy_name(item['name'])
+        if key not in aggregated:
+            aggregated[key] = legacy_normalize_unit(item['unit'])
+            continue
+        _, converted_unit = legacy_convert_unit(item['quantity'], item['unit'], aggregated[key])
+        if converted_unit != aggregated[key]:
+            aggregated[f"{key}_{legacy_normalize_unit(item['unit'])}"] = legacy_normalize_unit(item['unit'])
+    return len(aggregated)
+
+
+def registry_list_length(items: list) -> int:
+    """Number of lines produced by aggregate_ingredients with the registry"""
+    groups = set()
+    for item in items:
+        unit = normalize_unit(item['unit'])
+        groups.add((normalize_ingredient_name(item['name']), unit_family(unit, ingredient_density(item['name'])) or unit))
+    return len(groups)
+
+
+def conversions_per_second(convert, pairs: list, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        quantity, from_unit, to_unit = pairs[i % len(pairs)]
+        convert(quantity, from_unit, to_unit)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the unit registry")
+    parser.add_argument("--conversions", type=int, default=200000)
+    args = parser.parse_args()
+
+    items = json.loads(ITEMS_PATH.read_text(encoding='utf-8'))
+    # (quantity, item unit, unit of the first item with the same ingredient), as in aggregation
+    first_unit = {}
+    pairs = []
+    for item in items:
+        key = normalize_ingredient_name(item['name'])
+        first_unit.setdefault(key, item['unit'])
+        pairs.append((item['quantity'], item['unit'], first_unit[key]))
+
+    legacy_rate = conversions_per_second(legacy_convert_unit, pairs, args.conversions)
+    registry_rate = conversions_per_second(convert_unit, pairs, args.conversions)
+    converted_legacy = sum(legacy_convert_unit(*pair)[1] == pair[2] for pair in pairs)
+    converted_registry = sum(convert_unit(*pair)[1] == pair[2] for pair in pairs)
+
+    legacy_length = legacy_list_length(items)
+    registry_length = registry_list_length(items)
+
+    print(f"Items: {len(items)} from {len({item['recipe'] for item in items})} recipes\n")
+    print(f"{'':<22} {'legacy':>12} {'registry':>12}")
+    print(f"{'conversions/s':<22} {legacy_rate:>12,.0f} {registry_rate:>12,.0f}")
+    print(f"{'convertible pairs':<22} {converted_legacy:>12} {converted_registry:>12}")
+    print(f"{'shopping list lines':<22} {legacy_length:>12} {registry_length:>12}")
+    print(f"\nList length reduction: {100 * (legacy_length - registry_length) / legacy_length:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Benchmark of TudoGostoso page extraction (tudogostoso.py)
+
+Compares, per saved HTML page, the legacy extractor (BeautifulSoup with
+html.parser scanning the whole tree for 'ingredient|item' classes) with the
+current engine (schema.org JSON-LD first, lxml + targeted XPaths as fallback).
+Reports median parse time per page and whether the extracted name, portions,
+ingredient count and step count match the fixture manifest.
+
+Usage: python backend/benchmarks/bench_web_extraction.py [--iterations 50]
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from tudogostoso import parse_recipe_page  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures' / 'tudogostoso'
+
+
+def legacy_parse_recipe_page(html: bytes, url: str) -> dict:
+    """Extractor used before the JSON-LD engine, kept here as the baseline (eval of fractions replaced by division)"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    name = ''
+    h1 = soup.find('h1')
+    if h1:
+        name = h1.get_text(strip=True)
+
+    ingredients = []
+    for ing_elem in soup.find_all(['li', 'div'], class_=re.compile(r'ingredient|item')):
+        text = ing_elem.get_text(strip=True)
+        if text and len(text) > 2:
+            match = re.match(r'([0-9.,/]+)\s*([a-zá-úã-ü]+)?\s+(?:de\s+)?(.+)', text, re.IGNORECASE)
+            if match:
+                quantity = match.group(1).replace(',', '.')
+                try:
+                    qty = float(quantity) if '/' not in quantity else float(quantity.split('/')[0]) / float(quantity.split('/')[1])
+                except (ValueError, ZeroDivisionError):
+                    qty = 1.0
+                ingredients.append({'name': match.group(3).strip(), 'quantity': qty,
+                                    'unit': (match.group(2) or 'unidade').strip(), 'mandatory': True})
+            else:
+                ingredients.append({'name': text, 'quantity': 1.0, 'unit': 'unidade', 'mandatory': True})
+
+    preparation_steps = []
+    for step in soup.find_all(['li', 'p'], class_=re.compile(r'step|modo|preparo|instruction')):
+        text = step.get_text(strip=True)
+        if text and len(text) > 10:
+            preparation_steps.append(text)
+
+    portions = 4
+    portions_text = soup.find(string=re.compile(r'(\d+)\s*porç[õo]es?', re.IGNORECASE))
+    if portions_text:
+        match = re.search(r'(\d+)', portions_text)
+        if match:
+            portions = int(match.group(1))
+
+    return {
+        'name': name or 'Receita Importada',
+        'portions': portions,
+        'link': url,
+        'notes': '\n'.join(preparation_steps),
+        'ingredients': ingredients[:15],
+    }
+
+
+def step_count(recipe: dict, legacy: bool) -> int:
+    notes = recipe['notes']
+    if not notes:
+        return 0
+    return len(notes.split('\n')) - (0 if legacy else 1)
+
+
+def check(recipe: dict, expected: dict, legacy: bool) -> list:
+    problems = []
+    if recipe['name'] != expected['name']:
+        problems.append(f"name={recipe['name']!r}")
+    if recipe['portions'] != expected['portions']:
+        problems.append(f"portions={recipe['portions']}")
+    if len(recipe['ingredients']) != expected['ingredients']:
+        problems.append(f"ingredients={len(recipe['ingredients'])}")
+    if step_count(recipe, legacy) != expected['steps']:
+        problems.append(f"steps={step_count(recipe, legacy)}")
+    return problems
+
+
+def median_ms(fn, html: bytes, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(html, 'https://www.tudogostoso.com.br/receita/fixture.html')
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TudoGostoso page extraction")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    manifest = json.loads((FIXTURES_DIR / 'expected.json').read_text(encoding='utf-8'))
+    print(f"{'page':<32} {'size':>7} {'legacy ms':>10} {'new ms':>8} {'speedup':>8}  legacy / new accuracy")
+
+    legacy_total = new_total = 0.0
+    new_failures = 0
+    for filename, expected in manifest.items():
+        html = (FIXTURES_DIR / filename).read_bytes()
+        legacy_ms = median_ms(legacy_parse_recipe_page, html, args.iterations)
+        new_ms = median_ms(parse_recipe_page, html, args.iterations)
+        legacy_total += legacy_ms
+        new_total += new_ms
+
+        legacy_problems = check(legacy_parse_recipe_page(html, filename), expected, legacy=True)
+        new_problems = check(parse_recipe_page(html, filename), expected, legacy=False)
+        new_failures += bool(new_problems)
+        print(f"{filename:<32} {len(html) // 1024:>5}KB {legacy_ms:>10.2f} {new_ms:>8.2f} {legacy_ms / new_ms:>7.1f}x"
+              f"  {'ok' if not legacy_problems else ', '.join(legacy_problems)}"
+              f" / {'ok' if not new_problems else ', '.join(new_problems)}")
+
+    print(f"\nTotal: legacy {legacy_total:.2f} ms, new {new_total:.2f} ms ({legacy_total / new_total:.1f}x faster)")
+    return 0 if new_failures == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
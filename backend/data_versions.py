@@ -0,0 +1,56 @@
+"""
+Versões por usuário das coleções exibidas pelo frontend (receitas e listas).
+
+Cada escrita nas receitas ou listas de um usuário incrementa um contador
+(coleção data_versions, um documento por usuário). O contador vira um ETag
+fraco nas respostas de GET /recipes e GET /shopping-lists; quando o cliente
+manda o mesmo valor em If-None-Match, a resposta é 304 sem carregar nem
+serializar os documentos, ao custo de uma leitura pelo _id.
+
+As sugestões da página inicial (receitas com is_suggestion) têm um contador
+próprio, que só entra na chave do cache das seções de GET /home.
+
+O incremento é feito depois da escrita: uma leitura concorrente pode no
+máximo devolver dados novos com a versão antiga, o que só causa um 200 a
+mais na próxima revalidação, nunca um 304 com dados velhos.
+"""
+from typing import Dict, Optional
+
+RECIPES = "recipes"
+SHOPPING_LISTS = "shopping_lists"
+SUGGESTIONS = "suggestions"
+KINDS = (RECIPES, SHOPPING_LISTS, SUGGESTIONS)
+
+
+def make_etag(kind: str, version: int) -> str:
+    return f'W/"{kind}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/ dos dois lados
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+class DataVersions:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def current(self, user_id: str, kind: str) -> int:
+        doc = await self.collection.find_one({"_id": user_id}, {"_id": 0, kind: 1})
+        return doc.get(kind, 0) if doc else 0
+
+    async def all(self, user_id: str) -> Dict[str, int]:
+        """Versões de todos os tipos numa única leitura"""
+        doc = await self.collection.find_one({"_id": user_id}, {"_id": 0}) or {}
+        return {kind: doc.get(kind, 0) for kind in KINDS}
+
+    async def etag(self, user_id: str, kind: str) -> str:
+        return make_etag(kind, await self.current(user_id, kind))
+
+    async def bump(self, user_id: str, kind: str):
+        await self.collection.update_one({"_id": user_id}, {"$inc": {kind: 1}}, upsert=True)
@@ -0,0 +1,209 @@
+"""
+Provedor LLM falso e determinístico para testes locais e medições de throughput.
+
+Reproduz respostas gravadas por família de prompt (estimativa, importação do
+clipboard, sugestões, tendências e onboarding) com latência, taxa de erro e
+respostas truncadas configuráveis. Ativado com LLM_PROVIDER=fake ao iniciar o
+server.py.
+
+Variáveis de ambiente:
+- FAKE_LLM_RESPONSES: caminho do JSON de respostas gravadas
+- FAKE_LLM_LATENCY: distribuição de latência em segundos ("fixed:0.5",
+  "uniform:0.2,1.5", "normal:1.0,0.3", "lognormal:0.0,0.5")
+- FAKE_LLM_LATENCY_<FAMILIA>: sobrescreve a latência de uma família
+  (ex: FAKE_LLM_LATENCY_ESTIMATION=fixed:0.1)
+- FAKE_LLM_ERROR_RATE: fração de chamadas que falham (0.0 - 1.0)
+- FAKE_LLM_TRUNCATE_RATE: fração de respostas cortadas no meio
+- FAKE_LLM_SEED: semente do gerador pseudoaleatório
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESPONSES_PATH = Path(__file__).parent / 'fake_llm_responses.json'
+
+FAMILIES = ("estimation", "clipboard_import", "suggestions", "trending", "onboarding")
+
+# Prefixos de session_id usados pelo server.py -> família de prompt
+# (ordem importa: prefixos mais específicos primeiro)
+SESSION_PREFIXES = (
+    ("estimate-", "estimation"),
+    ("import-", "clipboard_import"),
+    ("ingredient-suggestions-", "suggestions"),
+    ("trending-suggestions-", "trending"),
+    ("suggestions-", "suggestions"),
+    ("onboarding-", "onboarding"),
+)
+
+
+class FakeLlmError(Exception):
+    """Erro injetado pelo provedor falso"""
+
+
+class LatencyDistribution:
+    """Distribuição de latência parseada de uma especificação "tipo:params" """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, params = spec.partition(':')
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(',') if p.strip()]
+
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Distribuição de latência inválida: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "normal":
+            value = rng.gauss(self.params[0], self.params[1])
+        else:
+            value = rng.lognormvariate(self.params[0], self.params[1])
+        return max(0.0, value)
+
+
+class FakeLlmConfig:
+    """Configuração do provedor falso, lida das variáveis de ambiente"""
+
+    def __init__(
+        self,
+        responses: Dict[str, List[str]],
+        latency: LatencyDistribution,
+        family_latency: Optional[Dict[str, LatencyDistribution]] = None,
+        error_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.responses = responses
+        self.latency = latency
+        self.family_latency = family_latency or {}
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeLlmConfig":
+        responses_path = Path(os.environ.get('FAKE_LLM_RESPONSES', DEFAULT_RESPONSES_PATH))
+        responses = load_recorded_responses(responses_path)
+
+        family_latency = {}
+        for family in FAMILIES:
+            spec = os.environ.get(f'FAKE_LLM_LATENCY_{family.upper()}')
+            if spec:
+                family_latency[family] = LatencyDistribution(spec)
+
+        return cls(
+            responses=responses,
+            latency=LatencyDistribution(os.environ.get('FAKE_LLM_LATENCY', 'fixed:0')),
+            family_latency=family_latency,
+            error_rate=float(os.environ.get('FAKE_LLM_ERROR_RATE', '0')),
+            truncate_rate=float(os.environ.get('FAKE_LLM_TRUNCATE_RATE', '0')),
+            seed=int(os.environ.get('FAKE_LLM_SEED', '0')),
+        )
+
+    def latency_for(self, family: str) -> LatencyDistribution:
+        return self.family_latency.get(family, self.latency)
+
+
+def load_recorded_responses(path: Path) -> Dict[str, List[str]]:
+    """Carrega respostas gravadas; valores não-string são serializados como JSON"""
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+
+    responses = {}
+    for family in FAMILIES:
+        entries = raw.get(family, [])
+        if not entries:
+            raise ValueError(f"Sem respostas gravadas para a família '{family}' em {path}")
+        responses[family] = [
+            entry if isinstance(entry, str) else json.dumps(entry, ensure_ascii=False)
+            for entry in entries
+        ]
+    return responses
+
+
+def detect_family(session_id: str, prompt: str = "") -> str:
+    """Identifica a família do prompt pelo prefixo do session_id"""
+    for prefix, family in SESSION_PREFIXES:
+        if session_id.startswith(prefix):
+            return family
+
+    # Fallback por palavras-chave no prompt
+    prompt_lower = prompt.lower()
+    if "tempo_preparo" in prompt_lower and "analise" in prompt_lower:
+        return "estimation"
+    if "extraia a receita" in prompt_lower:
+        return "clipboard_import"
+    if "tendências" in prompt_lower:
+        return "trending"
+    if "3 receitas" in prompt_lower:
+        return "onboarding"
+    return "suggestions"
+
+
+_config: Optional[FakeLlmConfig] = None
+
+
+def get_fake_llm_config() -> FakeLlmConfig:
+    global _config
+    if _config is None:
+        _config = FakeLlmConfig.from_env()
+        logger.info(
+            f"Fake LLM ativo (latência={_config.latency.spec}, "
+            f"erros={_config.error_rate}, truncadas={_config.truncate_rate})"
+        )
+    return _config
+
+
+class FakeLlmChat:
+    """Substituto de LlmChat com a mesma interface (with_model / send_message)"""
+
+    def __init__(self, api_key: str = "", session_id: str = "", system_message: str = "",
+                 config: Optional[FakeLlmConfig] = None):
+        self.session_id = session_id
+        self.system_message = system_message
+        self.provider = "openai"
+        self.model = "gpt-4o"
+        self.config = config or get_fake_llm_config()
+
+    def with_model(self, provider: str, model: str) -> "FakeLlmChat":
+        self.provider = provider
+        self.model = model
+        return self
+
+    async def send_message(self, user_message) -> str:
+        prompt = getattr(user_message, 'text', str(user_message))
+        family = detect_family(self.session_id, prompt)
+        config = self.config
+
+        # Sorteios feitos antes do await para manter a sequência determinística
+        latency = config.latency_for(family).sample(config.rng)
+        fail = config.rng.random() < config.error_rate
+        truncate = config.rng.random() < config.truncate_rate
+        cut_ratio = config.rng.uniform(0.3, 0.9)
+
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        if fail:
+            raise FakeLlmError(f"Erro injetado pelo fake LLM ({family})")
+
+        # Mesmo prompt -> mesma resposta gravada
+        recordings = config.responses[family]
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        response = recordings[int.from_bytes(digest[:4], 'big') % len(recordings)]
+
+        if truncate:
+            response = response[:max(1, int(len(response) * cut_ratio))]
+
+        return response
@@ -0,0 +1,45 @@
+"""
+Caminho rápido de serialização para respostas grandes.
+
+Com response_model, o FastAPI valida cada documento do Mongo num modelo
+Pydantic e depois serializa o modelo de novo. Para documentos que o próprio
+servidor gravou (a partir de model_dump), as duas passadas não mudam nada
+além de preencher defaults. Aqui a consulta usa uma projeção estrita (só os
+campos do modelo, inclusive nos subdocumentos), os defaults são preenchidos
+com um merge de dicionários e o resultado vai direto para o orjson numa
+resposta que o FastAPI não revalida.
+"""
+from typing import Dict, Optional, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+class TrustedJSONResponse(Response):
+    """Resposta JSON para conteúdo já no formato do response_model (sem validação)"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def model_projection(model: Type[BaseModel], nested: Optional[Dict[str, Type[BaseModel]]] = None) -> dict:
+    """Projeção do Mongo com apenas os campos do modelo (e dos modelos aninhados)"""
+    nested = nested or {}
+    projection = {"_id": 0}
+    for name in model.model_fields:
+        if name in nested:
+            projection.update({f"{name}.{field}": 1 for field in nested[name].model_fields})
+        else:
+            projection[name] = 1
+    return projection
+
+
+def model_defaults(model: Type[BaseModel]) -> dict:
+    """Defaults constantes do modelo (campos com default_factory ficam de fora)"""
+    return {
+        name: field.default
+        for name, field in model.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    }
@@ -0,0 +1,242 @@
+"""
+Serviço de download de páginas externas (TudoGostoso) fora do event loop.
+
+O cloudscraper é síncrono, então cada requisição roda num ThreadPoolExecutor
+dedicado e limitado. As sessões (que guardam os cookies do desafio do
+Cloudflare) ficam num pool e são reaproveitadas entre requisições, sendo
+descartadas após erro ou ao atingir a idade máxima. Há um limite de
+requisições simultâneas por host e um timeout total aplicado com
+asyncio.wait_for, de modo que o loop nunca espera pelo cliente HTTP. A vaga
+do host só é devolvida quando a thread termina, e a própria requisição recebe
+o mesmo timeout, para que uma requisição abandonada pelo loop não continue
+ocupando a conexão sem contar no limite.
+
+Com um HttpCache configurado, respostas frescas saem do disco sem requisição
+e respostas vencidas são revalidadas com If-None-Match/If-Modified-Since.
+"""
+import asyncio
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from prometheus_client import Counter, Histogram
+
+from http_cache import HttpCache
+
+logger = logging.getLogger(__name__)
+
+FETCH_REQUESTS = Counter(
+    "fetch_requests_total",
+    "Requisições HTTP externas feitas pelo fetcher",
+    ["host", "result"],
+)
+FETCH_LATENCY = Histogram(
+    "fetch_latency_seconds",
+    "Latência das requisições HTTP externas, incluindo espera por vaga",
+    ["host"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30),
+)
+FETCH_SESSIONS_CREATED = Counter(
+    "fetch_sessions_created_total",
+    "Sessões do cloudscraper criadas (cada uma resolve o desafio do Cloudflare)",
+)
+
+
+class FetchError(Exception):
+    def __init__(self, url: str, status: Optional[int] = None, reason: str = ""):
+        self.url = url
+        self.status = status
+        super().__init__(f"{status or reason} ao buscar {url}")
+
+
+class FetchResponse:
+    __slots__ = ("url", "status", "content", "headers")
+
+    def __init__(self, url: str, status: int, content: bytes, headers: Dict[str, str]):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.headers = headers
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise FetchError(self.url, self.status)
+
+
+class _PooledSession:
+    __slots__ = ("session", "created_at")
+
+    def __init__(self, session):
+        self.session = session
+        self.created_at = time.monotonic()
+
+
+class Fetcher:
+    def __init__(
+        self,
+        max_workers: int = 8,
+        per_host_limit: int = 4,
+        timeout: float = 20.0,
+        session_max_age: float = 1800.0,
+        warm_url: Optional[str] = None,
+        cache: Optional[HttpCache] = None,
+    ):
+        self.timeout = timeout
+        self.cache = cache
+        self.per_host_limit = per_host_limit
+        self.session_max_age = session_max_age
+        self.warm_url = warm_url
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetcher")
+        # Nunca há mais sessões em uso do que threads no executor
+        self._sessions: "queue.LifoQueue[_PooledSession]" = queue.LifoQueue(maxsize=max_workers)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Requisições de rede em andamento (inclui as que esperam vaga no host)
+        self.inflight = 0
+
+    def _new_session(self) -> _PooledSession:
+        import cloudscraper
+
+        FETCH_SESSIONS_CREATED.inc()
+        pooled = _PooledSession(cloudscraper.create_scraper())
+        if self.warm_url:
+            # A primeira requisição resolve o desafio e deixa os cookies na sessão
+            try:
+                pooled.session.get(self.warm_url, timeout=self.timeout)
+            except Exception as e:
+                logger.warning(f"Falha ao aquecer sessão do fetcher: {e}")
+        return pooled
+
+    def _checkout(self) -> _PooledSession:
+        while True:
+            try:
+                pooled = self._sessions.get_nowait()
+            except queue.Empty:
+                return self._new_session()
+            if time.monotonic() - pooled.created_at < self.session_max_age:
+                return pooled
+            pooled.session.close()
+
+    def _checkin(self, pooled: _PooledSession):
+        try:
+            self._sessions.put_nowait(pooled)
+        except queue.Full:
+            pooled.session.close()
+
+    def _fetch_sync(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> FetchResponse:
+        pooled = self._checkout()
+        try:
+            response = pooled.session.get(url, headers=headers, timeout=timeout)
+        except Exception:
+            # Sessão possivelmente em estado ruim (conexão quebrada, desafio expirado)
+            pooled.session.close()
+            raise
+        if response.status_code in (403, 503):
+            # Desafio do Cloudflare não resolvido: a próxima requisição usa uma sessão nova
+            pooled.session.close()
+        else:
+            self._checkin(pooled)
+        return FetchResponse(url, response.status_code, response.content, dict(response.headers))
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphore
+
+    async def _get_limited(self, url: str, host: str, headers: Optional[Dict[str, str]],
+                           timeout: float) -> FetchResponse:
+        loop = asyncio.get_running_loop()
+        semaphore = self._host_semaphore(host)
+        await semaphore.acquire()
+        try:
+            future = self._executor.submit(self._fetch_sync, url, headers, timeout)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def release(_):
+            # Roda na thread do executor; se o wait_for desistiu antes, a vaga só volta aqui
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass  # loop já encerrado
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = None) -> FetchResponse:
+        """GET sem bloquear o loop, passando pelo cache HTTP quando configurado"""
+        # Requisições com cabeçalhos próprios não passam pelo cache
+        if self.cache is None or headers:
+            return await self._fetch(url, headers, timeout)
+
+        cached = await self.cache.lookup(url)
+        if cached is not None and cached.fresh:
+            return FetchResponse(url, cached.status, cached.content, cached.headers)
+
+        try:
+            response = await self._fetch(url, cached.validators() if cached else None, timeout)
+            # Bloqueio do Cloudflare (403/503) ou erro do servidor contam como falha de rede
+            if cached is not None and (response.status == 403 or response.status >= 500):
+                raise FetchError(url, response.status)
+        except FetchError as e:
+            if cached is None:
+                raise
+            # Site fora do ar ou bloqueando: uma cópia vencida é melhor que nada
+            logger.warning(f"Usando cópia vencida do cache para {url}: {e}")
+            return FetchResponse(url, cached.status, cached.content, cached.headers)
+
+        if cached is not None and response.status == 304:
+            cached = await self.cache.revalidated(cached, response.headers)
+            return FetchResponse(url, cached.status, cached.content, cached.headers)
+
+        await self.cache.store(url, response.status, response.content, response.headers)
+        return response
+
+    async def _fetch(self, url: str, headers: Optional[Dict[str, str]],
+                     timeout: Optional[float]) -> FetchResponse:
+        """Requisição de rede; FetchError em timeout ou falha de rede"""
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        result = "error"
+        self.inflight += 1
+        try:
+            # O timeout cobre a espera pela vaga do host e a requisição em si
+            timeout = timeout or self.timeout
+            response = await asyncio.wait_for(self._get_limited(url, host, headers, timeout), timeout)
+            result = str(response.status)
+            return response
+        except asyncio.TimeoutError:
+            result = "timeout"
+            raise FetchError(url, reason="timeout")
+        except FetchError:
+            raise
+        except Exception as e:
+            raise FetchError(url, reason=type(e).__name__) from e
+        finally:
+            self.inflight -= 1
+            FETCH_REQUESTS.labels(host, result).inc()
+            FETCH_LATENCY.labels(host).observe(time.perf_counter() - start)
+
+    async def warm(self, sessions: int = 1):
+        """Pré-cria sessões já aquecidas, em paralelo, no executor"""
+        loop = asyncio.get_running_loop()
+        created = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, self._new_session) for _ in range(sessions)),
+            return_exceptions=True,
+        )
+        for pooled in created:
+            if isinstance(pooled, _PooledSession):
+                self._checkin(pooled)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                self._sessions.get_nowait().session.close()
+            except queue.Empty:
+                break
@@ -0,0 +1,183 @@
+"""
+Mesclagem de itens parecidos na lista de compras.
+
+Depois da agregação exata (mesmo ingredient_id), nomes canônicos ainda podem
+diferir por erros de digitação ou grafias ("tomatte", "queijo parmezao").
+Cada lista monta um índice invertido de trigramas dos nomes canônicos; um
+item novo só é comparado com os itens que compartilham algum trigrama com
+ele, sem percorrer a lista inteira. Acima da similaridade mínima (coeficiente
+de Dice entre os trigramas) o item é mesclado no existente e guardado em
+merged_from, de onde pode ser restaurado por unmerge.
+
+Dois ingredientes diferentes da tabela de nutrição ("leite" e "leite
+condensado") nunca são mesclados, por mais parecidos que sejam os nomes.
+Fora da tabela, a primeira palavra dos dois nomes tem que ser igual ou
+diferir por um erro de digitação (uma edição; duas em palavras longas), e
+nenhuma pode ser prefixo da outra: "pimenta" e "pimentao" ficam separados.
+"""
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from ingredients import resolve_ingredient
+from nutrition import ingredient_density, lookup_ingredient
+from shopping_items import ListItem
+from units import convert_unit, get_best_unit, normalize_unit, unit_family
+
+# Conectores não ajudam a distinguir ingredientes ("azeite de oliva" ~ "azeite oliva")
+STOP_WORDS = frozenset({'de', 'do', 'da', 'dos', 'das', 'com', 'em', 'e'})
+
+
+@lru_cache(maxsize=8192)
+def trigrams(name: str) -> FrozenSet[str]:
+    """Trigramas de cada palavra, com espaços nas bordas como no pg_trgm"""
+    grams = set()
+    for word in name.split():
+        if word in STOP_WORDS:
+            continue
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a: str, b: str) -> float:
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+class TrigramIndex:
+    """Índice invertido trigrama -> posições dos nomes indexados"""
+
+    def __init__(self):
+        self._postings: Dict[str, List[int]] = {}
+        self._sizes: List[int] = []
+
+    def add(self, name: str) -> int:
+        position = len(self._sizes)
+        grams = trigrams(name)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(position)
+        self._sizes.append(len(grams))
+        return position
+
+    def search(self, name: str, min_similarity: float) -> List[Tuple[int, float]]:
+        """Posições com similaridade >= min_similarity, da mais parecida para a menos"""
+        grams = trigrams(name)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        matches = []
+        for position, count in shared.items():
+            score = 2 * count / (len(grams) + self._sizes[position])
+            if score >= min_similarity:
+                matches.append((position, score))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+
+def _density(target_name: str, item_name: str) -> Optional[float]:
+    return ingredient_density(target_name) or ingredient_density(item_name)
+
+
+def _family(unit: str, density: Optional[float]) -> str:
+    unit_norm = normalize_unit(unit)
+    return unit_family(unit_norm, density) or unit_norm
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Distância de Levenshtein, interrompida assim que passa de limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _same_head(name_a: str, name_b: str) -> bool:
+    """Primeiras palavras iguais ou com um erro de digitação, sem uma ser prefixo da outra"""
+    head_a, head_b = name_a.split()[0], name_b.split()[0]
+    if head_a == head_b:
+        return True
+    if head_a.startswith(head_b) or head_b.startswith(head_a):
+        return False
+    limit = 2 if min(len(head_a), len(head_b)) >= 8 else 1
+    return _edit_distance(head_a, head_b, limit) <= limit
+
+
+def _mergeable(target: ListItem, item: ListItem) -> bool:
+    target_info = lookup_ingredient(target.ingredient_name)
+    item_info = lookup_ingredient(item.ingredient_name)
+    if target_info is not None and item_info is not None and target_info != item_info:
+        return False
+    if not _same_head(resolve_ingredient(target.ingredient_name).name,
+                      resolve_ingredient(item.ingredient_name).name):
+        return False
+    density = _density(target.ingredient_name, item.ingredient_name)
+    return _family(target.unit, density) == _family(item.unit, density)
+
+
+def _merge_into(target: ListItem, item: ListItem, score: float):
+    converted_qty, _ = convert_unit(item.quantity, item.unit, target.unit,
+                                    density=_density(target.ingredient_name, item.ingredient_name))
+    target.quantity, target.unit = get_best_unit(target.quantity + converted_qty, target.unit)
+
+    # Guarda o item como estava e o que ele acrescentou, para poder desfazer
+    record = item.to_doc()
+    del record['ingredient_id'], record['keep_separate']
+    record['similarity'] = round(score, 2)
+    record['added_recipe_ids'] = [rid for rid in item.recipe_ids if rid not in target.recipe_ids]
+    record['added_recipe_names'] = [name for name in item.recipe_names if name not in target.recipe_names]
+    target.recipe_ids.extend(record['added_recipe_ids'])
+    target.recipe_names.extend(record['added_recipe_names'])
+    target.merged_from.append(record)
+
+
+def merge_similar(items: List[ListItem], min_similarity: float) -> List[ListItem]:
+    """Mescla itens cujo nome canônico é parecido com o de um item anterior da lista"""
+    index = TrigramIndex()
+    indexed: List[ListItem] = []
+    result = []
+
+    for item in items:
+        if item.keep_separate:
+            result.append(item)
+            continue
+
+        name = resolve_ingredient(item.ingredient_name).name
+        target = None
+        for position, score in index.search(name, min_similarity):
+            if _mergeable(indexed[position], item):
+                target = indexed[position]
+                _merge_into(target, item, score)
+                break
+        if target is None:
+            index.add(name)
+            indexed.append(item)
+            result.append(item)
+
+    return result
+
+
+def unmerge(target: ListItem) -> List[ListItem]:
+    """Desfaz as mesclagens do item: devolve os itens restaurados e desconta suas quantidades"""
+    restored = []
+    for record in target.merged_from:
+        item = ListItem.from_doc(record)
+        item.keep_separate = True
+        converted_qty, _ = convert_unit(item.quantity, item.unit, target.unit,
+                                        density=_density(target.ingredient_name, item.ingredient_name))
+        target.quantity, target.unit = get_best_unit(max(0.0, target.quantity - converted_qty), target.unit)
+        target.recipe_ids = [rid for rid in target.recipe_ids if rid not in record.get('added_recipe_ids', [])]
+        target.recipe_names = [name for name in target.recipe_names
+                               if name not in record.get('added_recipe_names', [])]
+        restored.append(item)
+    target.merged_from = []
+    return restored
@@ -0,0 +1,244 @@
+"""
+Cache HTTP persistente em disco para as páginas baixadas pelo fetcher.
+
+Cada URL vira dois arquivos no diretório do cache: o corpo comprimido
+(<hash>.body.gz) e os metadados (<hash>.meta.json) com status, cabeçalhos
+relevantes e validade. A validade segue o Cache-Control da resposta
+(no-store não é guardado, no-cache exige revalidação, max-age define o TTL),
+com TTLs configuráveis por padrão de URL (ex.: páginas de busca). Entradas
+vencidas com ETag/Last-Modified são revalidadas com requisição condicional.
+O tamanho total em disco é limitado, removendo as entradas acessadas há mais
+tempo.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_REQUESTS = Counter(
+    "http_cache_requests_total",
+    "Consultas ao cache HTTP em disco",
+    ["result"],  # hit, miss, stale, revalidated
+)
+HTTP_CACHE_EVICTIONS = Counter(
+    "http_cache_evictions_total",
+    "Entradas removidas do cache HTTP por limite de tamanho",
+)
+HTTP_CACHE_BYTES = Gauge(
+    "http_cache_bytes",
+    "Bytes ocupados em disco pelo cache HTTP",
+)
+
+# Cabeçalhos guardados junto com o corpo
+STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "date")
+MAX_AGE_PATTERN = re.compile(r'max-age\s*=\s*(\d+)')
+
+
+class CachedResponse(NamedTuple):
+    url: str
+    status: int
+    content: bytes
+    headers: Dict[str, str]
+    stored_at: float
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Cabeçalhos para uma requisição condicional"""
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class HttpCache:
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        default_ttl: float = 3600.0,
+        ttl_rules: Optional[List[Tuple[str, float]]] = None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # (regex da URL, TTL) aplicados antes do Cache-Control do servidor
+        self.ttl_rules: List[Tuple[Pattern, float]] = [
+            (re.compile(pattern), ttl) for pattern, ttl in (ttl_rules or [])
+        ]
+        self._lock = threading.Lock()
+        # hash -> (bytes em disco, último acesso)
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._total_bytes = 0
+        self._load_index()
+        HTTP_CACHE_BYTES.set_function(lambda: self._total_bytes)
+
+    def _load_index(self):
+        for meta_path in self.directory.glob("*.meta.json"):
+            key = meta_path.name[:-len(".meta.json")]
+            body_path = self._body_path(key)
+            try:
+                size = meta_path.stat().st_size + body_path.stat().st_size
+                accessed = body_path.stat().st_mtime
+            except FileNotFoundError:
+                meta_path.unlink(missing_ok=True)
+                continue
+            self._index[key] = (size, accessed)
+            self._total_bytes += size
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}.meta.json"
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.body.gz"
+
+    def _ttl(self, url: str, headers: Dict[str, str]) -> Optional[float]:
+        """TTL em segundos; None quando a resposta não pode ser guardada"""
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control or "private" in cache_control:
+            return None
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        if "no-cache" in cache_control:
+            return 0.0
+        match = MAX_AGE_PATTERN.search(cache_control)
+        if match:
+            return float(match.group(1))
+        return self.default_ttl
+
+    def _read(self, url: str) -> Optional[CachedResponse]:
+        key = self._key(url)
+        try:
+            meta = json.loads(self._meta_path(key).read_text(encoding="utf-8"))
+            content = gzip.decompress(self._body_path(key).read_bytes())
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        now = time.time()
+        with self._lock:
+            if key in self._index:
+                self._index[key] = (self._index[key][0], now)
+        # O mtime do corpo guarda o último acesso para reconstruir o LRU após reinício
+        os.utime(self._body_path(key), (now, now))
+        return CachedResponse(url, meta["status"], content, meta["headers"], meta["stored_at"], meta["expires_at"])
+
+    def _write(self, url: str, status: int, content: bytes, headers: Dict[str, str], ttl: float,
+               stored_at: Optional[float] = None):
+        key = self._key(url)
+        now = time.time()
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": headers,
+            "stored_at": stored_at or now,
+            "expires_at": now + ttl,
+        }
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        body_path = self._body_path(key)
+        size = len(meta_bytes)
+        if content is not None:
+            body = gzip.compress(content, compresslevel=6)
+            tmp_body = body_path.with_suffix(".tmp")
+            tmp_body.write_bytes(body)
+            os.replace(tmp_body, body_path)
+            size += len(body)
+        else:
+            size += body_path.stat().st_size
+        tmp_meta = self._meta_path(key).with_suffix(".tmp")
+        tmp_meta.write_bytes(meta_bytes)
+        os.replace(tmp_meta, self._meta_path(key))
+
+        with self._lock:
+            previous = self._index.get(key)
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._index[key] = (size, now)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            victims = []
+            for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                victims.append(key)
+                self._total_bytes -= size
+                del self._index[key]
+        for key in victims:
+            self._meta_path(key).unlink(missing_ok=True)
+            self._body_path(key).unlink(missing_ok=True)
+            HTTP_CACHE_EVICTIONS.inc()
+
+    def _store(self, url: str, status: int, content: bytes, headers: Dict[str, str]) -> bool:
+        stored = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        ttl = self._ttl(url, stored)
+        if ttl is None or status != 200:
+            return False
+        self._write(url, status, content, stored, ttl)
+        return True
+
+    def _refresh(self, cached: CachedResponse, headers: Dict[str, str]) -> CachedResponse:
+        """Atualiza validade e validadores após um 304"""
+        merged = dict(cached.headers)
+        merged.update({name: headers[name] for name in STORED_HEADERS if name in headers})
+        ttl = self._ttl(cached.url, merged) or 0.0
+        self._write(cached.url, cached.status, None, merged, ttl, stored_at=cached.stored_at)
+        return cached._replace(headers=merged, expires_at=time.time() + ttl)
+
+    # Interface assíncrona: I/O de disco e (de)compressão rodam fora do loop
+
+    async def lookup(self, url: str) -> Optional[CachedResponse]:
+        cached = await asyncio.to_thread(self._read, url)
+        if cached is None:
+            HTTP_CACHE_REQUESTS.labels("miss").inc()
+        elif cached.fresh:
+            HTTP_CACHE_REQUESTS.labels("hit").inc()
+        else:
+            HTTP_CACHE_REQUESTS.labels("stale").inc()
+        return cached
+
+    async def store(self, url: str, status: int, content: bytes, headers: Dict[str, str]) -> bool:
+        headers = {name.lower(): value for name, value in headers.items()}
+        try:
+            return await asyncio.to_thread(self._store, url, status, content, headers)
+        except OSError as e:
+            logger.warning(f"Falha ao gravar cache HTTP de {url}: {e}")
+            return False
+
+    async def revalidated(self, cached: CachedResponse, headers: Dict[str, str]) -> CachedResponse:
+        HTTP_CACHE_REQUESTS.labels("revalidated").inc()
+        headers = {name.lower(): value for name, value in headers.items()}
+        try:
+            return await asyncio.to_thread(self._refresh, cached, headers)
+        except OSError as e:
+            logger.warning(f"Falha ao atualizar cache HTTP de {cached.url}: {e}")
+            return cached
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,148 @@
+"""
+Dicionário canônico de ingredientes.
+
+Resolve nomes livres ("Cebolas médias picadas", "mussarela ralada") para um
+nome canônico ("cebola", "queijo mussarela") removendo acentos, adjetivos de
+preparo e tamanho, reduzindo plurais ao singular e aplicando sinônimos. Cada
+nome canônico tem um ingredient_id inteiro derivado de forma determinística
+do próprio nome, então o id é o mesmo entre processos e reinícios e pode ser
+persistido em receitas e itens de lista para agrupar e buscar por inteiro.
+"""
+import hashlib
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from units import normalize_ingredient_name
+
+# Ids cabem em 53 bits para não perder precisão em números do JavaScript
+_ID_MASK = (1 << 53) - 1
+
+# Preparo, corte, tamanho, estado e origem: não mudam o que se compra
+PREP_WORDS = frozenset("""
+    picado picada picados picadas ralado ralada ralados raladas fatiado fatiada fatiados fatiadas
+    cortado cortada cortados cortadas descascado descascada descascados descascadas
+    triturado triturada amassado amassada amassados amassadas derretido derretida
+    cozido cozida cozidos cozidas batido batida peneirado peneirada espremido espremida
+    desfiado desfiada desfiados desfiadas refogado refogada temperado temperada
+    fresco fresca frescos frescas maduro madura maduros maduras
+    italiano italiana italianos italianas nacional importado importada
+    grande grandes medio media medios medias pequeno pequena pequenos pequenas
+    bem finamente grosseiramente levemente aproximadamente
+""".split())
+
+# Expressões de preparo com mais de uma palavra
+PREP_PHRASES = re.compile(
+    r'\b(?:em (?:cubos|cubinhos|rodelas|tiras|fatias|pedacos|lascas|po fino)'
+    r'|a gosto|sem (?:casca|pele|osso|semente|sementes)'
+    r'|para (?:untar|polvilhar|decorar|fritar)'
+    r'|(?:em )?temperatura ambiente|de boa qualidade)\b'
+)
+
+# Palavras que não são flexionadas (terminam em s no singular ou são invariáveis)
+PLURAL_EXCEPTIONS = frozenset({
+    'brocolis', 'ananas', 'gras', 'xeres', 'mais', 'menos', 'tres', 'bis', 'pires',
+})
+
+# Sinônimos e variações regionais -> nome canônico (já no singular e sem acentos)
+SYNONYMS = {
+    'mucarela': 'queijo mussarela',
+    'mussarela': 'queijo mussarela',
+    'mozarela': 'queijo mussarela',
+    'muzzarella': 'queijo mussarela',
+    'queijo mucarela': 'queijo mussarela',
+    'parmesao': 'queijo parmesao',
+    'queijo ralado': 'queijo parmesao',
+    'aipim': 'mandioca',
+    'macaxeira': 'mandioca',
+    'jerimum': 'abobora',
+    'abobora cabotia': 'abobora',
+    'espaguete': 'macarrao',
+    'macarrao espaguete': 'macarrao',
+    'massa': 'macarrao',
+    'file de frango': 'peito de frango',
+    'peito de frango sem osso': 'peito de frango',
+    'patinho moido': 'carne moida',
+    'acem moido': 'carne moida',
+    'carne de boi moida': 'carne moida',
+    'molho shoyu': 'shoyu',
+    'molho de soja': 'shoyu',
+    'salsinha': 'salsa',
+    'oleo de soja': 'oleo',
+    'oleo vegetal': 'oleo',
+    'acucar refinado': 'acucar',
+    'acucar cristal': 'acucar',
+    'fermento quimico': 'fermento em po',
+    'fermento em po quimico': 'fermento em po',
+    'farinha': 'farinha de trigo',
+    'trigo': 'farinha de trigo',
+    'maisena': 'amido de milho',
+    'creme de leite de caixinha': 'creme de leite',
+    'agua filtrada': 'agua',
+    'agua fervente': 'agua',
+    'agua morna': 'agua',
+    'agua gelada': 'agua',
+    'ovo inteiro': 'ovo',
+    'gema de ovo': 'gema',
+    'clara de ovo': 'clara',
+    'dente de alho': 'alho',
+    'cabeca de alho': 'alho',
+    'folha de louro': 'louro',
+}
+
+
+class CanonicalIngredient(NamedTuple):
+    id: int
+    name: str  # nome canônico: singular, sem acentos, sem preparo
+
+
+def _singular(word: str) -> str:
+    """Singular de uma palavra em português (regras regulares)"""
+    if len(word) <= 3 or word in PLURAL_EXCEPTIONS or not word.endswith('s'):
+        return word
+    if word.endswith(('oes', 'aes')):
+        return word[:-3] + 'ao'
+    if word.endswith('ais'):
+        return word[:-3] + 'al'
+    if word.endswith('eis'):
+        return word[:-3] + 'el'
+    if word.endswith('ois'):
+        return word[:-3] + 'ol'
+    if word.endswith(('res', 'zes', 'eses')):
+        return word[:-2]
+    if word.endswith('ns'):
+        return word[:-2] + 'm'
+    return word[:-1]
+
+
+def _strip_preparation(name: str) -> str:
+    name = PREP_PHRASES.sub(' ', name)
+    # Parênteses costumam trazer observações ("(opcional)", "(cerca de 2 xícaras)")
+    name = re.sub(r'\(.*?\)', ' ', name)
+    words = [word for word in re.split(r'[\s,;]+', name) if word and word not in PREP_WORDS]
+    # Conectores que ficaram soltos no fim ("cebola e" / "alho de")
+    while words and words[-1] in ('e', 'de', 'do', 'da', 'com', 'ou'):
+        words.pop()
+    return ' '.join(words)
+
+
+def ingredient_id_for(canonical_name: str) -> int:
+    digest = hashlib.blake2b(canonical_name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') & _ID_MASK
+
+
+@lru_cache(maxsize=65536)
+def resolve_ingredient(name: str) -> CanonicalIngredient:
+    """Nome canônico e id estável de um ingrediente (memoizado)"""
+    normalized = normalize_ingredient_name(name).replace('-', ' ')
+    if normalized in SYNONYMS:
+        canonical = SYNONYMS[normalized]
+    else:
+        stripped = _strip_preparation(normalized) or normalized
+        singular = ' '.join(_singular(word) for word in stripped.split())
+        canonical = SYNONYMS.get(stripped) or SYNONYMS.get(singular) or singular
+    return CanonicalIngredient(ingredient_id_for(canonical), canonical)
+
+
+def ingredient_id(name: str) -> int:
+    return resolve_ingredient(name).id
@@ -0,0 +1,156 @@
+"""
+Instrumentação das chamadas LLM: latência, tokens, custo, parse e retries
+por call site, exportados em formato Prometheus e agregados por usuário/dia
+no Mongo (coleção llm_usage_daily).
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Preço em USD por 1M de tokens (entrada, saída)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+DEFAULT_PRICE = MODEL_PRICES["gpt-4o"]
+
+LLM_CALLS = Counter(
+    "llm_calls_total",
+    "Chamadas LLM por call site, modelo e resultado",
+    ["call_site", "model", "outcome"],
+)
+LLM_LATENCY = Histogram(
+    "llm_call_latency_seconds",
+    "Latência das chamadas LLM (incluindo retries)",
+    ["call_site", "model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_PROMPT_TOKENS = Counter(
+    "llm_prompt_tokens_total",
+    "Tokens de prompt enviados",
+    ["call_site", "model"],
+)
+LLM_COMPLETION_TOKENS = Counter(
+    "llm_completion_tokens_total",
+    "Tokens de resposta recebidos",
+    ["call_site", "model"],
+)
+LLM_COMPLETION_TOKENS_HIST = Histogram(
+    "llm_completion_size_tokens",
+    "Distribuição do tamanho das respostas em tokens",
+    ["call_site", "model"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000),
+)
+LLM_COST = Counter(
+    "llm_cost_usd_total",
+    "Custo estimado das chamadas LLM em USD",
+    ["call_site", "model"],
+)
+LLM_RETRIES = Counter(
+    "llm_retries_total",
+    "Retries de chamadas LLM",
+    ["call_site", "model"],
+)
+LLM_PARSE = Counter(
+    "llm_parse_total",
+    "Resultado do parse das respostas LLM",
+    ["call_site", "result"],
+)
+
+_encodings = {}
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Conta tokens com tiktoken; aproxima por caracteres se indisponível"""
+    if not text:
+        return 0
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken indisponível, usando aproximação: {str(e)}")
+            encoding = False
+        _encodings[model] = encoding
+    if encoding is False:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Custo estimado em USD"""
+    input_price, output_price = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def record_llm_call(
+    call_site: str,
+    model: str,
+    outcome: str,
+    latency: float,
+    prompt_tokens: int,
+    completion_tokens: int,
+    retries: int,
+) -> float:
+    """Registra uma chamada nas métricas Prometheus e retorna o custo estimado"""
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    LLM_CALLS.labels(call_site, model, outcome).inc()
+    LLM_LATENCY.labels(call_site, model).observe(latency)
+    LLM_PROMPT_TOKENS.labels(call_site, model).inc(prompt_tokens)
+    LLM_COMPLETION_TOKENS.labels(call_site, model).inc(completion_tokens)
+    if outcome == "success":
+        LLM_COMPLETION_TOKENS_HIST.labels(call_site, model).observe(completion_tokens)
+    LLM_COST.labels(call_site, model).inc(cost)
+    if retries:
+        LLM_RETRIES.labels(call_site, model).inc(retries)
+    return cost
+
+
+def record_llm_parse(call_site: str, success: bool):
+    """Registra sucesso/falha do parse da resposta"""
+    LLM_PARSE.labels(call_site, "success" if success else "failure").inc()
+
+
+async def record_daily_usage(
+    db,
+    user_id: Optional[str],
+    call_site: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cost: float,
+    latency: float,
+    failed: bool,
+):
+    """Acumula o uso de LLM do usuário no dia (UTC) em llm_usage_daily"""
+    date = datetime.now(timezone.utc).date().isoformat()
+    increments = {
+        "calls": 1,
+        "failures": 1 if failed else 0,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "cost_usd": cost,
+        "latency_seconds": latency,
+    }
+    update = dict(increments)
+    update.update({f"call_sites.{call_site}.{key}": value for key, value in increments.items()})
+
+    try:
+        await db.llm_usage_daily.update_one(
+            {"user_id": user_id or "system", "date": date},
+            {
+                "$inc": update,
+                "$set": {"updated_at": datetime.now(timezone.utc).isoformat()},
+            },
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao registrar uso diário de LLM: {str(e)}")
@@ -0,0 +1,280 @@
+"""
+Tabela local de ingredientes (calorias, preço médio e restrições) e estimador
+determinístico de receitas. Usado antes do LLM em estimate_recipe_values:
+quando a cobertura da tabela fica abaixo do limite, a estimativa cai no LLM.
+"""
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+from units import MASS, VOLUME, convert_unit, lookup_unit, normalize_ingredient_name
+
+
+class IngredientInfo(NamedTuple):
+    kcal_100g: float          # kcal por 100 g
+    price: float              # preço médio em BRL por price_unit
+    price_unit: str           # "kg", "l" ou "un"
+    unit_g: Optional[float]   # peso de 1 unidade em gramas (None se não se compra por unidade)
+    density: float            # g/ml, para converter volume em massa
+    cook_min: int             # tempo de cozimento/forno típico em minutos
+    tags: str                 # "vegano", "vegetariano", "gluten", "lactose"
+
+
+# nome normalizado: (kcal/100g, preço, unidade de preço, g por unidade, densidade, cozimento, tags)
+INGREDIENT_TABLE: Dict[str, IngredientInfo] = {name: IngredientInfo(*row) for name, row in {
+    # Grãos, farinhas e massas
+    "arroz": (360, 6.0, "kg", None, 0.85, 25, "vegano"),
+    "feijao": (340, 9.0, "kg", None, 0.80, 60, "vegano"),
+    "lentilha": (353, 15.0, "kg", None, 0.80, 25, "vegano"),
+    "grao de bico": (364, 18.0, "kg", None, 0.80, 45, "vegano"),
+    "farinha de trigo": (364, 6.0, "kg", None, 0.55, 0, "vegano gluten"),
+    "farinha de mandioca": (365, 10.0, "kg", None, 0.65, 0, "vegano"),
+    "fuba": (370, 6.0, "kg", None, 0.60, 30, "vegano"),
+    "amido de milho": (381, 15.0, "kg", None, 0.55, 0, "vegano"),
+    "polvilho": (351, 14.0, "kg", None, 0.60, 0, "vegano"),
+    "aveia": (389, 20.0, "kg", None, 0.40, 0, "vegano gluten"),
+    "granola": (471, 40.0, "kg", None, 0.45, 0, "vegetariano gluten"),
+    "macarrao": (371, 10.0, "kg", None, 0.60, 12, "vegetariano gluten"),
+    "pao": (265, 18.0, "kg", 50, 0.25, 0, "vegetariano gluten"),
+    "pao de forma": (265, 14.0, "kg", 25, 0.25, 0, "vegetariano gluten"),
+    "pao de hamburguer": (280, 20.0, "kg", 60, 0.25, 0, "vegetariano gluten"),
+    "fermento em po": (53, 60.0, "kg", None, 0.90, 40, "vegano"),
+    # Açúcares, gorduras e condimentos
+    "acucar": (387, 5.0, "kg", None, 0.85, 0, "vegano"),
+    "acucar mascavo": (376, 14.0, "kg", None, 0.80, 0, "vegano"),
+    "mel": (304, 40.0, "kg", None, 1.40, 0, "vegetariano"),
+    "sal": (0, 3.0, "kg", None, 1.20, 0, "vegano"),
+    "oleo": (884, 9.0, "l", None, 0.92, 0, "vegano"),
+    "azeite": (884, 45.0, "l", None, 0.92, 0, "vegano"),
+    "vinagre": (18, 5.0, "l", None, 1.01, 0, "vegano"),
+    "shoyu": (53, 20.0, "l", None, 1.10, 0, "vegano gluten"),
+    "molho de soja": (53, 20.0, "l", None, 1.10, 0, "vegano gluten"),
+    "ketchup": (112, 15.0, "kg", None, 1.10, 0, "vegano"),
+    "maionese": (680, 20.0, "kg", None, 0.95, 0, "vegetariano"),
+    "mostarda": (66, 18.0, "kg", None, 1.05, 0, "vegano"),
+    "molho de tomate": (29, 4.0, "un", 340, 1.05, 0, "vegano"),
+    "extrato de tomate": (82, 5.0, "un", 140, 1.10, 0, "vegano"),
+    "caldo de galinha": (250, 0.5, "un", 10, 1.00, 0, ""),
+    "caldo de legumes": (250, 0.5, "un", 10, 1.00, 0, "vegano"),
+    "pimenta do reino": (251, 150.0, "kg", None, 0.50, 0, "vegano"),
+    "oregano": (265, 150.0, "kg", None, 0.15, 0, "vegano"),
+    "canela": (247, 120.0, "kg", None, 0.50, 0, "vegano"),
+    "cominho": (375, 120.0, "kg", None, 0.50, 0, "vegano"),
+    "paprica": (282, 120.0, "kg", None, 0.45, 0, "vegano"),
+    "agua": (0, 0.0, "l", None, 1.00, 0, "vegano"),
+    # Laticínios e ovos
+    "leite": (61, 5.5, "l", None, 1.03, 0, "vegetariano lactose"),
+    "leite condensado": (321, 7.0, "un", 395, 1.30, 0, "vegetariano lactose"),
+    "creme de leite": (195, 4.0, "un", 200, 1.00, 0, "vegetariano lactose"),
+    "leite em po": (496, 40.0, "kg", None, 0.50, 0, "vegetariano lactose"),
+    "manteiga": (717, 50.0, "kg", None, 0.91, 0, "vegetariano lactose"),
+    "margarina": (596, 14.0, "kg", None, 0.91, 0, "vegetariano lactose"),
+    "queijo": (350, 50.0, "kg", None, 0.50, 0, "vegetariano lactose"),
+    "queijo mussarela": (300, 45.0, "kg", None, 0.50, 0, "vegetariano lactose"),
+    "queijo parmesao": (431, 90.0, "kg", None, 0.40, 0, "vegetariano lactose"),
+    "requeijao": (257, 9.0, "un", 200, 1.00, 0, "vegetariano lactose"),
+    "iogurte": (61, 3.0, "un", 170, 1.03, 0, "vegetariano lactose"),
+    "ovo": (143, 0.8, "un", 50, 1.03, 10, "vegetariano"),
+    # Carnes e peixes
+    "carne": (250, 45.0, "kg", None, 1.00, 40, ""),
+    "carne moida": (212, 40.0, "kg", None, 1.00, 20, ""),
+    "frango": (165, 18.0, "kg", None, 1.00, 40, ""),
+    "peito de frango": (120, 22.0, "kg", None, 1.00, 25, ""),
+    "coxa de frango": (190, 15.0, "kg", None, 1.00, 40, ""),
+    "bacon": (541, 40.0, "kg", None, 1.00, 10, ""),
+    "presunto": (145, 40.0, "kg", None, 1.00, 0, ""),
+    "linguica": (300, 30.0, "kg", None, 1.00, 20, ""),
+    "calabresa": (300, 30.0, "kg", None, 1.00, 15, ""),
+    "peixe": (100, 40.0, "kg", None, 1.00, 20, ""),
+    "tilapia": (96, 50.0, "kg", None, 1.00, 20, ""),
+    "camarao": (85, 70.0, "kg", None, 1.00, 10, ""),
+    "atum": (116, 10.0, "un", 170, 1.00, 0, ""),
+    "sardinha": (208, 6.0, "un", 125, 1.00, 0, ""),
+    # Hortaliças, legumes e frutas
+    "cebola": (40, 5.0, "kg", 150, 1.00, 0, "vegano"),
+    "alho": (149, 30.0, "kg", 5, 1.00, 0, "vegano"),
+    "tomate": (18, 8.0, "kg", 120, 1.00, 0, "vegano"),
+    "batata": (77, 6.0, "kg", 170, 1.00, 25, "vegano"),
+    "batata doce": (86, 6.0, "kg", 200, 1.00, 30, "vegano"),
+    "mandioca": (160, 6.0, "kg", 500, 1.00, 30, "vegano"),
+    "cenoura": (41, 5.0, "kg", 100, 1.00, 0, "vegano"),
+    "abobrinha": (17, 6.0, "kg", 250, 1.00, 0, "vegano"),
+    "abobora": (26, 5.0, "kg", 1500, 1.00, 25, "vegano"),
+    "berinjela": (25, 7.0, "kg", 300, 1.00, 0, "vegano"),
+    "pimentao": (20, 10.0, "kg", 150, 1.00, 0, "vegano"),
+    "brocolis": (34, 12.0, "kg", 300, 1.00, 0, "vegano"),
+    "couve": (32, 15.0, "kg", 200, 1.00, 0, "vegano"),
+    "espinafre": (23, 20.0, "kg", 200, 1.00, 0, "vegano"),
+    "alface": (15, 13.0, "kg", 300, 1.00, 0, "vegano"),
+    "repolho": (25, 4.0, "kg", 1000, 1.00, 0, "vegano"),
+    "pepino": (15, 6.0, "kg", 200, 1.00, 0, "vegano"),
+    "milho verde": (86, 25.0, "kg", 200, 1.00, 0, "vegano"),
+    "ervilha": (81, 25.0, "kg", 200, 1.00, 0, "vegano"),
+    "vagem": (31, 12.0, "kg", None, 1.00, 0, "vegano"),
+    "champignon": (22, 40.0, "kg", None, 1.00, 0, "vegano"),
+    "azeitona": (115, 40.0, "kg", None, 1.00, 0, "vegano"),
+    "palmito": (28, 50.0, "kg", 300, 1.00, 0, "vegano"),
+    "cheiro verde": (30, 60.0, "kg", 50, 1.00, 0, "vegano"),
+    "salsinha": (36, 60.0, "kg", 50, 1.00, 0, "vegano"),
+    "cebolinha": (30, 60.0, "kg", 50, 1.00, 0, "vegano"),
+    "coentro": (23, 60.0, "kg", 50, 1.00, 0, "vegano"),
+    "manjericao": (23, 80.0, "kg", 50, 1.00, 0, "vegano"),
+    "limao": (29, 6.0, "kg", 80, 1.00, 0, "vegano"),
+    "laranja": (47, 5.0, "kg", 180, 1.00, 0, "vegano"),
+    "banana": (89, 6.0, "kg", 120, 1.00, 0, "vegano"),
+    "maca": (52, 10.0, "kg", 150, 1.00, 0, "vegano"),
+    "morango": (32, 25.0, "kg", 15, 1.00, 0, "vegano"),
+    "abacate": (160, 8.0, "kg", 600, 1.00, 0, "vegano"),
+    "acai": (70, 30.0, "kg", None, 1.00, 0, "vegano"),
+    "coco ralado": (660, 40.0, "kg", None, 0.35, 0, "vegano"),
+    "leite de coco": (230, 5.0, "un", 200, 1.00, 0, "vegano"),
+    "tofu": (76, 40.0, "kg", None, 1.00, 0, "vegano"),
+    "castanha de caju": (553, 100.0, "kg", None, 0.55, 0, "vegano"),
+    # Doces
+    "chocolate": (546, 60.0, "kg", None, 1.00, 0, "vegetariano lactose"),
+    "chocolate em po": (380, 40.0, "kg", None, 0.45, 0, "vegetariano"),
+    "cacau em po": (228, 80.0, "kg", None, 0.45, 0, "vegano"),
+    "granulado": (480, 40.0, "kg", None, 0.60, 0, "vegetariano"),
+}.items()}
+
+# Grafias alternativas -> nome da tabela
+ALIASES = {
+    "mucarela": "queijo mussarela",
+    "mussarela": "queijo mussarela",
+    "mozarela": "queijo mussarela",
+    "parmesao": "queijo parmesao",
+    "file de frango": "peito de frango",
+    "sobrecoxa de frango": "coxa de frango",
+    "patinho moido": "carne moida",
+    "macarrao espaguete": "macarrao",
+    "espaguete": "macarrao",
+    "aipim": "mandioca",
+    "macaxeira": "mandioca",
+    "abobora cabotia": "abobora",
+    "molho shoyu": "shoyu",
+    "ovos": "ovo",
+}
+
+# Quantidades simbólicas (sal a gosto, pitada)
+PINCH_UNITS = {'pitada': 0.5, 'pitadas': 0.5, 'a gosto': 0.0}
+
+RESTRICTION_ORDER = ("vegetariano", "vegano", "sem gluten", "sem lactose")
+
+_KEYS_BY_LENGTH = sorted(list(INGREDIENT_TABLE) + list(ALIASES), key=len, reverse=True)
+
+
+class LocalEstimate(NamedTuple):
+    values: dict          # tempo_preparo, calorias_por_porcao, custo_estimado, restricoes
+    coverage: float       # fração dos ingredientes com nome e quantidade resolvidos
+    unmatched: List[str]  # ingredientes fora da tabela ou sem conversão
+
+
+@lru_cache(maxsize=8192)
+def lookup_ingredient(name: str) -> Optional[IngredientInfo]:
+    """Localiza o ingrediente na tabela (nome exato, alias, plural ou termo contido)"""
+    normalized = normalize_ingredient_name(name).replace('-', ' ')
+    candidates = [normalized, ' '.join(word[:-1] if word.endswith('s') else word for word in normalized.split())]
+
+    for candidate in candidates:
+        key = ALIASES.get(candidate, candidate)
+        if key in INGREDIENT_TABLE:
+            return INGREDIENT_TABLE[key]
+
+    # Maior termo conhecido contido no nome ("cebola media picada" -> "cebola")
+    for candidate in candidates:
+        padded = f" {candidate} "
+        for key in _KEYS_BY_LENGTH:
+            if f" {key} " in padded:
+                return INGREDIENT_TABLE[ALIASES.get(key, key)]
+    return None
+
+
+def quantity_in_grams(quantity: float, unit: str, info: IngredientInfo) -> Optional[float]:
+    """Converte a quantidade para gramas usando massa, volume+densidade ou peso unitário"""
+    unit_lower = normalize_ingredient_name(unit or '')
+
+    if unit_lower in PINCH_UNITS:
+        return PINCH_UNITS[unit_lower] * (quantity or 1)
+
+    # Massa, volume e medidas caseiras (xícara, colheres) pela densidade do ingrediente
+    grams, converted = convert_unit(quantity, unit_lower, 'g', density=info.density)
+    if converted == 'g':
+        return grams
+
+    # Unidades contadas (unidade, dúzia, lata, dente...) usam o peso médio de 1 unidade
+    unit = lookup_unit(unit_lower)
+    if unit and unit.family not in (MASS, VOLUME) and info.unit_g:
+        return quantity * unit.factor * info.unit_g
+
+    return None
+
+
+def ingredient_density(name: str) -> Optional[float]:
+    """Densidade (g/ml) do ingrediente para converter entre massa e volume, se conhecido"""
+    info = lookup_ingredient(name)
+    return info.density if info else None
+
+
+def ingredient_cost(grams: float, info: IngredientInfo) -> float:
+    if info.price_unit == "un":
+        return grams / info.unit_g * info.price
+    if info.price_unit == "l":
+        return grams / info.density / 1000 * info.price
+    return grams / 1000 * info.price
+
+
+def estimate_recipe_locally(recipe_data: dict) -> LocalEstimate:
+    """Estima calorias, custo, tempo e restrições a partir da tabela local"""
+    ingredients = recipe_data.get('ingredients', [])
+    portions = recipe_data.get('portions') or 1
+
+    total_kcal = 0.0
+    total_cost = 0.0
+    max_cook = 0
+    covered = 0
+    all_identified = True
+    unmatched = []
+    tags: List[str] = []
+
+    for ing in ingredients:
+        name = ing.get('name', '')
+        info = lookup_ingredient(name)
+        if info is None:
+            all_identified = False
+            unmatched.append(name)
+            continue
+        tags.append(info.tags)
+
+        grams = quantity_in_grams(float(ing.get('quantity') or 0), ing.get('unit', ''), info)
+        if grams is None:
+            unmatched.append(name)
+            continue
+
+        covered += 1
+        total_kcal += grams / 100 * info.kcal_100g
+        total_cost += ingredient_cost(grams, info)
+        max_cook = max(max_cook, info.cook_min)
+
+    coverage = covered / len(ingredients) if ingredients else 0.0
+
+    # Restrições só são afirmadas quando todos os ingredientes foram identificados
+    restricoes = []
+    if ingredients and all_identified:
+        flags = {
+            "vegetariano": all("vegano" in t or "vegetariano" in t for t in tags),
+            "vegano": all("vegano" in t for t in tags),
+            "sem gluten": not any("gluten" in t for t in tags),
+            "sem lactose": not any("lactose" in t for t in tags),
+        }
+        restricoes = [r for r in RESTRICTION_ORDER if flags[r]]
+
+    # Tempo: cozimento mais longo + preparo proporcional ao número de ingredientes
+    tempo = max_cook + 5 + 2 * len(ingredients)
+    tempo = int(round(tempo / 5.0)) * 5
+
+    values = {
+        'tempo_preparo': tempo,
+        'calorias_por_porcao': int(round(total_kcal / portions)),
+        'custo_estimado': round(total_cost, 2),
+        'restricoes': restricoes,
+    }
+    return LocalEstimate(values=values, coverage=coverage, unmatched=unmatched)
@@ -0,0 +1,78 @@
+"""
+Hash e verificação de senhas (bcrypt) fora do event loop.
+
+O bcrypt leva dezenas a centenas de milissegundos por operação de propósito;
+rodando direto nos handlers async, cada login travava todas as outras
+requisições do worker. Aqui as operações rodam num ThreadPoolExecutor
+dedicado e limitado (o bcrypt libera o GIL enquanto calcula) e o número de
+operações esperando vaga também é limitado, para que uma rajada de logins
+seja recusada em vez de formar uma fila sem fim.
+
+O custo (rounds) é configurável. Ao mudar, as senhas antigas continuam
+válidas e são refeitas com o custo novo no próximo login bem-sucedido.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from passlib.context import CryptContext
+from prometheus_client import Histogram
+
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds",
+    "Duração das operações de bcrypt, incluindo espera por vaga no executor",
+    ["operation"],  # hash, verify, rehash
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def bcrypt_rounds(hashed_password: str) -> Optional[int]:
+    """Custo de um hash bcrypt ("$2b$12$..." -> 12)"""
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = 12, max_workers: int = 2, max_pending: int = 64):
+        self.rounds = rounds
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def _run(self, operation: str, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusy(f"{self.pending} operações de senha na fila")
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_LATENCY.labels(operation).observe(time.perf_counter() - start)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    def _verify_and_update_sync(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        if not self.context.verify(password, hashed_password):
+            return False, None
+        if bcrypt_rounds(hashed_password) != self.rounds:
+            return True, self.context.hash(password)
+        return True, None
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(senha confere, novo hash se o custo mudou) numa única ida ao executor"""
+        needs_rehash = bcrypt_rounds(hashed_password) != self.rounds
+        return await self._run("rehash" if needs_rehash else "verify",
+                               self._verify_and_update_sync, password, hashed_password)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,114 @@
+"""
+Pré-busca especulativa das receitas mais prováveis de serem importadas.
+
+Depois de uma busca, as primeiras K receitas do resultado são baixadas e
+processadas em background para o catálogo web_recipes, de modo que a
+importação seguinte costuma ser um acerto no catálogo. A pré-busca é de baixa
+prioridade: tem orçamento global (token bucket), limite de tarefas
+simultâneas e é cancelada quando o fetcher está ocupado com requisições de
+usuários.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from prometheus_client import Counter
+
+from rate_limit import TokenBucket, parse_rate
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_EVENTS = Counter(
+    "prefetch_events_total",
+    "Eventos da pré-busca de receitas",
+    # scheduled, completed, failed, cancelled, skipped_budget, skipped_load, skipped_recent
+    ["event"],
+)
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[dict]],
+        fetcher,
+        top_k: int = 2,
+        max_inflight: int = 2,
+        budget: str = "30/60",
+        max_foreground: int = 2,
+        recent_ttl: float = 600.0,
+    ):
+        self.fetch = fetch
+        self.fetcher = fetcher
+        self.top_k = top_k
+        self.max_inflight = max_inflight
+        self.max_foreground = max_foreground
+        self.recent_ttl = recent_ttl
+        self._budget = TokenBucket(*parse_rate(budget))
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # URL -> instante da última pré-busca, para não repetir buscas populares
+        self._recent: Dict[str, float] = {}
+
+    def loaded(self) -> bool:
+        """Há requisições de usuários suficientes no fetcher para adiar a pré-busca"""
+        return self.fetcher.inflight - len(self._tasks) >= self.max_foreground
+
+    def shed_if_loaded(self) -> bool:
+        """Cancela toda a pré-busca em andamento se o fetcher estiver ocupado"""
+        if not self._tasks or not self.loaded():
+            return False
+        for task in list(self._tasks.values()):
+            task.cancel()
+        return True
+
+    async def schedule(self, urls: List[str]):
+        """Agenda a pré-busca das primeiras K URLs (chamado após a resposta da busca)
+
+        É async para que o BackgroundTasks do Starlette rode no event loop, e não
+        numa thread do threadpool, onde asyncio.create_task não funciona.
+        """
+        if self.loaded():
+            PREFETCH_EVENTS.labels("skipped_load").inc()
+            return
+
+        now = time.monotonic()
+        self._recent = {url: at for url, at in self._recent.items() if now - at < self.recent_ttl}
+        self._budget.refill(now)
+
+        for url in urls[:self.top_k]:
+            if url in self._tasks or url in self._recent:
+                PREFETCH_EVENTS.labels("skipped_recent").inc()
+                continue
+            if len(self._tasks) >= self.max_inflight or self._budget.wait_time():
+                PREFETCH_EVENTS.labels("skipped_budget").inc()
+                continue
+            self._tasks[url] = asyncio.create_task(self._run(url), name=f"prefetch:{url}")
+            # Orçamento e _recent só depois que a tarefa existe de fato
+            self._budget.tokens -= 1
+            self._recent[url] = now
+            PREFETCH_EVENTS.labels("scheduled").inc()
+
+    async def _run(self, url: str):
+        try:
+            await self.fetch(url)
+            PREFETCH_EVENTS.labels("completed").inc()
+        except asyncio.CancelledError:
+            PREFETCH_EVENTS.labels("cancelled").inc()
+            # Não conta como pré-buscada: a próxima busca pode tentar de novo
+            self._recent.pop(url, None)
+            raise
+        except Exception as e:
+            PREFETCH_EVENTS.labels("failed").inc()
+            logger.info(f"Pré-busca de {url} falhou: {str(e)}")
+        finally:
+            self._tasks.pop(url, None)
+
+    async def wait(self, url: str):
+        """Se a URL está sendo pré-buscada, espera terminar em vez de baixar de novo"""
+        task = self._tasks.get(url)
+        if task is not None:
+            await asyncio.wait({task})
+
+    def cancel_all(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
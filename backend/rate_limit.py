@@ -0,0 +1,152 @@
+"""
+Camada de admissão: token buckets por usuário e globais por classe de
+endpoint, mais cota diária de tokens LLM por usuário.
+
+As verificações de bucket são puramente em memória. A cota diária usa o
+rollup llm_usage_daily do Mongo, mas mantém o total do usuário em cache e o
+incrementa localmente a cada chamada, de modo que só há ida ao banco quando
+o cache expira.
+"""
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requisições rejeitadas pela camada de admissão",
+    ["endpoint_class", "scope"],
+)
+
+
+def parse_rate(spec: str) -> Tuple[float, float]:
+    """Converte "N/S" (N requisições a cada S segundos) em (capacidade, recarga por segundo)"""
+    count, _, seconds = spec.partition('/')
+    capacity, period = float(count), float(seconds or 1)
+    # Recarga zero faria wait_time dividir por zero a cada requisição: falha já na inicialização
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f"Limite inválido {spec!r}: requisições e segundos devem ser positivos")
+    return capacity, capacity / period
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "refill_rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.updated_at = now
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """Segundos até haver `cost` tokens disponíveis (0 se já há)"""
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.refill_rate
+
+
+class RateLimiter:
+    """Buckets por (classe de endpoint, usuário) e um bucket global por classe"""
+
+    def __init__(self, limits: Dict[str, Tuple[str, str]], max_users: int = 50000):
+        # limits: classe -> (spec por usuário, spec global)
+        self.limits = {name: (parse_rate(user), parse_rate(glob)) for name, (user, glob) in limits.items()}
+        self.max_users = max_users
+        self._user_buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._global_buckets = {
+            name: TokenBucket(*global_limit) for name, (_, global_limit) in self.limits.items()
+        }
+
+    def _user_bucket(self, endpoint_class: str, user_id: str) -> TokenBucket:
+        key = (endpoint_class, user_id)
+        bucket = self._user_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(*self.limits[endpoint_class][0])
+            self._user_buckets[key] = bucket
+            if len(self._user_buckets) > self.max_users:
+                self._user_buckets.popitem(last=False)
+        else:
+            self._user_buckets.move_to_end(key)
+        return bucket
+
+    def check(self, endpoint_class: str, user_id: str) -> float:
+        """Consome um token do usuário e do global; retorna o Retry-After (0 se admitido)"""
+        if endpoint_class not in self.limits:
+            return 0.0
+
+        now = time.monotonic()
+        user_bucket = self._user_bucket(endpoint_class, user_id)
+        global_bucket = self._global_buckets[endpoint_class]
+        user_bucket.refill(now)
+        global_bucket.refill(now)
+
+        wait = user_bucket.wait_time()
+        if wait:
+            RATE_LIMIT_REJECTIONS.labels(endpoint_class, "user").inc()
+            return wait
+        wait = global_bucket.wait_time()
+        if wait:
+            RATE_LIMIT_REJECTIONS.labels(endpoint_class, "global").inc()
+            return wait
+
+        user_bucket.tokens -= 1
+        global_bucket.tokens -= 1
+        return 0.0
+
+
+class DailyTokenQuota:
+    """Cota diária de tokens LLM por usuário, baseada em llm_usage_daily"""
+
+    def __init__(self, db, daily_limit: int, refresh_seconds: float = 60.0, max_users: int = 50000):
+        self.db = db
+        self.daily_limit = daily_limit
+        self.refresh_seconds = refresh_seconds
+        self.max_users = max_users
+        # user_id -> (data UTC, tokens usados, instante da leitura no banco)
+        self._usage: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+
+    async def _used_tokens(self, user_id: str, today: str) -> int:
+        cached = self._usage.get(user_id)
+        now = time.monotonic()
+        if cached and cached[0] == today and now - cached[2] < self.refresh_seconds:
+            return cached[1]
+
+        doc = await self.db.llm_usage_daily.find_one(
+            {"user_id": user_id, "date": today},
+            {"_id": 0, "total_tokens": 1}
+        )
+        used = int(doc.get("total_tokens", 0)) if doc else 0
+        self._usage[user_id] = (today, used, now)
+        self._usage.move_to_end(user_id)
+        if len(self._usage) > self.max_users:
+            self._usage.popitem(last=False)
+        return used
+
+    async def check(self, user_id: str) -> float:
+        """Retorna o Retry-After em segundos se a cota do dia acabou (0 se há saldo)"""
+        if self.daily_limit <= 0:
+            return 0.0
+        now = datetime.now(timezone.utc)
+        if await self._used_tokens(user_id, now.date().isoformat()) < self.daily_limit:
+            return 0.0
+
+        RATE_LIMIT_REJECTIONS.labels("llm", "daily_quota").inc()
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        return (tomorrow - now).total_seconds()
+
+    def add_usage(self, user_id: Optional[str], tokens: int):
+        """Atualiza o total em cache após uma chamada LLM"""
+        cached = self._usage.get(user_id) if user_id else None
+        if cached and cached[0] == datetime.now(timezone.utc).date().isoformat():
+            self._usage[user_id] = (cached[0], cached[1] + tokens, cached[2])
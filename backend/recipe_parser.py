@@ -0,0 +1,243 @@
+"""
+Parser determinístico de receitas coladas como texto.
+
+Reconhece o layout comum "Ingredientes / Modo de preparo", quantidades
+(inteiros, decimais com vírgula, frações "1/2", mistas "1 1/2" e "2 e 1/2"
+e unicode "½"), unidades em português e passos numerados. Retorna a receita no mesmo
+formato da extração via LLM, com um score de confiança usado para decidir se
+o resultado pode ser aceito sem chamar o LLM.
+"""
+import re
+import unicodedata
+from typing import List, NamedTuple, Optional
+
+from units import UNIT_REGISTRY, lookup_unit
+
+# Porções assumidas quando o texto não informa o rendimento
+DEFAULT_PORTIONS = 4
+
+UNICODE_FRACTIONS = {
+    '½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75,
+    '⅕': 0.2, '⅖': 0.4, '⅗': 0.6, '⅘': 0.8, '⅙': 1 / 6, '⅚': 5 / 6,
+    '⅛': 0.125, '⅜': 0.375, '⅝': 0.625, '⅞': 0.875,
+}
+
+NUMBER_WORDS = {
+    'um': 1, 'uma': 1, 'dois': 2, 'duas': 2, 'tres': 3, 'quatro': 4, 'cinco': 5,
+    'seis': 6, 'sete': 7, 'oito': 8, 'nove': 9, 'dez': 10, 'meia': 0.5, 'meio': 0.5,
+}
+
+INGREDIENT_HEADERS = ('ingredientes', 'ingrediente', 'voce vai precisar de', 'lista de ingredientes')
+STEP_HEADERS = ('modo de preparo', 'modo de fazer', 'preparo', 'preparacao', 'como fazer', 'instrucoes')
+PORTION_PATTERN = re.compile(r'(?:rende|serve|porcoes|porcao|rendimento)\D{0,20}(\d+)|(\d+)\s*(?:porcoes|porcao|pessoas|fatias|pedacos|unidades)')
+OPTIONAL_PATTERN = re.compile(r'\(?\s*opcional\s*\)?|a gosto', re.IGNORECASE)
+BULLET_PATTERN = re.compile(r'^\s*(?:[-•*·▪◦]+|\d+\s*[.)-]\s+|[a-z]\)\s+)')
+# Nomes que começam assim vêm de uma quantidade ou unidade mal lida ("E 1/2 xícaras de...")
+SUSPICIOUS_NAME_PATTERN = re.compile(r'^(?:\d|(?:e|ou|de|do|da|a|com)\b)', re.IGNORECASE)
+# Numeração de lista ("1." / "2)") só é removida de ingredientes quando seguida de uma quantidade
+NUMBERED_INGREDIENT_PATTERN = re.compile(r'^\d+[.)]\s+(?=\d|[½⅓⅔¼¾])')
+STEP_NUMBER_PATTERN = re.compile(r'^\s*(?:passo\s*)?(\d+)\s*[.)º°:-]\s*', re.IGNORECASE)
+
+_FRACTION_CHARS = ''.join(UNICODE_FRACTIONS)
+QUANTITY_PATTERN = re.compile(
+    r'^\s*(?P<qty>'
+    r'\d+\s+(?:e\s+)?\d+/\d+'              # 1 1/2, 2 e 1/2
+    r'|\d+\s+e\s+[' + _FRACTION_CHARS + r']'  # 2 e ½
+    r'|\d+\s*[' + _FRACTION_CHARS + r']'  # 1½
+    r'|\d+/\d+'                           # 1/2
+    r'|\d+(?:[.,]\d+)?'                   # 2, 0,5, 1.5
+    r'|[' + _FRACTION_CHARS + r']'        # ½
+    r')(?:\s*(?:a|-|ou)\s*\d+(?:[.,]\d+)?)?\s*'  # faixas "2 a 3" usam o primeiro valor
+)
+
+# Grafias do registro de units.py numa alternação única, mais longas primeiro, exigindo fim de palavra
+UNIT_PATTERN = re.compile(
+    r'(?P<unit>' + '|'.join(re.escape(v) for v in sorted(UNIT_REGISTRY, key=len, reverse=True)) + r')(?![a-z])'
+)
+
+
+class ParseResult(NamedTuple):
+    recipe: dict
+    confidence: float
+
+
+def strip_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    normalized = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+def parse_quantity(text: str) -> Optional[float]:
+    """Converte "1 1/2", "2 e 1/2", "1½", "1/2", "0,5" ou "½" em float"""
+    text = text.strip()
+    if not text:
+        return None
+    total = 0.0
+    for part in text.split():
+        if part == 'e':
+            continue
+        fraction_value = 0.0
+        if part and part[-1] in UNICODE_FRACTIONS:
+            fraction_value = UNICODE_FRACTIONS[part[-1]]
+            part = part[:-1]
+        if '/' in part:
+            numerator, _, denominator = part.partition('/')
+            if not denominator or float(denominator) == 0:
+                return None
+            total += float(numerator) / float(denominator)
+        elif part:
+            total += float(part.replace(',', '.'))
+        total += fraction_value
+    return total
+
+
+def parse_ingredient_line(line: str) -> Optional[dict]:
+    """Extrai quantidade, unidade e nome de uma linha de ingrediente"""
+    text = line.strip().lstrip('-•*·▪◦ ')
+    text = NUMBERED_INGREDIENT_PATTERN.sub('', text, count=1)
+    if not text:
+        return None
+
+    mandatory = not OPTIONAL_PATTERN.search(text)
+    text = OPTIONAL_PATTERN.sub('', text).strip(' ,.;')
+
+    quantity = None
+    rest = text
+    match = QUANTITY_PATTERN.match(text)
+    if match:
+        quantity = parse_quantity(match.group('qty'))
+        rest = text[match.end():]
+    else:
+        first, _, remainder = text.partition(' ')
+        word = strip_accents(first.lower())
+        if word in NUMBER_WORDS:
+            quantity = float(NUMBER_WORDS[word])
+            rest = remainder
+
+    unit = None
+    unit_match = UNIT_PATTERN.match(strip_accents(rest.lower()))
+    if unit_match:
+        unit = lookup_unit(unit_match.group('unit')).symbol
+        rest = rest[unit_match.end():]
+
+    name = re.sub(r'^\s*(?:\(.*?\)\s*)?(?:de|do|da|dos|das)\s+', '', rest.strip(' .,;:'), flags=re.IGNORECASE)
+    name = name.strip(' .,;:')
+    if not name:
+        return None
+
+    return {
+        'name': name[0].upper() + name[1:],
+        'quantity': quantity if quantity is not None else 1.0,
+        'unit': unit or 'unidade',
+        'mandatory': mandatory,
+        # Usado apenas no score de confiança
+        '_explicit_quantity': quantity is not None,
+    }
+
+
+def parse_ingredient(line: str) -> Optional[dict]:
+    """Ingrediente no formato da API (sem os campos internos do score)"""
+    ingredient = parse_ingredient_line(line)
+    if ingredient is None:
+        return None
+    return {k: v for k, v in ingredient.items() if not k.startswith('_')}
+
+
+def _header_kind(line: str) -> Optional[str]:
+    plain = strip_accents(line.lower()).strip(' :#*-=_')
+    if not plain or len(plain) > 40:
+        return None
+    if any(plain == h or plain.startswith(h + ' ') or plain.startswith(h + ':') for h in INGREDIENT_HEADERS):
+        return 'ingredients'
+    if any(plain == h or plain.startswith(h + ' ') or plain.startswith(h + ':') for h in STEP_HEADERS):
+        return 'steps'
+    return None
+
+
+def parse_recipe_text(text: str) -> ParseResult:
+    """Faz o parse do texto colado e calcula a confiança do resultado"""
+    lines = [line.strip() for line in text.replace('\r', '').split('\n')]
+    name = ''
+    portions = None
+    section = None
+    saw_ingredient_header = False
+    saw_step_header = False
+    ingredient_lines: List[str] = []
+    step_lines: List[str] = []
+
+    for line in lines:
+        if not line:
+            continue
+        kind = _header_kind(line)
+        if kind:
+            section = kind
+            saw_ingredient_header |= kind == 'ingredients'
+            saw_step_header |= kind == 'steps'
+            continue
+
+        plain = strip_accents(line.lower())
+        # Rendimento só antes das seções: nos passos, "corte em 12 pedaços" não é porção
+        portion_match = PORTION_PATTERN.search(plain) if section is None else None
+        if portion_match and portions is None:
+            portions = int(portion_match.group(1) or portion_match.group(2))
+
+        if section == 'ingredients':
+            # Subtítulos como "Para a calda:" separam grupos de ingredientes
+            if not line.endswith(':'):
+                ingredient_lines.append(line)
+        elif section == 'steps':
+            step_lines.append(line)
+        elif not name and not portion_match:
+            name = line.strip(' #*')
+
+    ingredients = [ing for ing in (parse_ingredient_line(line) for line in ingredient_lines) if ing]
+
+    steps = []
+    for line in step_lines:
+        step = STEP_NUMBER_PATTERN.sub('', BULLET_PATTERN.sub('', line, count=1), count=1).strip()
+        if step:
+            steps.append(step)
+    notes = ''
+    if steps:
+        notes = 'Modo de Preparo:\n' + '\n'.join(f"{i}. {step}" for i, step in enumerate(steps, 1))
+
+    confidence = _confidence(
+        name, ingredients, ingredient_lines, steps, saw_ingredient_header, saw_step_header
+    )
+
+    recipe = {
+        'name': name or 'Receita Importada',
+        'portions': portions or DEFAULT_PORTIONS,
+        'link': '',
+        'notes': notes,
+        'ingredients': [
+            {k: v for k, v in ing.items() if not k.startswith('_')} for ing in ingredients
+        ],
+    }
+    return ParseResult(recipe=recipe, confidence=confidence)
+
+
+def _confidence(name, ingredients, ingredient_lines, steps, saw_ingredient_header, saw_step_header) -> float:
+    """Score em [0, 1] a partir da estrutura encontrada e da qualidade das linhas"""
+    if not ingredients or not saw_ingredient_header:
+        return 0.0
+
+    parsed_ratio = len(ingredients) / len(ingredient_lines)
+    quantity_ratio = sum(1 for ing in ingredients if ing['_explicit_quantity']) / len(ingredients)
+    # Nomes muito longos indicam frases que não são ingredientes
+    clean_names = sum(1 for ing in ingredients if len(ing['name'].split()) <= 6) / len(ingredients)
+
+    suspicious = sum(1 for ing in ingredients if SUSPICIOUS_NAME_PATTERN.match(ing['name']))
+
+    score = (
+        0.15 * bool(name)
+        + 0.15 * saw_step_header
+        + 0.10 * bool(steps)
+        + 0.10 * min(len(ingredients) / 3, 1.0)
+        + 0.15 * parsed_ratio
+        + 0.20 * quantity_ratio
+        + 0.15 * clean_names
+        - 0.2 * suspicious
+    )
+    return round(min(max(score, 0.0), 1.0), 3)
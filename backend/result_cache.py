@@ -0,0 +1,74 @@
+"""
+Cache em memória com TTL e tamanho máximo, com contadores de hit/miss e
+taxa de acerto exportados para o Prometheus.
+"""
+import hashlib
+from typing import Any, Hashable, Optional
+
+from cachetools import TTLCache
+from prometheus_client import Counter, Gauge
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Consultas aos caches em memória",
+    ["cache", "result"],
+)
+CACHE_HIT_RATIO = Gauge(
+    "cache_hit_ratio",
+    "Taxa de acerto dos caches em memória desde o início do processo",
+    ["cache"],
+)
+CACHE_SIZE = Gauge(
+    "cache_entries",
+    "Entradas atualmente nos caches em memória",
+    ["cache"],
+)
+
+
+def normalized_text_key(text: str) -> str:
+    """Hash do texto ignorando caixa e diferenças de espaços em branco"""
+    normalized = ' '.join(text.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        CACHE_HIT_RATIO.labels(name).set_function(lambda: self.hit_ratio)
+        CACHE_SIZE.labels(name).set_function(lambda: len(self._cache))
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(self.name, "miss").inc()
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.labels(self.name, "hit").inc()
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._cache[key] = value
+
+    def invalidate(self, key: Hashable):
+        self._cache.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
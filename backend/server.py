@@ -1,19 +1,46 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, Response, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import json
 import logging
+import math
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import List, Optional, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
 import jwt
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from fake_llm import FakeLlmChat
+from llm_metrics import count_tokens, record_llm_call, record_llm_parse, record_daily_usage
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from ingredients import ingredient_id
+from aggregation import aggregate
+from fuzzy_match import unmerge
+from shopping_items import ListItem, items_from_docs, items_to_docs, recipe_items
+from nutrition import estimate_recipe_locally
+from singleflight import SingleFlight, SingleFlightError, SingleFlightTimeout
+from starter_pack import sample_starter_recipes, clone_for_user
+from rate_limit import RateLimiter, DailyTokenQuota
+from result_cache import ResultCache, normalized_text_key
+from recipe_parser import parse_recipe_text
+from fetcher import Fetcher
+from passwords import PasswordHasher, PasswordHasherBusy
+from token_cache import VerifiedToken, VerifiedTokenCache
+from data_versions import DataVersions, RECIPES, SHOPPING_LISTS, SUGGESTIONS, etag_matches
+from fast_json import TrustedJSONResponse, model_defaults, model_projection
+from http_cache import HttpCache
+from tudogostoso import search_url, canonical_recipe_url, is_tudogostoso_url, parse_search_results, parse_recipe_page
+from web_catalog import WebRecipeCatalog, catalog_recipe
+from prefetch import Prefetcher
+import random
 import re
+import time
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -24,13 +51,76 @@ client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt em threads dedicadas; mudar BCRYPT_ROUNDS refaz os hashes no próximo login
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+    max_workers=int(os.environ.get('BCRYPT_MAX_WORKERS', '2')),
+    max_pending=int(os.environ.get('BCRYPT_MAX_PENDING', '64'))
+)
 JWT_SECRET = os.environ.get('JWT_SECRET', 'fallback-secret-key')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24 * 7  # 7 dias
+# Tokens já verificados; max_age limita quanto um worker demora a ver uma revogação feita em outro
+verified_tokens = VerifiedTokenCache(
+    maxsize=int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', '10000')),
+    max_age=float(os.environ.get('TOKEN_CACHE_MAX_AGE', '300'))
+)
+
+# LLM ("emergent" usa a chave Emergent; "fake" usa respostas gravadas locais)
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'emergent').lower()
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', '1'))
+# Base do backoff exponencial entre tentativas (segundos; espera sorteada em [0, base * 2^n])
+LLM_RETRY_BASE_DELAY = float(os.environ.get('LLM_RETRY_BASE_DELAY', '1.0'))
+# Cobertura mínima da tabela local de ingredientes para dispensar o LLM na estimativa
+LOCAL_ESTIMATE_MIN_COVERAGE = float(os.environ.get('LOCAL_ESTIMATE_MIN_COVERAGE', '0.8'))
+# Downloads do TudoGostoso: threads dedicadas, sessões do cloudscraper reaproveitadas
+fetcher = Fetcher(
+    max_workers=int(os.environ.get('FETCHER_MAX_WORKERS', '8')),
+    per_host_limit=int(os.environ.get('FETCHER_PER_HOST_LIMIT', '4')),
+    timeout=float(os.environ.get('FETCHER_TIMEOUT', '20')),
+    session_max_age=float(os.environ.get('FETCHER_SESSION_MAX_AGE', '1800')),
+    warm_url="https://www.tudogostoso.com.br/",
+    cache=HttpCache(
+        os.environ.get('HTTP_CACHE_DIR', str(ROOT_DIR / '.http_cache')),
+        max_bytes=int(os.environ.get('HTTP_CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
+        default_ttl=float(os.environ.get('HTTP_CACHE_DEFAULT_TTL', '86400')),
+        # Resultados de busca mudam mais que as páginas de receita
+        ttl_rules=[(r'/busca\?', float(os.environ.get('HTTP_CACHE_SEARCH_TTL', '3600')))]
+    )
+)
+# Receitas da web já processadas, compartilhadas entre usuários
+web_catalog = WebRecipeCatalog(db.web_recipes)
+# Versão das receitas e listas de cada usuário, usada como ETag nos GETs
+data_versions = DataVersions(db.data_versions)
+# Pré-busca em background das primeiras receitas de cada busca
+prefetcher = Prefetcher(
+    fetch=lambda url: fetch_web_recipe(url),
+    fetcher=fetcher,
+    top_k=int(os.environ.get('PREFETCH_TOP_K', '2')),
+    max_inflight=int(os.environ.get('PREFETCH_MAX_INFLIGHT', '2')),
+    budget=os.environ.get('PREFETCH_BUDGET', '30/60'),
+    max_foreground=int(os.environ.get('PREFETCH_MAX_FOREGROUND', '2'))
+)
+# Listagens grandes serializadas direto com orjson, sem passar pelos modelos Pydantic
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'true').lower() == 'true'
+# Cache por seção de GET /home (TTL em segundos; 0 desliga)
+HOME_CACHE_TTL = float(os.environ.get('HOME_CACHE_TTL', '300'))
+HOME_CACHE_SIZE = int(os.environ.get('HOME_CACHE_SIZE', '5000'))
+# Confiança mínima do parser local para aceitar a importação de texto sem chamar o LLM
+CLIPBOARD_PARSER_MIN_CONFIDENCE = float(os.environ.get('CLIPBOARD_PARSER_MIN_CONFIDENCE', '0.85'))
+# A partir de quantos itens a lista de compras é agregada pelo caminho vetorizado (NumPy)
+AGGREGATION_VECTORIZE_MIN_ITEMS = int(os.environ.get('AGGREGATION_VECTORIZE_MIN_ITEMS', '250'))
+# Similaridade mínima (trigramas) para mesclar itens de nomes parecidos; 0 desativa
+FUZZY_MERGE_MIN_SIMILARITY = float(os.environ.get('FUZZY_MERGE_MIN_SIMILARITY', '0.8'))
 
 security = HTTPBearer()
 
+# Coalescência de pipelines LLM duplicados (refresh, onboarding)
+single_flight = SingleFlight(
+    db.singleflight_leases,
+    lease_ttl=float(os.environ.get('SINGLEFLIGHT_LEASE_TTL', '180'))
+)
+
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -56,6 +146,12 @@ class Ingredient(BaseModel):
     quantity: float
     unit: str
     mandatory: bool = True
+    ingredient_id: Optional[int] = None  # id canônico do ingrediente, sempre derivado do nome
+    
+    @model_validator(mode="after")
+    def resolve_ingredient_id(self):
+        self.ingredient_id = ingredient_id(self.name)
+        return self
 
 class Recipe(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -102,6 +198,31 @@ class RecipeUpdate(BaseModel):
 class ImportRecipeRequest(BaseModel):
     clipboard_text: str
 
+class CardIngredient(BaseModel):
+    name: str
+    quantity: float
+    unit: str
+    mandatory: bool = True
+
+class RecipeCard(BaseModel):
+    """Campos que os cards e o RecipeViewDialog da página inicial usam"""
+    id: str
+    name: str
+    portions: int
+    link: Optional[str] = ""
+    notes: Optional[str] = ""
+    ingredients: List[CardIngredient] = []
+    tempo_preparo: Optional[int] = 0
+    calorias_por_porcao: Optional[int] = 0
+    custo_estimado: Optional[float] = 0.0
+    restricoes: List[str] = []
+    imagem_url: Optional[str] = ""
+
+class HomeFeed(BaseModel):
+    favorites: List[RecipeCard] = []
+    suggestions: List[RecipeCard] = []
+    trending: List[RecipeCard] = []
+
 class ShoppingItem(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     ingredient_name: str
@@ -110,6 +231,14 @@ class ShoppingItem(BaseModel):
     bought: bool = False
     recipe_ids: List[str] = []
     recipe_names: List[str] = []
+    ingredient_id: Optional[int] = None  # id canônico do ingrediente, sempre derivado do nome
+    merged_from: List[dict] = []  # itens parecidos mesclados automaticamente neste
+    keep_separate: bool = False
+    
+    @model_validator(mode="after")
+    def resolve_ingredient_id(self):
+        self.ingredient_id = ingredient_id(self.ingredient_name)
+        return self
 
 class ShoppingList(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -136,213 +265,182 @@ class UpdateShoppingItem(BaseModel):
     bought: Optional[bool] = None
 
 # Helper functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente em instantes")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(senha confere, novo hash se o custo do bcrypt mudou desde o cadastro)"""
+    try:
+        return await password_hasher.verify_and_update(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente em instantes")
 
 def create_token(user_id: str, username: str) -> str:
     payload = {
         "user_id": user_id,
         "username": username,
+        # Fracionário: um login logo após revogar os tokens não é confundido com os revogados
+        "iat": time.time(),
         "exp": datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+async def tokens_revoked(token: VerifiedToken) -> bool:
+    """Token emitido antes da última revogação dos tokens do usuário (logout-all)"""
+    user = await db.users.find_one({"id": token.user_id}, {"_id": 0, "tokens_valid_after": 1})
+    valid_after = user.get("tokens_valid_after") if user else None
+    return valid_after is not None and token.issued_at < valid_after
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    # Token já verificado recentemente: sem checar assinatura de novo
+    cached = verified_tokens.get(token)
+    if cached is not None:
+        return cached.user_id
+    
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Token inválido")
-        return user_id
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options={"require": ["exp"]})
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expirado")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token inválido")
-
-# Conversões de unidades
-def convert_unit(quantity: float, from_unit: str, to_unit: str) -> tuple[float, str]:
-    """Converte quantidade entre unidades compatíveis"""
-    from_unit = from_unit.lower().strip()
-    to_unit = to_unit.lower().strip()
-    
-    # Massa
-    mass_conversions = {
-        'g': 1,
-        'grama': 1,
-        'gramas': 1,
-        'kg': 1000,
-        'kilo': 1000,
-        'quilograma': 1000,
-        'quilogramas': 1000,
-        'mg': 0.001,
-        'miligrama': 0.001,
-        'miligramas': 0.001
-    }
     
-    # Volume
-    volume_conversions = {
-        'ml': 1,
-        'mililitro': 1,
-        'mililitros': 1,
-        'l': 1000,
-        'litro': 1000,
-        'litros': 1000,
-        'cl': 10,
-        'centilitro': 10,
-        'centilitros': 10
-    }
+    user_id = payload.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Token inválido")
     
-    # Verifica se são da mesma categoria
-    if from_unit in mass_conversions and to_unit in mass_conversions:
-        # Converte para gramas, depois para unidade destino
-        in_grams = quantity * mass_conversions[from_unit]
-        result = in_grams / mass_conversions[to_unit]
-        return result, to_unit
-    elif from_unit in volume_conversions and to_unit in volume_conversions:
-        # Converte para ml, depois para unidade destino
-        in_ml = quantity * volume_conversions[from_unit]
-        result = in_ml / volume_conversions[to_unit]
-        return result, to_unit
-    
-    # Unidades incompatíveis ou desconhecidas
-    return quantity, from_unit
-
-def normalize_unit(unit: str) -> str:
-    """Normaliza unidade para forma padrão"""
-    unit_lower = unit.lower().strip()
-    
-    mass_map = {
-        'g': 'g', 'grama': 'g', 'gramas': 'g',
-        'kg': 'kg', 'kilo': 'kg', 'quilograma': 'kg', 'quilogramas': 'kg',
-        'mg': 'mg', 'miligrama': 'mg', 'miligramas': 'mg'
-    }
+    expires_at = float(payload["exp"])
+    # Tokens antigos não têm iat: emitidos JWT_EXPIRATION_HOURS antes de expirar
+    verified = VerifiedToken(user_id, float(payload.get("iat", expires_at - JWT_EXPIRATION_HOURS * 3600)), expires_at)
+    if await tokens_revoked(verified):
+        raise HTTPException(status_code=401, detail="Token revogado")
+    verified_tokens.set(token, verified)
+    return user_id
+
+# Camada de admissão: token buckets ("N/S" = N requisições a cada S segundos) e cota diária de tokens LLM
+rate_limiter = RateLimiter({
+    "llm": (
+        os.environ.get('RATE_LIMIT_LLM_USER', '5/60'),
+        os.environ.get('RATE_LIMIT_LLM_GLOBAL', '60/60')
+    ),
+    "scrape": (
+        os.environ.get('RATE_LIMIT_SCRAPE_USER', '20/60'),
+        os.environ.get('RATE_LIMIT_SCRAPE_GLOBAL', '200/60')
+    ),
+})
+llm_token_quota = DailyTokenQuota(db, int(os.environ.get('LLM_DAILY_TOKEN_QUOTA', '200000')))
+
+async def enforce_rate_limit(endpoint_class: str, user_id: str):
+    """Aplica os limites da classe de endpoint; 429 com Retry-After se excedidos"""
+    retry_after = rate_limiter.check(endpoint_class, user_id)
+    if not retry_after and endpoint_class == "llm":
+        retry_after = await llm_token_quota.check(user_id)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Muitas requisições, tente novamente mais tarde",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+def rate_limited(endpoint_class: str):
+    """Dependência que autentica o usuário e aplica os limites da classe de endpoint"""
+    async def dependency(user_id: str = Depends(get_current_user)) -> str:
+        await enforce_rate_limit(endpoint_class, user_id)
+        return user_id
+    return dependency
+
+def llm_configured() -> bool:
+    """Indica se há um provedor LLM disponível"""
+    return LLM_PROVIDER == 'fake' or bool(os.environ.get('EMERGENT_LLM_KEY'))
+
+def create_llm_chat(session_id: str, system_message: str, model: str = "gpt-4o"):
+    """Cria uma sessão de chat no provedor LLM configurado"""
+    if LLM_PROVIDER == 'fake':
+        return FakeLlmChat(
+            session_id=session_id,
+            system_message=system_message
+        ).with_model("openai", model)
+    
+    return LlmChat(
+        api_key=os.environ.get('EMERGENT_LLM_KEY'),
+        session_id=session_id,
+        system_message=system_message
+    ).with_model("openai", model)
+
+async def send_llm_message(chat, text: str, call_site: str, user_id: Optional[str] = None, model: str = "gpt-4o") -> str:
+    """Envia mensagem ao LLM com retry, registrando latência, tokens e custo do call site"""
+    prompt_tokens = count_tokens(getattr(chat, 'system_message', '') + text, model)
+    retries = 0
+    start = time.perf_counter()
+    
+    while True:
+        try:
+            response = await chat.send_message(UserMessage(text=text))
+            break
+        except Exception as e:
+            if retries >= LLM_MAX_RETRIES:
+                latency = time.perf_counter() - start
+                record_llm_call(call_site, model, "error", latency, 0, 0, retries)
+                await record_daily_usage(db, user_id, call_site, 0, 0, 0.0, latency, failed=True)
+                raise
+            delay = random.uniform(0, LLM_RETRY_BASE_DELAY * 2 ** retries)
+            retries += 1
+            logger.warning(
+                f"Chamada LLM falhou em {call_site} (tentativa {retries}): {str(e)}; "
+                f"nova tentativa em {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
     
-    volume_map = {
-        'ml': 'ml', 'mililitro': 'ml', 'mililitros': 'ml',
-        'l': 'l', 'litro': 'l', 'litros': 'l',
-        'cl': 'cl', 'centilitro': 'cl', 'centilitros': 'cl'
-    }
+    latency = time.perf_counter() - start
+    completion_tokens = count_tokens(response, model)
+    cost = record_llm_call(call_site, model, "success", latency, prompt_tokens, completion_tokens, retries)
+    await record_daily_usage(db, user_id, call_site, prompt_tokens, completion_tokens, cost, latency, failed=False)
+    llm_token_quota.add_usage(user_id, prompt_tokens + completion_tokens)
     
-    if unit_lower in mass_map:
-        return mass_map[unit_lower]
-    elif unit_lower in volume_map:
-        return volume_map[unit_lower]
-    
-    return unit
-
-def get_best_unit(quantity: float, unit: str) -> tuple[float, str]:
-    """Retorna a melhor unidade para display"""
-    unit_normalized = normalize_unit(unit)
-    
-    # Para massa
-    if unit_normalized == 'g':
-        if quantity >= 1000:
-            return round(quantity / 1000, 2), 'kg'
-    elif unit_normalized == 'kg':
-        if quantity < 1:
-            return round(quantity * 1000, 2), 'g'
-    
-    # Para volume
-    if unit_normalized == 'ml':
-        if quantity >= 1000:
-            return round(quantity / 1000, 2), 'l'
-    elif unit_normalized == 'l':
-        if quantity < 1:
-            return round(quantity * 1000, 2), 'ml'
-    
-    # Arredonda para 2 casas decimais
-    return round(quantity, 2), unit_normalized
-
-def normalize_ingredient_name(name: str) -> str:
-    """Normaliza nome do ingrediente removendo acentos e espaços extras"""
-    import unicodedata
-    # Remove acentos
-    normalized = unicodedata.normalize('NFKD', name)
-    normalized = normalized.encode('ASCII', 'ignore').decode('ASCII')
-    # Remove espaços extras e converte para minúscula
-    return ' '.join(normalized.lower().strip().split())
-
-async def aggregate_ingredients(items: List[ShoppingItem]) -> List[ShoppingItem]:
-    """Agrega ingredientes com mesmo nome, convertendo unidades quando necessário"""
-    aggregated = {}
+    logger.info(
+        f"LLM {call_site}: {latency:.2f}s, {prompt_tokens}+{completion_tokens} tokens, "
+        f"US$ {cost:.4f}, {retries} retries"
+    )
+    return response
+
+# Referências fortes para tarefas em background (evita coleta pelo GC antes do fim)
+background_tasks = set()
+
+def spawn_background_task(coro, name: str) -> asyncio.Task:
+    """Agenda uma corrotina em background, registrando erros no log"""
+    task = asyncio.create_task(coro, name=name)
+    background_tasks.add(task)
     
-    for item in items:
-        key = normalize_ingredient_name(item.ingredient_name)
-        
-        if key not in aggregated:
-            # Normaliza a unidade
-            unit_norm = normalize_unit(item.unit)
-            aggregated[key] = {
-                'ingredient_name': item.ingredient_name,
-                'quantity': item.quantity,
-                'unit': unit_norm,
-                'bought': item.bought,
-                'recipe_ids': item.recipe_ids.copy(),
-                'recipe_names': item.recipe_names.copy(),
-                'id': item.id
-            }
-        else:
-            # Tenta agregar
-            existing = aggregated[key]
-            try:
-                converted_qty, converted_unit = convert_unit(
-                    item.quantity, 
-                    item.unit, 
-                    existing['unit']
-                )
-                if converted_unit == existing['unit']:
-                    existing['quantity'] += converted_qty
-                    # Adiciona recipe_ids ao item existente
-                    for rid in item.recipe_ids:
-                        if rid not in existing['recipe_ids']:
-                            existing['recipe_ids'].append(rid)
-                    for rname in item.recipe_names:
-                        if rname not in existing['recipe_names']:
-                            existing['recipe_names'].append(rname)
-                else:
-                    # Unidades incompatíveis, mantém separado com sufixo
-                    new_key = f"{key}_{normalize_unit(item.unit)}"
-                    aggregated[new_key] = {
-                        'ingredient_name': item.ingredient_name,
-                        'quantity': item.quantity,
-                        'unit': normalize_unit(item.unit),
-                        'bought': item.bought,
-                        'recipe_ids': item.recipe_ids.copy(),
-                        'recipe_names': item.recipe_names.copy(),
-                        'id': str(uuid.uuid4())
-                    }
-            except:
-                # Mantém separado em caso de erro
-                new_key = f"{key}_{normalize_unit(item.unit)}"
-                aggregated[new_key] = {
-                    'ingredient_name': item.ingredient_name,
-                    'quantity': item.quantity,
-                    'unit': normalize_unit(item.unit),
-                    'bought': item.bought,
-                    'recipe_ids': item.recipe_ids.copy(),
-                    'recipe_names': item.recipe_names.copy(),
-                    'id': str(uuid.uuid4())
-                }
-    
-    # Otimiza unidades para melhor visualização
-    result = []
-    for data in aggregated.values():
-        best_qty, best_unit = get_best_unit(data['quantity'], data['unit'])
-        result.append(ShoppingItem(
-            id=data['id'],
-            ingredient_name=data['ingredient_name'],
-            quantity=best_qty,
-            unit=best_unit,
-            bought=data['bought'],
-            recipe_ids=data['recipe_ids'],
-            recipe_names=data['recipe_names']
-        ))
+    def on_done(t: asyncio.Task):
+        background_tasks.discard(t)
+        if not t.cancelled() and t.exception():
+            logger.error(f"Erro na tarefa em background {name}: {str(t.exception())}")
     
-    return result
+    task.add_done_callback(on_done)
+    return task
+
+async def run_single_flight(key: str, fn, encode=lambda value: value, decode=lambda value: value):
+    """Executa fn uma única vez por chave entre requisições concorrentes (inclusive entre workers)"""
+    try:
+        return await single_flight.run(key, fn, encode=encode, decode=decode)
+    except SingleFlightTimeout:
+        raise HTTPException(status_code=503, detail="Operação em andamento, tente novamente em instantes")
+    except SingleFlightError as e:
+        raise HTTPException(status_code=503, detail=f"A operação em andamento falhou, tente novamente: {str(e)}")
+
+def encode_recipes(recipes: List[Recipe]) -> List[dict]:
+    return [recipe.model_dump() for recipe in recipes]
+
+def decode_recipes(docs: List[dict]) -> List[Recipe]:
+    return [Recipe(**doc) for doc in docs]
+
+async def aggregate_ingredients(items: List[ListItem]) -> List[ListItem]:
+    """Agrega ingredientes com mesmo nome, convertendo unidades quando necessário"""
+    # Listas grandes (muitas receitas consolidadas) usam o caminho vetorizado
+    return aggregate(items, AGGREGATION_VECTORIZE_MIN_ITEMS, FUZZY_MERGE_MIN_SIMILARITY)
 
 # Auth endpoints
 @api_router.post("/auth/register", response_model=TokenResponse)
@@ -353,7 +451,7 @@ async def register(user_data: UserRegister):
         raise HTTPException(status_code=400, detail="Usuário já existe")
     
     user_id = str(uuid.uuid4())
-    hashed_pwd = hash_password(user_data.password)
+    hashed_pwd = await hash_password(user_data.password)
     
     user_doc = {
         "id": user_id,
@@ -375,6 +473,7 @@ async def register(user_data: UserRegister):
     list_doc = quick_list.model_dump()
     list_doc['created_at'] = list_doc['created_at'].isoformat()
     await db.shopping_lists.insert_one(list_doc)
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     
     token = create_token(user_id, user_data.username)
     return TokenResponse(
@@ -396,7 +495,7 @@ async def login(credentials: UserLogin):
             user_doc = {
                 "id": user_id,
                 "username": "dev",
-                "password_hash": hash_password("55555"),
+                "password_hash": await hash_password("55555"),
                 "name": "Dev",
                 "created_at": datetime.now(timezone.utc).isoformat()
             }
@@ -411,6 +510,7 @@ async def login(credentials: UserLogin):
             list_doc = quick_list.model_dump()
             list_doc['created_at'] = list_doc['created_at'].isoformat()
             await db.shopping_lists.insert_one(list_doc)
+            await data_versions.bump(user_id, SHOPPING_LISTS)
             
             token = create_token(user_id, "dev")
             return TokenResponse(
@@ -431,8 +531,11 @@ async def login(credentials: UserLogin):
     if not user:
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
     
-    if not verify_password(credentials.password, user['password_hash']):
+    valid, new_hash = await verify_password(credentials.password, user['password_hash'])
+    if not valid:
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
+    if new_hash:
+        await db.users.update_one({"id": user['id']}, {"$set": {"password_hash": new_hash}})
     
     token = create_token(user['id'], user['username'])
     return TokenResponse(
@@ -442,12 +545,52 @@ async def login(credentials: UserLogin):
         has_completed_onboarding=user.get('has_completed_onboarding', False)
     )
 
-# Helper function para estimar valores com LLM
+@api_router.post("/auth/logout-all")
+async def logout_all(user_id: str = Depends(get_current_user)):
+    """Revoga todos os tokens já emitidos para o usuário (em todos os dispositivos)"""
+    now = time.time()
+    await db.users.update_one({"id": user_id}, {"$set": {"tokens_valid_after": now}})
+    # Os outros workers deixam de aceitar os tokens em até TOKEN_CACHE_MAX_AGE
+    verified_tokens.revoke_user(user_id, before=now)
+    return {"message": "Sessões encerradas"}
+
+def apply_estimated_values(recipe_data: dict, estimated_values: dict) -> dict:
+    """Preenche apenas os campos que estão vazios ou zero"""
+    if recipe_data.get('tempo_preparo', 0) == 0:
+        recipe_data['tempo_preparo'] = estimated_values.get('tempo_preparo', 0)
+    
+    if recipe_data.get('calorias_por_porcao', 0) == 0:
+        recipe_data['calorias_por_porcao'] = estimated_values.get('calorias_por_porcao', 0)
+    
+    if recipe_data.get('custo_estimado', 0) == 0:
+        recipe_data['custo_estimado'] = estimated_values.get('custo_estimado', 0.0)
+    
+    if not recipe_data.get('restricoes') or len(recipe_data.get('restricoes', [])) == 0:
+        recipe_data['restricoes'] = estimated_values.get('restricoes', [])
+    
+    return recipe_data
+
+# Helper function para estimar valores (tabela local, com LLM como fallback)
 async def estimate_recipe_values(recipe_data: dict) -> dict:
-    """Estima tempo, calorias, custo e restrições usando LLM"""
+    """Estima tempo, calorias, custo e restrições pela tabela local ou usando LLM"""
+    # Valores já presentes (ex.: estimativas pré-calculadas do catálogo web) não são refeitos
+    if all(recipe_data.get(field) for field in ('tempo_preparo', 'calorias_por_porcao', 'custo_estimado')):
+        if not recipe_data.get('restricoes'):
+            # Só faltam as restrições: a tabela local basta (só as afirma se reconhece todos os ingredientes)
+            recipe_data['restricoes'] = estimate_recipe_locally(recipe_data).values['restricoes']
+        return recipe_data
+    
     try:
-        llm_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not llm_key:
+        # Tabela local resolve a maioria das receitas sem chamar o LLM
+        local_estimate = estimate_recipe_locally(recipe_data)
+        if local_estimate.coverage >= LOCAL_ESTIMATE_MIN_COVERAGE:
+            logger.info(
+                f"Estimativa local para '{recipe_data.get('name')}' "
+                f"(cobertura {local_estimate.coverage:.0%}): {local_estimate.values}"
+            )
+            return apply_estimated_values(recipe_data, local_estimate.values)
+        
+        if not llm_configured():
             return recipe_data
         
         # Prepara os ingredientes para o prompt
@@ -482,17 +625,16 @@ Regras:
 
 Se a receita não tiver restrições, retorne array vazio []"""
 
-        chat = LlmChat(
-            api_key=llm_key,
+        chat = create_llm_chat(
             session_id=f"estimate-{uuid.uuid4()}",
             system_message="Você é um especialista em nutrição e culinária. Retorne APENAS JSON válido, sem texto adicional."
-        ).with_model("openai", "gpt-4o")
+        )
         
-        from emergentintegrations.llm.chat import UserMessage
-        response = await chat.send_message(UserMessage(text=prompt))
+        response = await send_llm_message(
+            chat, prompt, call_site="estimate_recipe_values", user_id=recipe_data.get('user_id')
+        )
         
         # Parse JSON da resposta
-        import json
         logger.info(f"LLM Response: {response[:200]}")  # Log primeiros 200 chars
         
         clean_response = response.strip()
@@ -512,31 +654,23 @@ Se a receita não tiver restrições, retorne array vazio []"""
         
         # Tenta parsear o JSON
         try:
-            estimated_values = json.loads(clean_response)
-        except json.JSONDecodeError:
-            # Se falhar, tenta encontrar JSON no meio do texto
-            json_match = re.search(r'\{[^{}]*"tempo_preparo"[^{}]*\}', clean_response, re.DOTALL)
-            if json_match:
-                estimated_values = json.loads(json_match.group())
-            else:
-                raise ValueError("Não foi possível extrair JSON da resposta")
+            try:
+                estimated_values = json.loads(clean_response)
+            except json.JSONDecodeError:
+                # Se falhar, tenta encontrar JSON no meio do texto
+                json_match = re.search(r'\{[^{}]*"tempo_preparo"[^{}]*\}', clean_response, re.DOTALL)
+                if json_match:
+                    estimated_values = json.loads(json_match.group())
+                else:
+                    raise ValueError("Não foi possível extrair JSON da resposta")
+        except ValueError:
+            record_llm_parse("estimate_recipe_values", False)
+            raise
+        record_llm_parse("estimate_recipe_values", True)
         
         logger.info(f"Estimated values: {estimated_values}")
         
-        # Atualiza apenas os campos que estão vazios ou zero
-        if recipe_data.get('tempo_preparo', 0) == 0:
-            recipe_data['tempo_preparo'] = estimated_values.get('tempo_preparo', 0)
-        
-        if recipe_data.get('calorias_por_porcao', 0) == 0:
-            recipe_data['calorias_por_porcao'] = estimated_values.get('calorias_por_porcao', 0)
-        
-        if recipe_data.get('custo_estimado', 0) == 0:
-            recipe_data['custo_estimado'] = estimated_values.get('custo_estimado', 0.0)
-        
-        if not recipe_data.get('restricoes') or len(recipe_data.get('restricoes', [])) == 0:
-            recipe_data['restricoes'] = estimated_values.get('restricoes', [])
-        
-        return recipe_data
+        return apply_estimated_values(recipe_data, estimated_values)
         
     except Exception as e:
         logger.error(f"Erro ao estimar valores com LLM: {str(e)}")
@@ -546,12 +680,68 @@ Se a receita não tiver restrições, retorne array vazio []"""
 # Helper function para gerar imagem com AI
 # Image generation function removed - images now only set manually
 
+# Respostas condicionais (ETag = versão dos dados do usuário, ver data_versions.py)
+def set_validators(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # O navegador guarda a resposta mas sempre revalida com If-None-Match
+    response.headers["Cache-Control"] = "private, no-cache"
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag)
+    return response
+
+# Caminho rápido (fast_json.py): projeção estrita e defaults dos modelos, sem validação
+RECIPE_PROJECTION = model_projection(Recipe, nested={"ingredients": Ingredient})
+RECIPE_DEFAULTS = model_defaults(Recipe)
+INGREDIENT_DEFAULTS = model_defaults(Ingredient)
+SHOPPING_LIST_PROJECTION = model_projection(ShoppingList, nested={"items": ShoppingItem})
+SHOPPING_LIST_DEFAULTS = model_defaults(ShoppingList)
+SHOPPING_ITEM_DEFAULTS = model_defaults(ShoppingItem)
+
+def trusted_recipe(doc: dict) -> dict:
+    """Documento de receita no formato de Recipe.model_dump(), sem instanciar o modelo"""
+    recipe = {**RECIPE_DEFAULTS, **doc}
+    # ingredient_id segue o validador de Ingredient: sempre derivado do nome (memoizado)
+    recipe['ingredients'] = [
+        {**INGREDIENT_DEFAULTS, **ing, 'ingredient_id': ingredient_id(ing['name'])}
+        for ing in doc.get('ingredients', [])
+    ]
+    return recipe
+
+def trusted_shopping_list(doc: dict) -> dict:
+    shopping_list = {**SHOPPING_LIST_DEFAULTS, **doc}
+    shopping_list['items'] = [
+        {**SHOPPING_ITEM_DEFAULTS, **item, 'ingredient_id': ingredient_id(item['ingredient_name'])}
+        for item in doc.get('items', [])
+    ]
+    return shopping_list
+
+def trusted_response(content, etag: str) -> TrustedJSONResponse:
+    response = TrustedJSONResponse(content)
+    set_validators(response, etag)
+    return response
+
 # Recipe endpoints
 @api_router.get("/recipes", response_model=List[Recipe])
-async def get_recipes(user_id: str = Depends(get_current_user)):
+async def get_recipes(request: Request, response: Response, ingredient: Optional[str] = None,
+                      user_id: str = Depends(get_current_user)):
+    etag = await data_versions.etag(user_id, RECIPES)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    
     # Busca apenas receitas reais do usuário (não sugestões) e limita a 500
+    query = {"user_id": user_id, "is_suggestion": False}
+    if ingredient:
+        # Filtra pelo id canônico: "cebolas" encontra receitas com "cebola picada"
+        query["ingredients.ingredient_id"] = ingredient_id(ingredient)
+    if FAST_JSON_RESPONSES:
+        recipes = await db.recipes.find(query, RECIPE_PROJECTION).limit(500).to_list(500)
+        return trusted_response([trusted_recipe(recipe) for recipe in recipes], etag)
+    
     recipes = await db.recipes.find(
-        {"user_id": user_id, "is_suggestion": False}, 
+        query, 
         {"_id": 0}
     ).limit(500).to_list(500)
     
@@ -574,6 +764,7 @@ async def create_recipe(recipe_data: RecipeCreate, user_id: str = Depends(get_cu
     recipe_doc = recipe.model_dump()
     recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
     await db.recipes.insert_one(recipe_doc)
+    await data_versions.bump(user_id, RECIPES)
     return recipe
 
 @api_router.put("/recipes/{recipe_id}", response_model=Recipe)
@@ -608,6 +799,9 @@ async def update_recipe(recipe_id: str, recipe_data: RecipeUpdate, user_id: str
         # Image generation removed - images now only set manually
         
         await db.recipes.update_one({"id": recipe_id}, {"$set": update_data})
+        await data_versions.bump(user_id, RECIPES)
+        if recipe.get('is_suggestion'):
+            await data_versions.bump(user_id, SUGGESTIONS)
     
     updated_recipe = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
     if isinstance(updated_recipe['created_at'], str):
@@ -621,9 +815,15 @@ async def generate_image_for_recipe(recipe_id: str, user_id: str = Depends(get_c
 
 @api_router.delete("/recipes/{recipe_id}")
 async def delete_recipe(recipe_id: str, user_id: str = Depends(get_current_user)):
-    result = await db.recipes.delete_one({"id": recipe_id, "user_id": user_id})
-    if result.deleted_count == 0:
+    deleted = await db.recipes.find_one_and_delete(
+        {"id": recipe_id, "user_id": user_id},
+        projection={"_id": 0, "is_suggestion": 1}
+    )
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Receita não encontrada")
+    await data_versions.bump(user_id, RECIPES)
+    if deleted.get('is_suggestion'):
+        await data_versions.bump(user_id, SUGGESTIONS)
     return {"message": "Receita deletada com sucesso"}
 
 @api_router.get("/ingredients/suggestions")
@@ -633,27 +833,48 @@ async def get_ingredient_suggestions(query: str, user_id: str = Depends(get_curr
     
     recipes = await db.recipes.find({"user_id": user_id}, {"_id": 0, "ingredients": 1}).to_list(1000)
     
-    suggestions = set()
+    # Um nome por ingrediente canônico ("Cebola" e "cebolas" aparecem uma vez só)
+    suggestions = {}
     query_lower = query.lower()
     
     for recipe in recipes:
         for ing in recipe.get('ingredients', []):
             name = ing.get('name', '')
             if query_lower in name.lower():
-                suggestions.add(name)
+                suggestions.setdefault(ing.get('ingredient_id') or ingredient_id(name), name)
     
-    return sorted(list(suggestions))[:10]
+    return sorted(suggestions.values())[:10]
+
+# Resultados da extração via LLM, independentes de usuário, por hash do texto normalizado
+clipboard_import_cache = ResultCache(
+    "clipboard_import",
+    maxsize=int(os.environ.get('CLIPBOARD_CACHE_SIZE', '1000')),
+    ttl=float(os.environ.get('CLIPBOARD_CACHE_TTL', '86400'))
+)
 
 @api_router.post("/recipes/import-from-clipboard", response_model=Recipe)
 async def import_recipe_from_clipboard(data: ImportRecipeRequest, user_id: str = Depends(get_current_user)):
     try:
-        # Usa LLM para extrair receita
-        llm_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not llm_key:
+        # Mesmo texto colado de novo (por qualquer usuário) reaproveita a extração anterior
+        cache_key = normalized_text_key(data.clipboard_text)
+        cached_recipe = clipboard_import_cache.get(cache_key)
+        if cached_recipe is not None:
+            return Recipe(id=str(uuid.uuid4()), user_id=user_id, **cached_recipe)
+        
+        # Textos no layout "Ingredientes / Modo de preparo" são resolvidos pelo parser local
+        parsed = parse_recipe_text(data.clipboard_text)
+        if parsed.confidence >= CLIPBOARD_PARSER_MIN_CONFIDENCE:
+            logger.info(f"Clipboard import parsed locally (confidence {parsed.confidence})")
+            recipe_create = RecipeCreate(**parsed.recipe)
+            clipboard_import_cache.set(cache_key, recipe_create.model_dump())
+            return Recipe(id=str(uuid.uuid4()), user_id=user_id, **recipe_create.model_dump())
+        
+        # Usa LLM para extrair receita; só aqui o limite "llm" é cobrado (cache e parser local não gastam)
+        if not llm_configured():
             raise HTTPException(status_code=500, detail="Chave LLM não configurada")
+        await enforce_rate_limit("llm", user_id)
         
-        chat = LlmChat(
-            api_key=llm_key,
+        chat = create_llm_chat(
             session_id=f"import-{user_id}-{uuid.uuid4()}",
             system_message="""Você é um assistente especializado que extrai receitas de textos.
             Retorne APENAS um JSON válido no seguinte formato:
@@ -682,23 +903,28 @@ async def import_recipe_from_clipboard(data: ImportRecipeRequest, user_id: str =
             Exemplo de notes bem formatado:
             "Modo de Preparo:\n1. Pré-aqueça o forno a 180°C\n2. Em uma tigela, misture a farinha com o açúcar\n3. Adicione os ovos um a um, mexendo bem\n4. Despeje a massa em uma forma untada\n5. Asse por 30-40 minutos até dourar"
             """
-        ).with_model("openai", "gpt-4o")
-        
-        user_message = UserMessage(
-            text=f"Extraia a receita do seguinte texto:\n\n{data.clipboard_text}"
         )
         
-        response = await chat.send_message(user_message)
+        response = await send_llm_message(
+            chat,
+            f"Extraia a receita do seguinte texto:\n\n{data.clipboard_text}",
+            call_site="import_from_clipboard",
+            user_id=user_id
+        )
         
         # Parse JSON da resposta
-        import json
         # Remove markdown code blocks se existirem
         clean_response = response.strip()
         if clean_response.startswith('```'):
             clean_response = re.sub(r'^```[\w]*\n', '', clean_response)
             clean_response = re.sub(r'\n```$', '', clean_response)
         
-        recipe_data = json.loads(clean_response)
+        try:
+            recipe_data = json.loads(clean_response)
+        except json.JSONDecodeError:
+            record_llm_parse("import_from_clipboard", False)
+            raise
+        record_llm_parse("import_from_clipboard", True)
         
         # Valida e corrige ingredientes antes de criar a receita
         if 'ingredients' in recipe_data and isinstance(recipe_data['ingredients'], list):
@@ -740,6 +966,7 @@ async def import_recipe_from_clipboard(data: ImportRecipeRequest, user_id: str =
         # Retorna apenas os dados extraídos, sem criar no banco
         # O frontend carregará no formulário e o usuário salvará manualmente
         recipe_create = RecipeCreate(**recipe_data)
+        clipboard_import_cache.set(cache_key, recipe_create.model_dump())
         # Cria objeto Recipe temporário apenas para validação e resposta
         recipe = Recipe(
             id=str(uuid.uuid4()),  # ID temporário
@@ -749,6 +976,8 @@ async def import_recipe_from_clipboard(data: ImportRecipeRequest, user_id: str =
         
         return recipe
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Erro ao processar resposta do LLM: {str(e)}")
     except Exception as e:
@@ -756,11 +985,16 @@ async def import_recipe_from_clipboard(data: ImportRecipeRequest, user_id: str =
 
 # Shopping list endpoints
 @api_router.get("/shopping-lists", response_model=List[ShoppingList])
-async def get_shopping_lists(user_id: str = Depends(get_current_user)):
+async def get_shopping_lists(request: Request, response: Response, user_id: str = Depends(get_current_user)):
+    etag = await data_versions.etag(user_id, SHOPPING_LISTS)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    
     # Limita a 200 listas mais recentes
     lists = await db.shopping_lists.find(
         {"user_id": user_id}, 
-        {"_id": 0}
+        SHOPPING_LIST_PROJECTION if FAST_JSON_RESPONSES else {"_id": 0}
     ).limit(200).to_list(200)
     
     for lst in lists:
@@ -768,6 +1002,9 @@ async def get_shopping_lists(user_id: str = Depends(get_current_user)):
             lst['created_at'] = datetime.fromisoformat(lst['created_at'])
     # Ordena: lista rápida primeiro, depois por data
     lists.sort(key=lambda x: (not x['is_quick_list'], x['created_at']), reverse=True)
+    
+    if FAST_JSON_RESPONSES:
+        return trusted_response([trusted_shopping_list(lst) for lst in lists], etag)
     return lists
 
 @api_router.post("/shopping-lists", response_model=ShoppingList)
@@ -776,6 +1013,7 @@ async def create_shopping_list(list_data: ShoppingListCreate, user_id: str = Dep
     list_doc = shopping_list.model_dump()
     list_doc['created_at'] = list_doc['created_at'].isoformat()
     await db.shopping_lists.insert_one(list_doc)
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     return shopping_list
 
 @api_router.delete("/shopping-lists/{list_id}")
@@ -788,6 +1026,7 @@ async def delete_shopping_list(list_id: str, user_id: str = Depends(get_current_
         raise HTTPException(status_code=400, detail="Não é possível deletar a lista rápida")
     
     await db.shopping_lists.delete_one({"id": list_id})
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     return {"message": "Lista deletada com sucesso"}
 
 @api_router.post("/shopping-lists/{list_id}/add-recipe")
@@ -806,28 +1045,19 @@ async def add_recipe_to_list(list_id: str, data: AddRecipeToList, user_id: str =
     portion_multiplier = data.portions / recipe['portions']
     
     # Adiciona ingredientes à lista
-    current_items = [ShoppingItem(**item) for item in shopping_list.get('items', [])]
-    
-    for ing in recipe['ingredients']:
-        new_item = ShoppingItem(
-            ingredient_name=ing['name'],
-            quantity=ing['quantity'] * portion_multiplier,
-            unit=ing['unit'],
-            bought=False,
-            recipe_ids=[recipe['id']],
-            recipe_names=[recipe['name']]
-        )
-        current_items.append(new_item)
+    current_items = items_from_docs(shopping_list.get('items', []))
+    current_items.extend(recipe_items(recipe, portion_multiplier))
     
     # Agrega ingredientes
     aggregated_items = await aggregate_ingredients(current_items)
     
     # Atualiza lista
-    items_doc = [item.model_dump() for item in aggregated_items]
+    items_doc = items_to_docs(aggregated_items)
     await db.shopping_lists.update_one(
         {"id": list_id},
         {"$set": {"items": items_doc}}
     )
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     
     return {"message": "Receita adicionada à lista"}
 
@@ -837,26 +1067,24 @@ async def add_manual_item(list_id: str, item_data: AddManualItem, user_id: str =
     if not shopping_list:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
     
-    new_item = ShoppingItem(
+    new_item = ListItem(
         ingredient_name=item_data.ingredient_name,
         quantity=item_data.quantity,
-        unit=item_data.unit,
-        bought=False,
-        recipe_ids=[],
-        recipe_names=[]
+        unit=item_data.unit
     )
     
-    current_items = [ShoppingItem(**item) for item in shopping_list.get('items', [])]
+    current_items = items_from_docs(shopping_list.get('items', []))
     current_items.append(new_item)
     
     # Agrega
     aggregated_items = await aggregate_ingredients(current_items)
-    items_doc = [item.model_dump() for item in aggregated_items]
+    items_doc = items_to_docs(aggregated_items)
     
     await db.shopping_lists.update_one(
         {"id": list_id},
         {"$set": {"items": items_doc}}
     )
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     
     return {"message": "Item adicionado"}
 
@@ -883,9 +1111,36 @@ async def update_shopping_item(list_id: str, item_id: str, item_data: UpdateShop
         {"id": list_id},
         {"$set": {"items": items}}
     )
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     
     return {"message": "Item atualizado"}
 
+@api_router.post("/shopping-lists/{list_id}/items/{item_id}/unmerge")
+async def unmerge_shopping_item(list_id: str, item_id: str, user_id: str = Depends(get_current_user)):
+    """Desfaz a mesclagem automática de itens parecidos, restaurando-os como itens separados"""
+    shopping_list = await db.shopping_lists.find_one({"id": list_id, "user_id": user_id}, {"_id": 0})
+    if not shopping_list:
+        raise HTTPException(status_code=404, detail="Lista não encontrada")
+    
+    items = items_from_docs(shopping_list.get('items', []))
+    position = next((i for i, item in enumerate(items) if item.id == item_id), None)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Item não encontrado")
+    if not items[position].merged_from:
+        raise HTTPException(status_code=400, detail="Item não tem itens mesclados")
+    
+    # Restaurados logo depois do item e marcados para não serem mesclados de novo
+    restored = unmerge(items[position])
+    items[position + 1:position + 1] = restored
+    
+    await db.shopping_lists.update_one(
+        {"id": list_id},
+        {"$set": {"items": items_to_docs(items)}}
+    )
+    await data_versions.bump(user_id, SHOPPING_LISTS)
+    
+    return {"message": "Itens separados", "restored": len(restored)}
+
 @api_router.delete("/shopping-lists/{list_id}/items/{item_id}")
 async def delete_shopping_item(list_id: str, item_id: str, user_id: str = Depends(get_current_user)):
     shopping_list = await db.shopping_lists.find_one({"id": list_id, "user_id": user_id}, {"_id": 0})
@@ -898,6 +1153,7 @@ async def delete_shopping_item(list_id: str, item_id: str, user_id: str = Depend
         {"id": list_id},
         {"$set": {"items": items}}
     )
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     
     return {"message": "Item removido"}
 
@@ -913,6 +1169,7 @@ async def clear_bought_items(list_id: str, user_id: str = Depends(get_current_us
         {"id": list_id},
         {"$set": {"items": items}}
     )
+    await data_versions.bump(user_id, SHOPPING_LISTS)
     
     return {"message": "Itens comprados removidos"}
 
@@ -920,8 +1177,7 @@ async def clear_bought_items(list_id: str, user_id: str = Depends(get_current_us
 async def generate_recipe_suggestions(user_id: str) -> List[Recipe]:
     """Gera 5 sugestões de receitas baseadas nos ingredientes do usuário"""
     try:
-        llm_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not llm_key:
+        if not llm_configured():
             return []
         
         # Busca receitas do usuário para extrair ingredientes
@@ -974,17 +1230,14 @@ Regras:
 
         logger.info(f"Generating recipe suggestions for user {user_id}")
         
-        chat = LlmChat(
-            api_key=llm_key,
+        chat = create_llm_chat(
             session_id=f"suggestions-{user_id}-{uuid.uuid4()}",
             system_message="Você é um chef brasileiro especialista. Retorne APENAS JSON válido."
-        ).with_model("openai", "gpt-4o")
+        )
         
-        from emergentintegrations.llm.chat import UserMessage
-        response = await chat.send_message(UserMessage(text=prompt))
+        response = await send_llm_message(chat, prompt, call_site="recipe_suggestions", user_id=user_id)
         
         # Parse JSON
-        import json
         clean_response = response.strip()
         
         # Remove markdown
@@ -997,7 +1250,12 @@ Regras:
         
         clean_response = clean_response.strip()
         
-        recipes_data = json.loads(clean_response)
+        try:
+            recipes_data = json.loads(clean_response)
+        except json.JSONDecodeError:
+            record_llm_parse("recipe_suggestions", False)
+            raise
+        record_llm_parse("recipe_suggestions", True)
         
         # Cria as receitas no banco
         created_recipes = []
@@ -1041,13 +1299,12 @@ Regras:
         return []
 
 # Home page endpoints
-@api_router.get("/home/favorites", response_model=List[Recipe])
-async def get_favorite_recipes(user_id: str = Depends(get_current_user)):
-    """Retorna receitas favoritas (mais adicionadas às listas pelo usuário)"""
-    # Busca listas do usuário (limitado a 100 listas mais recentes)
+async def favorite_recipe_ids(user_id: str) -> List[str]:
+    """Ids das 10 receitas mais adicionadas às listas pelo usuário"""
+    # Busca listas do usuário (limitado a 100 listas mais recentes), só os recipe_ids dos itens
     lists = await db.shopping_lists.find(
         {"user_id": user_id}, 
-        {"_id": 0, "items": 1}
+        {"_id": 0, "items.recipe_ids": 1}
     ).limit(100).to_list(100)
     
     # Conta quantas vezes cada receita foi adicionada
@@ -1059,8 +1316,75 @@ async def get_favorite_recipes(user_id: str = Depends(get_current_user)):
     
     # Ordena por contagem e pega top 10
     top_recipe_ids = sorted(recipe_count.items(), key=lambda x: x[1], reverse=True)[:10]
-    top_ids = [rid for rid, _ in top_recipe_ids]
-    
+    return [rid for rid, _ in top_recipe_ids]
+
+RECIPE_CARD_PROJECTION = model_projection(RecipeCard, nested={"ingredients": CardIngredient})
+RECIPE_CARD_DEFAULTS = model_defaults(RecipeCard)
+CARD_INGREDIENT_DEFAULTS = model_defaults(CardIngredient)
+
+# Seções já montadas de GET /home, por usuário e versões dos dados (ver data_versions.py)
+home_section_cache = ResultCache("home_sections", maxsize=HOME_CACHE_SIZE, ttl=max(HOME_CACHE_TTL, 1))
+
+def recipe_card(doc: dict) -> dict:
+    card = {**RECIPE_CARD_DEFAULTS, **doc}
+    card['ingredients'] = [{**CARD_INGREDIENT_DEFAULTS, **ing} for ing in doc.get('ingredients', [])]
+    return card
+
+async def load_favorite_cards(user_id: str) -> List[dict]:
+    top_ids = await favorite_recipe_ids(user_id)
+    if not top_ids:
+        return []
+    recipes = await db.recipes.find(
+        {"id": {"$in": top_ids}, "user_id": user_id},
+        RECIPE_CARD_PROJECTION
+    ).limit(10).to_list(10)
+    return [recipe_card(recipe) for recipe in recipes]
+
+async def load_suggestion_cards(user_id: str, suggestion_type: str) -> List[dict]:
+    recipes = await db.recipes.find(
+        {"user_id": user_id, "is_suggestion": True, "suggestion_type": suggestion_type},
+        RECIPE_CARD_PROJECTION
+    ).limit(5).to_list(5)
+    return [recipe_card(recipe) for recipe in recipes]
+
+async def cached_section(key: tuple, load) -> List[dict]:
+    if HOME_CACHE_TTL <= 0:
+        return await load()
+    cards = home_section_cache.get(key)
+    if cards is None:
+        cards = await load()
+        home_section_cache.set(key, cards)
+    return cards
+
+@api_router.get("/home", response_model=HomeFeed)
+async def get_home(user_id: str = Depends(get_current_user)):
+    """Favoritas, sugestões e tendências da página inicial numa só resposta"""
+    # A chave do cache inclui as versões lidas antes das consultas: qualquer escrita
+    # (em qualquer worker) muda a chave, e o que for carregado é no mínimo dessa versão
+    versions = await data_versions.all(user_id)
+    favorites, suggestions, trending = await asyncio.gather(
+        cached_section(
+            (user_id, "favorites", versions[RECIPES], versions[SHOPPING_LISTS], versions[SUGGESTIONS]),
+            lambda: load_favorite_cards(user_id)
+        ),
+        cached_section(
+            (user_id, "suggestions", versions[SUGGESTIONS]),
+            lambda: load_suggestion_cards(user_id, "ingredients")
+        ),
+        cached_section(
+            (user_id, "trending", versions[SUGGESTIONS]),
+            lambda: load_suggestion_cards(user_id, "trending")
+        ),
+    )
+    feed = {"favorites": favorites, "suggestions": suggestions, "trending": trending}
+    if FAST_JSON_RESPONSES:
+        return TrustedJSONResponse(feed)
+    return feed
+
+@api_router.get("/home/favorites", response_model=List[Recipe])
+async def get_favorite_recipes(user_id: str = Depends(get_current_user)):
+    """Retorna receitas favoritas (mais adicionadas às listas pelo usuário)"""
+    top_ids = await favorite_recipe_ids(user_id)
     if not top_ids:
         return []
     
@@ -1095,21 +1419,27 @@ async def get_suggested_recipes(user_id: str = Depends(get_current_user)):
     return existing_suggestions
 
 @api_router.post("/home/suggestions/refresh", response_model=List[Recipe])
-async def refresh_suggested_recipes(user_id: str = Depends(get_current_user)):
+async def refresh_suggested_recipes(user_id: str = Depends(rate_limited("llm"))):
     """Gera novas sugestões de receitas com ingredientes do usuário"""
     
-    # Remove sugestões antigas baseadas em ingredientes
-    await db.recipes.delete_many({"user_id": user_id, "is_suggestion": True, "suggestion_type": "ingredients"})
+    async def refresh():
+        # Remove sugestões antigas baseadas em ingredientes
+        await db.recipes.delete_many({"user_id": user_id, "is_suggestion": True, "suggestion_type": "ingredients"})
+        
+        # Gera novas sugestões
+        new_suggestions = await generate_ingredient_suggestions(user_id)
+        await data_versions.bump(user_id, SUGGESTIONS)
+        return new_suggestions[:5]
     
-    # Gera novas sugestões
-    new_suggestions = await generate_ingredient_suggestions(user_id)
-    return new_suggestions[:5]
+    # Refresh duplicado (duplo toque, retry) compartilha o mesmo pipeline
+    return await run_single_flight(
+        f"refresh-suggestions:{user_id}", refresh, encode=encode_recipes, decode=decode_recipes
+    )
 
 async def generate_ingredient_suggestions(user_id: str):
     """Gera receitas baseadas nos ingredientes das receitas do usuário"""
     try:
-        llm_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not llm_key:
+        if not llm_configured():
             return []
         
         # Busca todos os ingredientes das receitas do usuário
@@ -1153,24 +1483,27 @@ Retorne APENAS um array JSON válido, sem texto adicional. Cada receita deve ter
 Exemplo de formato:
 [{{"name": "Frango Assado com Batatas", "portions": 4, "ingredients": [{{"name": "frango", "quantity": 1, "unit": "kg", "mandatory": true}}], "notes": "Tempere o frango...", "tempo_preparo": 60, "calorias_por_porcao": 350, "custo_estimado": 25.50, "restricoes": []}}]"""
         
-        chat = LlmChat(
-            api_key=llm_key,
+        chat = create_llm_chat(
             session_id=f"ingredient-suggestions-{user_id}-{uuid.uuid4()}",
             system_message="Você é um chef brasileiro especialista. Retorne APENAS JSON válido."
-        ).with_model("openai", "gpt-4o")
+        )
         
-        response = await chat.send_message(UserMessage(text=prompt))
+        response = await send_llm_message(chat, prompt, call_site="ingredient_suggestions", user_id=user_id)
         
         # Parse JSON
-        import json
-        import re
         # response já é uma string, não precisa usar .text
         json_match = re.search(r'\[.*\]', response, re.DOTALL)
         if not json_match:
             logger.error(f"Could not find JSON array in LLM response: {response[:200]}")
+            record_llm_parse("ingredient_suggestions", False)
             return []
         
-        recipes_data = json.loads(json_match.group(0))
+        try:
+            recipes_data = json.loads(json_match.group(0))
+        except json.JSONDecodeError:
+            record_llm_parse("ingredient_suggestions", False)
+            raise
+        record_llm_parse("ingredient_suggestions", True)
         
         # Cria receitas no banco com estimativas do LLM
         new_recipes = []
@@ -1199,6 +1532,8 @@ Exemplo de formato:
             recipe_doc = recipe.model_dump()
             recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
             await db.recipes.insert_one(recipe_doc)
+            # A cada inserção, para que uma falha no meio não deixe GET /home em cache sem elas
+            await data_versions.bump(user_id, SUGGESTIONS)
             new_recipes.append(recipe)
         
         return new_recipes
@@ -1226,21 +1561,26 @@ async def get_trending_recipes(user_id: str = Depends(get_current_user)):
     return existing_trending
 
 @api_router.post("/home/trending/refresh", response_model=List[Recipe])
-async def refresh_trending_recipes(user_id: str = Depends(get_current_user)):
+async def refresh_trending_recipes(user_id: str = Depends(rate_limited("llm"))):
     """Gera novas receitas em tendência"""
     
-    # Remove tendências antigas
-    await db.recipes.delete_many({"user_id": user_id, "is_suggestion": True, "suggestion_type": "trending"})
+    async def refresh():
+        # Remove tendências antigas
+        await db.recipes.delete_many({"user_id": user_id, "is_suggestion": True, "suggestion_type": "trending"})
+        
+        # Gera novas tendências
+        new_trending = await generate_trending_suggestions(user_id)
+        await data_versions.bump(user_id, SUGGESTIONS)
+        return new_trending[:5]
     
-    # Gera novas tendências
-    new_trending = await generate_trending_suggestions(user_id)
-    return new_trending[:5]
+    return await run_single_flight(
+        f"refresh-trending:{user_id}", refresh, encode=encode_recipes, decode=decode_recipes
+    )
 
 async def generate_trending_suggestions(user_id: str):
     """Gera receitas em tendência usando LLM com busca web"""
     try:
-        llm_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not llm_key:
+        if not llm_configured():
             return []
         
         # Gera prompt para LLM com contexto de tendências
@@ -1269,24 +1609,27 @@ Retorne APENAS um array JSON válido, sem texto adicional. Cada receita deve ter
 Exemplo de formato:
 [{{"name": "Bowl de Açaí Fitness", "portions": 2, "ingredients": [{{"name": "açaí", "quantity": 200, "unit": "g", "mandatory": true}}], "notes": "Bata o açaí...", "tempo_preparo": 10, "calorias_por_porcao": 280, "custo_estimado": 18.00, "restricoes": ["vegano"]}}]"""
         
-        chat = LlmChat(
-            api_key=llm_key,
+        chat = create_llm_chat(
             session_id=f"trending-suggestions-{user_id}-{uuid.uuid4()}",
             system_message="Você é um chef especialista em tendências culinárias. Retorne APENAS JSON válido."
-        ).with_model("openai", "gpt-4o")
+        )
         
-        response = await chat.send_message(UserMessage(text=prompt))
+        response = await send_llm_message(chat, prompt, call_site="trending_suggestions", user_id=user_id)
         
         # Parse JSON
-        import json
-        import re
         # response já é uma string, não precisa usar .text
         json_match = re.search(r'\[.*\]', response, re.DOTALL)
         if not json_match:
             logger.error(f"Could not find JSON array in LLM response: {response[:200]}")
+            record_llm_parse("trending_suggestions", False)
             return []
         
-        recipes_data = json.loads(json_match.group(0))
+        try:
+            recipes_data = json.loads(json_match.group(0))
+        except json.JSONDecodeError:
+            record_llm_parse("trending_suggestions", False)
+            raise
+        record_llm_parse("trending_suggestions", True)
         
         # Cria receitas no banco com estimativas do LLM
         new_recipes = []
@@ -1315,6 +1658,8 @@ Exemplo de formato:
             recipe_doc = recipe.model_dump()
             recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
             await db.recipes.insert_one(recipe_doc)
+            # A cada inserção, para que uma falha no meio não deixe GET /home em cache sem elas
+            await data_versions.bump(user_id, SUGGESTIONS)
             new_recipes.append(recipe)
         
         return new_recipes
@@ -1324,22 +1669,107 @@ Exemplo de formato:
         return []
 
 @api_router.post("/onboarding/complete")
-async def complete_onboarding(user_id: str = Depends(get_current_user)):
+async def complete_onboarding(user_id: str = Depends(rate_limited("llm"))):
     """Rotina de onboarding para novos usuários"""
+    # Retries do frontend aguardam o pipeline em andamento em vez de iniciar outro
+    return await run_single_flight(f"onboarding:{user_id}", lambda: run_onboarding(user_id))
+
+async def run_onboarding(user_id: str) -> dict:
+    """Pipeline de onboarding: receitas iniciais, lista rápida, sugestões e tendências"""
     try:
         # Verifica se já completou onboarding
         user = await db.users.find_one({"id": user_id})
         if user and user.get('has_completed_onboarding', False):
             return {"message": "Onboarding já foi completado", "success": True}
         
-        llm_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not llm_key:
+        logger.info(f"Iniciando onboarding para usuário {user_id}")
+        
+        # Tendências não dependem de nada: começam imediatamente, em paralelo
+        trending_task = spawn_background_task(
+            generate_trending_suggestions(user_id), f"onboarding-trending-{user_id}"
+        )
+        
+        # 1. Receitas iniciais (etapa crítica): clonadas do pool pré-estimado;
+        # o LLM só é usado se o pool ainda não foi populado
+        starter_docs = await sample_starter_recipes(db)
+        if starter_docs:
+            created_recipes = await clone_starter_recipes(user_id, starter_docs)
+        elif llm_configured():
+            logger.warning("Pool de receitas iniciais vazio, gerando com LLM")
+            created_recipes = await generate_starter_recipes(user_id)
+        else:
             raise HTTPException(status_code=500, detail="LLM key not configured")
+        logger.info(f"Criadas {len(created_recipes)} receitas para onboarding")
         
-        logger.info(f"Iniciando onboarding para usuário {user_id}")
+        # 2. Sugestões "Com Seus Ingredientes" dependem apenas das receitas existirem
+        suggestions_task = spawn_background_task(
+            generate_ingredient_suggestions(user_id), f"onboarding-suggestions-{user_id}"
+        )
+        
+        # 3. Lista rápida a partir das receitas em memória (etapa crítica)
+        await add_recipes_to_quick_list(user_id, created_recipes, portions=4)
+        logger.info(f"Receitas adicionadas à lista rápida")
+        
+        # 4. Marca onboarding como completo assim que as etapas críticas terminam;
+        # sugestões e tendências continuam em background
+        await db.users.update_one(
+            {"id": user_id},
+            {"$set": {"has_completed_onboarding": True}}
+        )
+        
+        logger.info(
+            f"Onboarding completado para usuário {user_id} "
+            f"(sugestões pendentes: {not suggestions_task.done()}, tendências pendentes: {not trending_task.done()})"
+        )
+        
+        return {
+            "message": "Onboarding completado com sucesso",
+            "success": True,
+            "recipes_created": len(created_recipes)
+        }
         
-        # 1. Criar 3 receitas aleatórias com LLM
-        prompt = """Você é um chef experiente. Crie 3 receitas brasileiras populares e fáceis de fazer.
+    except Exception as e:
+        logger.error(f"Erro no onboarding: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro no onboarding: {str(e)}")
+
+def sanitize_llm_recipe(recipe_data: dict) -> dict:
+    """Valida e corrige uma receita gerada pelo LLM (ingredientes e campos obrigatórios)"""
+    # Valida e corrige ingredientes
+    if 'ingredients' in recipe_data and isinstance(recipe_data['ingredients'], list):
+        valid_ingredients = []
+        for ing in recipe_data['ingredients']:
+            if ing.get('quantity') is None or ing.get('quantity') == '':
+                ing['quantity'] = 1.0
+            else:
+                try:
+                    ing['quantity'] = float(ing['quantity'])
+                except (ValueError, TypeError):
+                    ing['quantity'] = 1.0
+            
+            if not ing.get('unit'):
+                ing['unit'] = 'unidade'
+            
+            if not isinstance(ing.get('mandatory'), bool):
+                ing['mandatory'] = True
+            
+            if ing.get('name'):
+                valid_ingredients.append(ing)
+        
+        recipe_data['ingredients'] = valid_ingredients
+    
+    # Garante campos obrigatórios
+    if not recipe_data.get('name'):
+        recipe_data['name'] = 'Receita'
+    if not recipe_data.get('portions') or recipe_data['portions'] <= 0:
+        recipe_data['portions'] = 4
+    if not recipe_data.get('notes'):
+        recipe_data['notes'] = ''
+    
+    return recipe_data
+
+async def generate_starter_recipes(user_id: str) -> List[Recipe]:
+    """Gera as 3 receitas iniciais com LLM e estima os valores em paralelo"""
+    prompt = """Você é um chef experiente. Crie 3 receitas brasileiras populares e fáceis de fazer.
 
 Retorne APENAS um array JSON válido, sem texto adicional. Cada receita deve ter:
 - name: nome da receita
@@ -1356,170 +1786,96 @@ Exemplo de formato:
 
 Escolha receitas variadas: uma com carne, uma vegetariana, e uma doce."""
 
-        chat = LlmChat(
-            api_key=llm_key,
-            session_id=f"onboarding-{user_id}-{uuid.uuid4()}",
-            system_message="Você é um chef brasileiro especialista. Retorne APENAS JSON válido."
-        ).with_model("openai", "gpt-4o")
-        
-        response = await chat.send_message(UserMessage(text=prompt))
-        
-        # Parse JSON
-        import json
-        import re
-        json_match = re.search(r'\[.*\]', response, re.DOTALL)
-        if not json_match:
-            logger.error(f"Could not find JSON array in LLM response: {response[:200]}")
-            raise HTTPException(status_code=500, detail="Failed to generate recipes")
-        
+    chat = create_llm_chat(
+        session_id=f"onboarding-{user_id}-{uuid.uuid4()}",
+        system_message="Você é um chef brasileiro especialista. Retorne APENAS JSON válido."
+    )
+    
+    response = await send_llm_message(chat, prompt, call_site="onboarding", user_id=user_id)
+    
+    # Parse JSON
+    json_match = re.search(r'\[.*\]', response, re.DOTALL)
+    if not json_match:
+        logger.error(f"Could not find JSON array in LLM response: {response[:200]}")
+        record_llm_parse("onboarding", False)
+        raise HTTPException(status_code=500, detail="Failed to generate recipes")
+    
+    try:
         recipes_data = json.loads(json_match.group(0))
-        
-        created_recipe_ids = []
-        
-        # Cria as 3 receitas no banco
-        for recipe_data in recipes_data[:3]:
-            # Valida e corrige ingredientes
-            if 'ingredients' in recipe_data and isinstance(recipe_data['ingredients'], list):
-                valid_ingredients = []
-                for ing in recipe_data['ingredients']:
-                    if ing.get('quantity') is None or ing.get('quantity') == '':
-                        ing['quantity'] = 1.0
-                    else:
-                        try:
-                            ing['quantity'] = float(ing['quantity'])
-                        except (ValueError, TypeError):
-                            ing['quantity'] = 1.0
-                    
-                    if not ing.get('unit'):
-                        ing['unit'] = 'unidade'
-                    
-                    if not isinstance(ing.get('mandatory'), bool):
-                        ing['mandatory'] = True
-                    
-                    if ing.get('name'):
-                        valid_ingredients.append(ing)
-                
-                recipe_data['ingredients'] = valid_ingredients
-            
-            # Garante campos obrigatórios
-            if not recipe_data.get('name'):
-                recipe_data['name'] = 'Receita'
-            if not recipe_data.get('portions') or recipe_data['portions'] <= 0:
-                recipe_data['portions'] = 4
-            if not recipe_data.get('notes'):
-                recipe_data['notes'] = ''
-            
-            recipe_dict = {
-                'id': str(uuid.uuid4()),
-                'user_id': user_id,
-                'name': recipe_data['name'],
-                'portions': recipe_data.get('portions', 4),
-                'ingredients': recipe_data.get('ingredients', []),
-                'notes': recipe_data.get('notes', ''),
-                'link': '',
-                'imagem_url': '',
-                'tempo_preparo': 0,
-                'calorias_por_porcao': 0,
-                'custo_estimado': 0,
-                'restricoes': [],
-                'created_at': datetime.now(timezone.utc),
-                'is_suggestion': False
-            }
-            
-            # Estima valores com LLM
-            recipe_dict = await estimate_recipe_values(recipe_dict)
-            
-            recipe = Recipe(**recipe_dict)
-            recipe_doc = recipe.model_dump()
-            recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
-            await db.recipes.insert_one(recipe_doc)
-            created_recipe_ids.append(recipe.id)
-        
-        logger.info(f"Criadas {len(created_recipe_ids)} receitas para onboarding")
-        
-        # 2. Adicionar todas as receitas à lista rápida
-        lists = await db.shopping_lists.find({"user_id": user_id}, {"_id": 0}).to_list(100)
-        quick_list = next((l for l in lists if l.get('is_quick_list', False)), None)
-        
-        if quick_list:
-            for recipe_id in created_recipe_ids:
-                # Adiciona receita à lista diretamente
-                original_recipe = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
-                if not original_recipe:
-                    continue
-                
-                # Calcula ingredientes ajustados
-                ratio = 4 / original_recipe['portions']
-                for ing in original_recipe['ingredients']:
-                    adjusted_qty = ing['quantity'] * ratio
-                    ingredient_name = ing['name']
-                    unit = ing['unit']
-                    
-                    # Verifica se já existe na lista
-                    existing_item = next(
-                        (item for item in quick_list['items'] if item['ingredient_name'].lower() == ingredient_name.lower() and item['unit'] == unit),
-                        None
-                    )
-                    
-                    if existing_item:
-                        # Atualiza quantidade
-                        existing_item['quantity'] += adjusted_qty
-                        if recipe_id not in existing_item.get('recipe_ids', []):
-                            existing_item['recipe_ids'].append(recipe_id)
-                        if original_recipe['name'] not in existing_item.get('recipe_names', []):
-                            existing_item['recipe_names'].append(original_recipe['name'])
-                    else:
-                        # Adiciona novo item
-                        new_item = {
-                            'id': str(uuid.uuid4()),
-                            'ingredient_name': ingredient_name,
-                            'quantity': adjusted_qty,
-                            'unit': unit,
-                            'bought': False,
-                            'recipe_ids': [recipe_id],
-                            'recipe_names': [original_recipe['name']]
-                        }
-                        quick_list['items'].append(new_item)
-            
-            # Atualiza a lista no banco
-            await db.shopping_lists.update_one(
-                {"id": quick_list['id']},
-                {"$set": {"items": quick_list['items']}}
-            )
-        
-        logger.info(f"Receitas adicionadas à lista rápida")
-        
-        # 3. Gerar sugestões "Com Seus Ingredientes"
-        try:
-            await generate_ingredient_suggestions(user_id)
-            logger.info(f"Sugestões de ingredientes geradas")
-        except Exception as e:
-            logger.error(f"Erro ao gerar sugestões de ingredientes: {str(e)}")
-        
-        # 4. Gerar sugestões "Tendências"
-        try:
-            await generate_trending_suggestions(user_id)
-            logger.info(f"Sugestões de tendências geradas")
-        except Exception as e:
-            logger.error(f"Erro ao gerar sugestões de tendências: {str(e)}")
-        
-        # 5. Marcar onboarding como completo
-        await db.users.update_one(
-            {"id": user_id},
-            {"$set": {"has_completed_onboarding": True}}
-        )
-        
-        logger.info(f"Onboarding completado para usuário {user_id}")
-        
-        return {
-            "message": "Onboarding completado com sucesso",
-            "success": True,
-            "recipes_created": len(created_recipe_ids)
+    except json.JSONDecodeError:
+        record_llm_parse("onboarding", False)
+        raise
+    record_llm_parse("onboarding", True)
+    
+    recipe_dicts = []
+    for recipe_data in recipes_data[:3]:
+        sanitize_llm_recipe(recipe_data)
+        
+        recipe_dict = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'name': recipe_data['name'],
+            'portions': recipe_data.get('portions', 4),
+            'ingredients': recipe_data.get('ingredients', []),
+            'notes': recipe_data.get('notes', ''),
+            'link': '',
+            'imagem_url': '',
+            'tempo_preparo': 0,
+            'calorias_por_porcao': 0,
+            'custo_estimado': 0,
+            'restricoes': [],
+            'created_at': datetime.now(timezone.utc),
+            'is_suggestion': False
         }
         
-    except Exception as e:
-        logger.error(f"Erro no onboarding: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro no onboarding: {str(e)}")
+        recipe_dicts.append(recipe_dict)
+    
+    # Estimativas independentes entre si: rodam concorrentemente
+    estimated = await asyncio.gather(*(estimate_recipe_values(d) for d in recipe_dicts))
+    
+    recipes = [Recipe(**recipe_dict) for recipe_dict in estimated]
+    recipe_docs = []
+    for recipe in recipes:
+        recipe_doc = recipe.model_dump()
+        recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
+        recipe_docs.append(recipe_doc)
+    
+    if recipe_docs:
+        await db.recipes.insert_many(recipe_docs)
+        await data_versions.bump(user_id, RECIPES)
+    return recipes
+
+async def clone_starter_recipes(user_id: str, starter_docs: List[dict]) -> List[Recipe]:
+    """Clona receitas do pool para o usuário com um único insert_many"""
+    recipes = [Recipe(**doc) for doc in clone_for_user(starter_docs, user_id)]
+    recipe_docs = []
+    for recipe in recipes:
+        recipe_doc = recipe.model_dump()
+        recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
+        recipe_docs.append(recipe_doc)
+    
+    await db.recipes.insert_many(recipe_docs)
+    await data_versions.bump(user_id, RECIPES)
+    return recipes
+
+async def add_recipes_to_quick_list(user_id: str, recipes: List[Recipe], portions: int):
+    """Adiciona receitas (já em memória) à lista rápida de um usuário novo com uma única escrita"""
+    new_items = []
+    for recipe in recipes:
+        new_items.extend(recipe_items(recipe.model_dump(), portions / recipe.portions))
+    
+    # Agrega entre as receitas novas e anexa de uma vez, sem reler a lista. A marca
+    # starter_items_added torna a escrita idempotente se o onboarding for repetido
+    aggregated_items = await aggregate_ingredients(new_items)
+    result = await db.shopping_lists.update_one(
+        {"user_id": user_id, "is_quick_list": True, "starter_items_added": {"$ne": True}},
+        {
+            "$push": {"items": {"$each": items_to_docs(aggregated_items)}},
+            "$set": {"starter_items_added": True},
+        }
+    )
+    if result.modified_count:
+        await data_versions.bump(user_id, SHOPPING_LISTS)
 
 @api_router.post("/recipes/{recipe_id}/copy")
 async def copy_recipe_to_my_recipes(recipe_id: str, user_id: str = Depends(get_current_user)):
@@ -1546,6 +1902,7 @@ async def copy_recipe_to_my_recipes(recipe_id: str, user_id: str = Depends(get_c
     recipe_doc = new_recipe.model_dump()
     recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
     await db.recipes.insert_one(recipe_doc)
+    await data_versions.bump(user_id, RECIPES)
     
     return {"message": "Receita adicionada às suas receitas", "recipe_id": new_recipe.id}
 
@@ -1561,64 +1918,23 @@ class WebRecipeResult(BaseModel):
 class WebRecipeImportRequest(BaseModel):
     url: str
 
+class WebRecipeBulkImportRequest(BaseModel):
+    urls: List[str]
+    persist: bool = False  # True salva direto como receitas do usuário
+
 async def scrape_tudogostoso_search(query: str) -> List[WebRecipeResult]:
     """Faz scraping da página de busca do TudoGostoso"""
-    import cloudscraper
-    from bs4 import BeautifulSoup
-    from urllib.parse import quote
-    
+    prefetcher.shed_if_loaded()
     try:
-        encoded_query = quote(query)
-        search_url = f"https://www.tudogostoso.com.br/busca?q={encoded_query}"
-        
-        logger.info(f"Buscando receitas em: {search_url}")
+        url = search_url(query)
         
-        # Create cloudscraper session to bypass Cloudflare
-        scraper = cloudscraper.create_scraper()
+        logger.info(f"Buscando receitas em: {url}")
         
-        response = scraper.get(search_url, timeout=20)
+        # Executado no pool do fetcher, com sessão já aquecida contra o Cloudflare
+        response = await fetcher.get(url)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        results = []
-        # Busca por links de receitas
-        recipe_links = soup.find_all('a', href=re.compile(r'/receita/\d+-'))
-        
-        seen_urls = set()
-        for link in recipe_links[:5]:  # Limita a 5 resultados
-            recipe_url = link.get('href', '')
-            if not recipe_url.startswith('http'):
-                recipe_url = f"https://www.tudogostoso.com.br{recipe_url}"
-            
-            # Evita duplicatas
-            if recipe_url in seen_urls:
-                continue
-            seen_urls.add(recipe_url)
-            
-            # Extrai nome
-            name = link.get_text(strip=True)
-            if not name:
-                continue
-            
-            # Busca imagem próxima ao link
-            img = link.find('img')
-            if not img:
-                parent = link.find_parent()
-                if parent:
-                    img = parent.find('img')
-            
-            image_url = ''
-            if img:
-                image_url = img.get('src', '') or img.get('data-src', '')
-                if image_url and not image_url.startswith('http'):
-                    image_url = f"https:{image_url}" if image_url.startswith('//') else f"https://www.tudogostoso.com.br{image_url}"
-            
-            results.append(WebRecipeResult(
-                name=name,
-                url=recipe_url,
-                image_url=image_url
-            ))
+        results = [WebRecipeResult(**result) for result in parse_search_results(response.content)]
         
         logger.info(f"Encontradas {len(results)} receitas")
         return results
@@ -1646,90 +1962,33 @@ async def scrape_tudogostoso_search(query: str) -> List[WebRecipeResult]:
         ]
         return mock_results
 
+async def fetch_web_recipe(url: str) -> dict:
+    """Receita de uma URL canônica, pelo catálogo global ou baixando e processando a página"""
+    # Receitas já importadas por qualquer usuário saem do catálogo global
+    entry = await web_catalog.get(url)
+    if entry:
+        return catalog_recipe(entry)
+    
+    logger.info(f"Importando receita de: {url}")
+    
+    # Executado no pool do fetcher, com sessão já aquecida contra o Cloudflare
+    response = await fetcher.get(url)
+    response.raise_for_status()
+    
+    result = parse_recipe_page(response.content, url)
+    await web_catalog.save(url, result)
+    
+    logger.info(f"Receita importada: {result['name']}, {len(result['ingredients'])} ingredientes")
+    return result
+
 async def scrape_tudogostoso_recipe(url: str) -> dict:
     """Faz scraping detalhado de uma receita do TudoGostoso"""
-    import cloudscraper
-    from bs4 import BeautifulSoup
-    
+    url = canonical_recipe_url(url)
     try:
-        logger.info(f"Importando receita de: {url}")
-        
-        # Create cloudscraper session to bypass Cloudflare
-        scraper = cloudscraper.create_scraper()
-        
-        response = scraper.get(url, timeout=20)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extrai nome
-        name = ''
-        h1 = soup.find('h1')
-        if h1:
-            name = h1.get_text(strip=True)
-        
-        # Extrai ingredientes
-        ingredients = []
-        ingredient_sections = soup.find_all(['li', 'div'], class_=re.compile(r'ingredient|item'))
-        
-        for ing_elem in ingredient_sections:
-            text = ing_elem.get_text(strip=True)
-            if text and len(text) > 2:
-                # Tenta parsear quantidade e nome
-                match = re.match(r'([0-9.,/]+)\s*([a-zá-úã-ü]+)?\s+(?:de\s+)?(.+)', text, re.IGNORECASE)
-                if match:
-                    quantity = match.group(1).replace(',', '.')
-                    unit = match.group(2) or 'unidade'
-                    ing_name = match.group(3)
-                    
-                    try:
-                        qty = float(quantity) if '/' not in quantity else eval(quantity)
-                    except:
-                        qty = 1.0
-                    
-                    ingredients.append({
-                        'name': ing_name.strip(),
-                        'quantity': qty,
-                        'unit': unit.strip(),
-                        'mandatory': True
-                    })
-                else:
-                    # Se não conseguir parsear, adiciona como texto simples
-                    ingredients.append({
-                        'name': text,
-                        'quantity': 1.0,
-                        'unit': 'unidade',
-                        'mandatory': True
-                    })
-        
-        # Extrai modo de preparo
-        preparation_steps = []
-        steps = soup.find_all(['li', 'p'], class_=re.compile(r'step|modo|preparo|instruction'))
-        for step in steps:
-            text = step.get_text(strip=True)
-            if text and len(text) > 10:
-                preparation_steps.append(text)
-        
-        notes = '\n'.join(preparation_steps) if preparation_steps else ''
-        
-        # Tenta extrair porções
-        portions = 4  # Default
-        portions_text = soup.find(string=re.compile(r'(\d+)\s*porç[õo]es?', re.IGNORECASE))
-        if portions_text:
-            match = re.search(r'(\d+)', portions_text)
-            if match:
-                portions = int(match.group(1))
-        
-        result = {
-            'name': name or 'Receita Importada',
-            'portions': portions,
-            'link': url,
-            'notes': notes,
-            'ingredients': ingredients[:15]  # Limita a 15 ingredientes
-        }
-        
-        logger.info(f"Receita importada: {name}, {len(ingredients)} ingredientes")
-        return result
+        # Receita sendo pré-buscada: espera e aproveita o resultado no catálogo
+        await prefetcher.wait(url)
+        prefetcher.shed_if_loaded()
+        return await fetch_web_recipe(url)
         
     except Exception as e:
         logger.error(f"Erro ao importar receita: {str(e)}")
@@ -1767,23 +2026,135 @@ async def scrape_tudogostoso_recipe(url: str) -> dict:
         return mock_result
 
 @api_router.post("/recipes/search-web")
-async def search_recipes_web(data: WebRecipeSearchRequest, user_id: str = Depends(get_current_user)):
+async def search_recipes_web(data: WebRecipeSearchRequest, tasks: BackgroundTasks, user_id: str = Depends(rate_limited("scrape"))):
     """Busca receitas no TudoGostoso.com.br"""
     if not data.query or len(data.query) < 2:
         raise HTTPException(status_code=400, detail="Query muito curta")
     
     results = await scrape_tudogostoso_search(data.query)
+    # Depois da resposta: pré-busca das primeiras receitas, que o usuário costuma abrir
+    tasks.add_task(prefetcher.schedule, [canonical_recipe_url(r.url) for r in results])
     return {"recipes": results}
 
 @api_router.post("/recipes/import-from-tudogostoso")
-async def import_recipe_from_tudogostoso(data: WebRecipeImportRequest, user_id: str = Depends(get_current_user)):
+async def import_recipe_from_tudogostoso(data: WebRecipeImportRequest, user_id: str = Depends(rate_limited("scrape"))):
     """Importa uma receita completa do TudoGostoso"""
-    if not data.url or 'tudogostoso.com.br' not in data.url:
+    if not data.url or not is_tudogostoso_url(canonical_recipe_url(data.url)):
         raise HTTPException(status_code=400, detail="URL inválida")
     
     recipe_data = await scrape_tudogostoso_recipe(data.url)
     return recipe_data
 
+BULK_IMPORT_MAX_URLS = int(os.environ.get('BULK_IMPORT_MAX_URLS', '50'))
+BULK_IMPORT_CONCURRENCY = int(os.environ.get('BULK_IMPORT_CONCURRENCY', '4'))
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', '10'))
+
+def ndjson_line(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str) + "\n"
+
+async def persist_imported_recipes(user_id: str, batch: List[tuple]) -> List[Recipe]:
+    """Estima (concorrentemente) e salva um lote de receitas importadas com um único insert_many"""
+    recipe_dicts = [{**RecipeCreate(**recipe_data).model_dump(), 'user_id': user_id} for _, recipe_data in batch]
+    estimated = await asyncio.gather(*(estimate_recipe_values(d) for d in recipe_dicts))
+    
+    recipes = [Recipe(**recipe_dict) for recipe_dict in estimated]
+    recipe_docs = []
+    for recipe in recipes:
+        recipe_doc = recipe.model_dump()
+        recipe_doc['created_at'] = recipe_doc['created_at'].isoformat()
+        recipe_docs.append(recipe_doc)
+    await db.recipes.insert_many(recipe_docs)
+    await data_versions.bump(user_id, RECIPES)
+    
+    # Estimativas ficam no catálogo para as próximas importações da mesma URL
+    await asyncio.gather(*(
+        web_catalog.set_estimates(url, recipe.model_dump()) for (url, _), recipe in zip(batch, recipes)
+    ))
+    return recipes
+
+async def bulk_import_stream(user_id: str, urls: List[str], persist: bool):
+    """Gera uma linha NDJSON por URL, na ordem em que cada importação termina"""
+    semaphore = asyncio.Semaphore(BULK_IMPORT_CONCURRENCY)
+    
+    async def import_one(url: str):
+        async with semaphore:
+            try:
+                return url, await fetch_web_recipe(url), None
+            except Exception as e:
+                return url, None, str(e)
+    
+    # Deduplica por URL canônica, preservando a ordem; só o host do TudoGostoso vai para o catálogo
+    canonical_urls = {}
+    for url in urls:
+        canonical = canonical_recipe_url(url)
+        if not is_tudogostoso_url(canonical):
+            yield ndjson_line({"url": url, "status": "error", "error": "URL inválida"})
+            continue
+        if canonical in canonical_urls:
+            yield ndjson_line({"url": url, "status": "duplicate", "canonical_url": canonical})
+            continue
+        # Cada URL baixada consome um token de scrape, como uma importação individual
+        retry_after = rate_limiter.check("scrape", user_id)
+        if retry_after:
+            yield ndjson_line({"url": url, "status": "rate_limited", "retry_after": math.ceil(retry_after)})
+            continue
+        canonical_urls[canonical] = url
+    
+    async def flush(batch: List[tuple]) -> List[str]:
+        try:
+            recipes = await persist_imported_recipes(user_id, batch)
+        except Exception as e:
+            logger.error(f"Erro ao salvar lote da importação em massa: {str(e)}")
+            return [ndjson_line({"url": url, "status": "error", "error": str(e)}) for url, _ in batch]
+        return [
+            ndjson_line({"url": url, "status": "saved", "recipe": recipe.model_dump(mode="json")})
+            for (url, _), recipe in zip(batch, recipes)
+        ]
+    
+    tasks = [asyncio.create_task(import_one(url)) for url in canonical_urls]
+    batch = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            url, recipe_data, error = await next_done
+            if error:
+                yield ndjson_line({"url": url, "status": "error", "error": error})
+            elif not persist:
+                yield ndjson_line({"url": url, "status": "ok", "recipe": recipe_data})
+            else:
+                batch.append((url, recipe_data))
+                if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+                    for line in await flush(batch):
+                        yield line
+                    batch = []
+        if batch:
+            for line in await flush(batch):
+                yield line
+    finally:
+        # Cliente desconectado: não continua baixando o resto
+        for task in tasks:
+            task.cancel()
+
+@api_router.post("/recipes/import-from-tudogostoso/bulk")
+async def bulk_import_recipes_from_tudogostoso(data: WebRecipeBulkImportRequest, user_id: str = Depends(get_current_user)):
+    """Importa várias receitas do TudoGostoso, transmitindo o resultado de cada URL em NDJSON
+
+    O limite de scrape é cobrado por URL em bulk_import_stream.
+    """
+    if not data.urls:
+        raise HTTPException(status_code=400, detail="Nenhuma URL informada")
+    if len(data.urls) > BULK_IMPORT_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BULK_IMPORT_MAX_URLS} URLs por importação")
+    
+    return StreamingResponse(
+        bulk_import_stream(user_id, data.urls, data.persist),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Métricas no formato Prometheus"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Include router
 app.include_router(api_router)
 
@@ -1801,6 +2172,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    await db.llm_usage_daily.create_index([("user_id", 1), ("date", 1)], unique=True)
+    await single_flight.ensure_indexes()
+    await db.starter_recipes.create_index("category")
+    await web_catalog.ensure_indexes()
+    await db.recipes.create_index([("user_id", 1), ("ingredients.ingredient_id", 1)])
+
+@app.on_event("startup")
+async def warm_fetcher():
+    spawn_background_task(
+        fetcher.warm(int(os.environ.get('FETCHER_WARM_SESSIONS', '2'))),
+        name="fetcher-warm"
+    )
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    prefetcher.cancel_all()
+    fetcher.close()
+    password_hasher.close()
     client.close()
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Representação interna dos itens de lista de compras.
+
+As rotas que alteram listas (adicionar receita, adicionar item, agregação)
+trabalham com ListItem, uma classe com __slots__ que é lida e escrita
+diretamente nos dicionários do MongoDB. O modelo Pydantic ShoppingItem fica
+só na fronteira da API (respostas), sem validar e serializar a lista inteira
+a cada alteração.
+"""
+import uuid
+from typing import List, Optional
+
+from ingredients import ingredient_id
+
+
+class ListItem:
+    __slots__ = ("id", "ingredient_name", "quantity", "unit", "bought",
+                 "recipe_ids", "recipe_names", "ingredient_id", "merged_from", "keep_separate")
+
+    def __init__(self, ingredient_name: str, quantity: float, unit: str, bought: bool = False,
+                 recipe_ids: Optional[List[str]] = None, recipe_names: Optional[List[str]] = None,
+                 id: Optional[str] = None, merged_from: Optional[List[dict]] = None,
+                 keep_separate: bool = False):
+        self.id = id or str(uuid.uuid4())
+        self.ingredient_name = ingredient_name
+        self.quantity = float(quantity)
+        self.unit = unit
+        self.bought = bought
+        self.recipe_ids = recipe_ids if recipe_ids is not None else []
+        self.recipe_names = recipe_names if recipe_names is not None else []
+        # Sempre derivado do nome, como no validador de ShoppingItem (memoizado)
+        self.ingredient_id = ingredient_id(ingredient_name)
+        # Itens parecidos mesclados automaticamente neste (ver fuzzy_match.py)
+        self.merged_from = merged_from if merged_from is not None else []
+        # Item separado pelo usuário de uma mesclagem: não é mesclado de novo
+        self.keep_separate = keep_separate
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "ListItem":
+        return cls(
+            doc['ingredient_name'],
+            doc['quantity'],
+            doc['unit'],
+            doc.get('bought', False),
+            list(doc.get('recipe_ids', [])),
+            list(doc.get('recipe_names', [])),
+            doc.get('id'),
+            list(doc.get('merged_from', [])),
+            doc.get('keep_separate', False),
+        )
+
+    def to_doc(self) -> dict:
+        """Documento no mesmo formato de ShoppingItem.model_dump()"""
+        return {
+            'id': self.id,
+            'ingredient_name': self.ingredient_name,
+            'quantity': self.quantity,
+            'unit': self.unit,
+            'bought': self.bought,
+            'recipe_ids': self.recipe_ids,
+            'recipe_names': self.recipe_names,
+            'ingredient_id': self.ingredient_id,
+            'merged_from': self.merged_from,
+            'keep_separate': self.keep_separate,
+        }
+
+
+def items_from_docs(docs: List[dict]) -> List[ListItem]:
+    return [ListItem.from_doc(doc) for doc in docs]
+
+
+def items_to_docs(items: List[ListItem]) -> List[dict]:
+    return [item.to_doc() for item in items]
+
+
+def recipe_items(recipe: dict, portion_multiplier: float) -> List[ListItem]:
+    """Ingredientes de uma receita como itens de lista, escalados pelas porções"""
+    recipe_id = recipe['id']
+    recipe_name = recipe['name']
+    return [
+        ListItem(ing['name'], ing['quantity'] * portion_multiplier, ing['unit'],
+                 recipe_ids=[recipe_id], recipe_names=[recipe_name])
+        for ing in recipe['ingredients']
+    ]
@@ -0,0 +1,185 @@
+"""
+Coalescência single-flight por (usuário, operação).
+
+Requisições concorrentes com a mesma chave compartilham uma única execução do
+pipeline e o mesmo resultado. Dentro do processo isso é feito com um Future
+compartilhado; entre workers, com um lease no Mongo (coleção
+singleflight_leases, índice TTL em expires_at). O worker dono do lease
+executa o pipeline e grava o resultado (ou a falha) no documento; os demais
+fazem polling até o resultado aparecer ou o lease expirar.
+
+O resultado só é reaproveitado por quem chegou enquanto a execução estava em
+andamento: cada execução tem um run_id, e uma chamada nova que encontra um
+documento já concluído assume o lease e roda o pipeline de novo. Se a execução
+líder falha ou é cancelada, os seguidores recebem SingleFlightError em vez de
+repetir o trabalho.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(Exception):
+    """Tempo máximo de espera por uma execução de outro worker excedido"""
+
+
+class SingleFlightError(Exception):
+    """A execução líder aguardada falhou ou foi cancelada"""
+
+
+class SingleFlight:
+    def __init__(
+        self,
+        collection,
+        lease_ttl: float = 180.0,
+        result_ttl: float = 15.0,  # janela para seguidores em polling lerem o resultado/falha
+        poll_interval: float = 0.5,
+        max_wait: Optional[float] = None,
+    ):
+        self.collection = collection
+        self.lease_ttl = lease_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait if max_wait is not None else lease_ttl * 2
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ) -> Any:
+        """Executa fn uma única vez por chave entre requisições concorrentes"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            logger.info(f"Single-flight: aguardando execução local de {key}")
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._run_with_lease(key, fn, encode, decode)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Seguidores locais recebem a falha; cancelar o Future os cancelaria como se fossem eles
+            future.set_exception(SingleFlightError(f"Execução de {key} cancelada"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando não há seguidores
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run_with_lease(self, key, fn, encode, decode):
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        waiting_for = None  # run_id da execução em andamento que este chamador acompanha
+
+        while True:
+            run_id = await self._acquire(key, waiting_for)
+            if run_id is not None:
+                return await self._lead(key, run_id, fn, encode)
+
+            lease = await self.collection.find_one({"_id": key})
+            if lease is None:
+                if waiting_for is not None:
+                    raise SingleFlightError(f"Execução de {key} terminou sem publicar resultado")
+                continue  # lease liberado entre as duas operações, tenta de novo
+
+            status = lease.get("status")
+            if status == "running":
+                waiting_for = lease.get("run_id")
+            elif lease.get("run_id") == waiting_for:
+                if status == "failed":
+                    raise SingleFlightError(lease.get("error") or f"Execução de {key} falhou")
+                logger.info(f"Single-flight: reutilizando resultado de {key}")
+                return decode(lease.get("result"))
+            else:
+                continue  # resultado de uma execução anterior a esta chamada: assume o lease
+
+            if asyncio.get_running_loop().time() > deadline:
+                raise SingleFlightTimeout(f"Timeout aguardando {key}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _acquire(self, key: str, waiting_for: Optional[str]) -> Optional[str]:
+        """Tenta assumir o lease; devolve o run_id da nova execução ou None"""
+        now = datetime.now(timezone.utc)
+        lease = {
+            "owner": self.owner,
+            "run_id": uuid.uuid4().hex,
+            "status": "running",
+            "expires_at": now + timedelta(seconds=self.lease_ttl),
+            "started_at": now,
+        }
+        try:
+            await self.collection.insert_one({"_id": key, **lease})
+            return lease["run_id"]
+        except DuplicateKeyError:
+            pass
+
+        # Lease expirado (dono morreu) ou execução concluída que este chamador não acompanhou
+        taken = await self.collection.find_one_and_update(
+            {"_id": key, "$or": [
+                {"expires_at": {"$lt": now}},
+                {"status": {"$in": ["done", "failed"]}, "run_id": {"$ne": waiting_for}},
+            ]},
+            {"$set": lease, "$unset": {"result": "", "error": ""}},
+        )
+        return lease["run_id"] if taken is not None else None
+
+    async def _lead(self, key, run_id, fn, encode):
+        heartbeat = asyncio.create_task(self._heartbeat(key, run_id))
+        try:
+            result = await fn()
+        except BaseException as e:
+            heartbeat.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                error = f"Execução de {key} cancelada"
+            else:
+                error = str(e) or type(e).__name__
+            try:
+                await asyncio.shield(self._finish(key, run_id, {"status": "failed", "error": error}))
+            except Exception as publish_error:
+                logger.error(f"Single-flight: erro ao publicar falha de {key}: {str(publish_error)}")
+            raise
+
+        heartbeat.cancel()
+        try:
+            await self._finish(key, run_id, {"status": "done", "result": encode(result)})
+        except Exception as e:
+            logger.error(f"Single-flight: erro ao publicar resultado de {key}: {str(e)}")
+            await self.collection.delete_one({"_id": key, "run_id": run_id})
+        return result
+
+    async def _finish(self, key: str, run_id: str, fields: Dict[str, Any]):
+        """Publica o desfecho da execução para os seguidores em polling"""
+        fields["expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=self.result_ttl)
+        await self.collection.update_one({"_id": key, "run_id": run_id}, {"$set": fields})
+
+    async def _heartbeat(self, key: str, run_id: str):
+        """Renova o lease enquanto o pipeline estiver rodando"""
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self.collection.update_one(
+                    {"_id": key, "run_id": run_id, "status": "running"},
+                    {"$set": {"expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease_ttl)}},
+                )
+            except Exception as e:
+                logger.warning(f"Single-flight: erro ao renovar lease de {key}: {str(e)}")
@@ -0,0 +1,65 @@
+"""
+Pool global de receitas iniciais (coleção starter_recipes), já estimadas,
+usado no onboarding em vez de gerar receitas com LLM para cada usuário novo.
+O pool é renovado offline pelo script refresh_starter_pack.py.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+# Uma receita de cada categoria por usuário: uma com carne, uma vegetariana e uma doce
+STARTER_CATEGORIES = ("carne", "vegetariana", "doce")
+
+# Campos copiados do pool para a receita do usuário
+STARTER_FIELDS = (
+    "name", "portions", "link", "notes", "ingredients", "tempo_preparo",
+    "calorias_por_porcao", "custo_estimado", "restricoes", "imagem_url",
+)
+
+
+async def sample_starter_recipes(db) -> List[dict]:
+    """Sorteia uma receita por categoria, com as categorias consultadas em paralelo"""
+    async def sample(category: str) -> List[dict]:
+        # $match antes do $sample usa o índice de category em vez de varrer o pool
+        pipeline = [
+            {"$match": {"category": category}},
+            {"$sample": {"size": 1}},
+            {"$project": {"_id": 0}},
+        ]
+        return await db.starter_recipes.aggregate(pipeline).to_list(1)
+
+    sampled = await asyncio.gather(*(sample(category) for category in STARTER_CATEGORIES))
+    return [doc for docs in sampled for doc in docs]
+
+
+def clone_for_user(starter_docs: List[dict], user_id: str) -> List[dict]:
+    """Cria cópias das receitas do pool como receitas do usuário"""
+    now = datetime.now(timezone.utc)
+    clones = []
+    for doc in starter_docs:
+        clone = {field: doc[field] for field in STARTER_FIELDS if field in doc}
+        clone.update({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "is_suggestion": False,
+            "suggestion_type": "",
+            "created_at": now,
+        })
+        clones.append(clone)
+    return clones
+
+
+async def replace_starter_pool(db, category: str, recipes: List[dict]) -> int:
+    """Substitui as receitas de uma categoria do pool pelas recém geradas"""
+    if not recipes:
+        return 0
+    refreshed_at = datetime.now(timezone.utc).isoformat()
+    docs = [
+        {**{field: recipe[field] for field in STARTER_FIELDS if field in recipe},
+         "id": str(uuid.uuid4()), "category": category, "refreshed_at": refreshed_at}
+        for recipe in recipes
+    ]
+    await db.starter_recipes.insert_many(docs)
+    await db.starter_recipes.delete_many({"category": category, "refreshed_at": {"$ne": refreshed_at}})
+    return len(docs)
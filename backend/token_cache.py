@@ -0,0 +1,68 @@
+"""
+Cache de tokens JWT já verificados.
+
+get_current_user roda em toda requisição autenticada; com o cache, um token
+visto recentemente é resolvido por um acesso a dicionário, sem verificar a
+assinatura nem decodificar as claims de novo. A chave é um digest do token
+(o token em si não fica em memória) e cada entrada expira no `exp` do token
+ou após max_age, o que vier primeiro. O max_age limita por quanto tempo um
+worker continua aceitando um token revogado por outro worker.
+"""
+import hashlib
+import time
+from typing import NamedTuple, Optional
+
+from cachetools import TLRUCache
+
+from result_cache import CACHE_HIT_RATIO, CACHE_REQUESTS, CACHE_SIZE
+
+
+class VerifiedToken(NamedTuple):
+    user_id: str
+    issued_at: float   # epoch
+    expires_at: float  # epoch
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+
+
+class VerifiedTokenCache:
+    def __init__(self, maxsize: int = 10000, max_age: float = 300.0, name: str = "verified_tokens"):
+        self.name = name
+        self.max_age = max_age
+        self._cache = TLRUCache(maxsize=maxsize, ttu=self._time_to_use, timer=time.time)
+        self.hits = 0
+        self.misses = 0
+        CACHE_HIT_RATIO.labels(name).set_function(lambda: self.hit_ratio)
+        CACHE_SIZE.labels(name).set_function(lambda: len(self._cache))
+
+    def _time_to_use(self, key: bytes, value: VerifiedToken, now: float) -> float:
+        return min(value.expires_at, now + self.max_age)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, token: str) -> Optional[VerifiedToken]:
+        entry = self._cache.get(token_digest(token))
+        if entry is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(self.name, "miss").inc()
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.labels(self.name, "hit").inc()
+        return entry
+
+    def set(self, token: str, entry: VerifiedToken):
+        self._cache[token_digest(token)] = entry
+
+    def revoke_user(self, user_id: str, before: Optional[float] = None):
+        """Remove do cache os tokens do usuário emitidos antes de `before` (padrão: agora)"""
+        before = time.time() if before is None else before
+        revoked = [key for key, entry in list(self._cache.items())
+                   if entry.user_id == user_id and entry.issued_at < before]
+        for key in revoked:
+            self._cache.pop(key, None)
+        return len(revoked)
@@ -0,0 +1,267 @@
+"""
+Extração de dados das páginas do TudoGostoso.
+
+Funções puras sobre o HTML já baixado, separadas do download para que o
+catálogo web_recipes possa ser reprocessado a partir do cache HTTP quando o
+parser mudar. Qualquer mudança no resultado de parse_recipe_page deve
+incrementar PARSER_VERSION.
+
+A receita é lida primeiro dos dados schema.org (application/ld+json), que
+são localizados por regex sem montar a árvore do documento. Só quando a
+página não tem um Recipe em JSON-LD o HTML é parseado com lxml e consultado
+com XPaths restritos às seções de ingredientes e modo de preparo.
+"""
+import html as html_entities
+import json
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import quote, urlsplit, urlunsplit
+
+import lxml.html
+
+from recipe_parser import DEFAULT_PORTIONS, parse_ingredient
+
+BASE_URL = "https://www.tudogostoso.com.br"
+PARSER_VERSION = 2
+
+MAX_INGREDIENTS = 15
+
+JSON_LD_PATTERN = re.compile(
+    rb'<script[^>]*type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.DOTALL | re.IGNORECASE,
+)
+PORTIONS_PATTERN = re.compile(r'(\d+)\s*(?:porç[õo]es?|pessoas|fatias|unidades|pedaços)?', re.IGNORECASE)
+PORTIONS_TEXT_PATTERN = re.compile(r'(\d+)\s*porç[õo]es?', re.IGNORECASE)
+ISO_DURATION_PATTERN = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?)?$')
+
+# Fallback sem JSON-LD: só elementos dentro das seções de ingredientes e preparo
+INGREDIENT_XPATH = (
+    "//*[contains(@class, 'ingredient') or contains(@id, 'ingredient')]//li"
+    " | //li[contains(@class, 'ingredient')]"
+)
+STEP_XPATH = (
+    "//*[contains(@class, 'preparo') or contains(@id, 'preparo')"
+    " or contains(@class, 'instruction') or contains(@class, 'direction')]//*[self::li or self::p]"
+    " | //li[contains(@class, 'step')]"
+)
+SEARCH_LINK_XPATH = "//a[contains(@href, '/receita/')]"
+RECIPE_LINK_PATTERN = re.compile(r'/receita/\d+-')
+
+
+def search_url(query: str) -> str:
+    return f"{BASE_URL}/busca?q={quote(query)}"
+
+
+def canonical_recipe_url(url: str) -> str:
+    """URL canônica da receita: https, host www, sem usuário, porta, query, fragmento ou barra final"""
+    parts = urlsplit(url.strip())
+    host = parts.hostname or ""
+    if host in ("tudogostoso.com.br", "m.tudogostoso.com.br"):
+        host = "www.tudogostoso.com.br"
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(("https", host, path, "", ""))
+
+
+def is_tudogostoso_url(url: str) -> bool:
+    """URL http(s) cujo host é o TudoGostoso ou um subdomínio dele"""
+    parts = urlsplit(url.strip())
+    host = parts.hostname or ""
+    return parts.scheme in ("http", "https") and (
+        host == "tudogostoso.com.br" or host.endswith(".tudogostoso.com.br")
+    )
+
+
+def _absolute_url(url: str) -> str:
+    if not url or url.startswith('http'):
+        return url
+    return f"https:{url}" if url.startswith('//') else f"{BASE_URL}{url}"
+
+
+def _clean_text(text: str) -> str:
+    return ' '.join(html_entities.unescape(text).split())
+
+
+def parse_search_results(html: bytes, limit: int = 5) -> List[dict]:
+    """Extrai nome, URL e imagem dos resultados de uma página de busca"""
+    tree = lxml.html.fromstring(html)
+
+    results = []
+    seen_urls = set()
+    for link in tree.xpath(SEARCH_LINK_XPATH):
+        recipe_url = link.get('href', '')
+        if not RECIPE_LINK_PATTERN.search(recipe_url):
+            continue
+        recipe_url = _absolute_url(recipe_url)
+
+        # Evita duplicatas
+        if recipe_url in seen_urls:
+            continue
+        seen_urls.add(recipe_url)
+
+        name = _clean_text(link.text_content())
+        if not name:
+            continue
+
+        # Busca imagem no link ou no elemento pai
+        images = link.xpath('.//img') or (link.getparent().xpath('.//img') if link.getparent() is not None else [])
+        image_url = ''
+        if images:
+            image_url = _absolute_url(images[0].get('src', '') or images[0].get('data-src', ''))
+
+        results.append({'name': name, 'url': recipe_url, 'image_url': image_url})
+        if len(results) >= limit:
+            break
+
+    return results
+
+
+def _find_recipe_object(data) -> Optional[dict]:
+    """Procura um objeto @type Recipe em listas e @graph do JSON-LD"""
+    if isinstance(data, list):
+        for item in data:
+            found = _find_recipe_object(item)
+            if found:
+                return found
+        return None
+    if not isinstance(data, dict):
+        return None
+    types = data.get('@type')
+    if types == 'Recipe' or (isinstance(types, list) and 'Recipe' in types):
+        return data
+    if '@graph' in data:
+        return _find_recipe_object(data['@graph'])
+    return None
+
+
+def extract_json_ld_recipe(html: bytes) -> Optional[dict]:
+    for match in JSON_LD_PATTERN.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        recipe = _find_recipe_object(data)
+        if recipe:
+            return recipe
+    return None
+
+
+def _instruction_texts(instructions) -> Iterable[str]:
+    """Achata recipeInstructions (texto, HowToStep, HowToSection) em passos"""
+    if isinstance(instructions, str):
+        for line in re.split(r'\n+|(?<=\.)\s+(?=\d+[.)]\s)', instructions):
+            yield line
+    elif isinstance(instructions, list):
+        for item in instructions:
+            yield from _instruction_texts(item)
+    elif isinstance(instructions, dict):
+        if 'itemListElement' in instructions:
+            yield from _instruction_texts(instructions['itemListElement'])
+        else:
+            yield instructions.get('text') or instructions.get('name') or ''
+
+
+def _parse_yield(recipe_yield) -> Optional[int]:
+    if isinstance(recipe_yield, list):
+        for item in recipe_yield:
+            portions = _parse_yield(item)
+            if portions:
+                return portions
+        return None
+    if isinstance(recipe_yield, (int, float)):
+        return int(recipe_yield) or None
+    match = PORTIONS_PATTERN.search(str(recipe_yield or ''))
+    return int(match.group(1)) if match and int(match.group(1)) > 0 else None
+
+
+def _parse_duration_minutes(duration) -> int:
+    """Converte durações ISO 8601 ("PT1H30M") em minutos"""
+    match = ISO_DURATION_PATTERN.match(str(duration or '').strip())
+    if not match:
+        return 0
+    days, hours, minutes = (int(value or 0) for value in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+def _format_notes(steps: List[str]) -> str:
+    if not steps:
+        return ''
+    return 'Modo de Preparo:\n' + '\n'.join(f"{i}. {step}" for i, step in enumerate(steps, 1))
+
+
+def _parse_ingredients(lines: Iterable[str]) -> List[dict]:
+    ingredients = []
+    for line in lines:
+        ingredient = parse_ingredient(_clean_text(line))
+        if ingredient:
+            ingredients.append(ingredient)
+            if len(ingredients) >= MAX_INGREDIENTS:
+                break
+    return ingredients
+
+
+def _recipe_from_json_ld(data: dict, url: str) -> dict:
+    steps = [_clean_text(step) for step in _instruction_texts(data.get('recipeInstructions'))]
+    steps = [re.sub(r'^\d+\s*[.)-]\s*', '', step) for step in steps if step]
+
+    image = data.get('image')
+    if isinstance(image, list):
+        image = image[0] if image else ''
+    if isinstance(image, dict):
+        image = image.get('url', '')
+
+    recipe = {
+        'name': _clean_text(data.get('name') or '') or 'Receita Importada',
+        'portions': _parse_yield(data.get('recipeYield')) or DEFAULT_PORTIONS,
+        'link': url,
+        'notes': _format_notes(steps),
+        'ingredients': _parse_ingredients(data.get('recipeIngredient') or []),
+    }
+    minutes = _parse_duration_minutes(data.get('totalTime') or data.get('cookTime'))
+    if minutes:
+        recipe['tempo_preparo'] = minutes
+    if image:
+        recipe['imagem_url'] = _absolute_url(str(image))
+    return recipe
+
+
+def _unique_texts(elements) -> List[str]:
+    """Textos em ordem, sem repetições (XPaths aninhados podem casar o mesmo trecho)"""
+    seen = set()
+    texts = []
+    for element in elements:
+        text = _clean_text(element.text_content())
+        if text and text not in seen:
+            seen.add(text)
+            texts.append(text)
+    return texts
+
+
+def _recipe_from_html(html: bytes, url: str) -> dict:
+    tree = lxml.html.fromstring(html)
+
+    headings = tree.xpath('//h1')
+    name = _clean_text(headings[0].text_content()) if headings else ''
+
+    ingredient_lines = [text for text in _unique_texts(tree.xpath(INGREDIENT_XPATH)) if len(text) > 2]
+    steps = [text for text in _unique_texts(tree.xpath(STEP_XPATH)) if len(text) > 10]
+
+    portions = DEFAULT_PORTIONS
+    portions_match = PORTIONS_TEXT_PATTERN.search(tree.text_content())
+    if portions_match:
+        portions = int(portions_match.group(1))
+
+    return {
+        'name': name or 'Receita Importada',
+        'portions': portions,
+        'link': url,
+        'notes': _format_notes(steps),
+        'ingredients': _parse_ingredients(ingredient_lines),
+    }
+
+
+def parse_recipe_page(html: bytes, url: str) -> dict:
+    """Extrai nome, porções, ingredientes e modo de preparo de uma página de receita"""
+    data = extract_json_ld_recipe(html)
+    if data and data.get('recipeIngredient'):
+        return _recipe_from_json_ld(data, url)
+    return _recipe_from_html(html, url)
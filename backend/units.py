@@ -0,0 +1,175 @@
+"""
+Conversão e normalização de unidades e nomes de ingredientes
+
+As unidades ficam num registro montado uma única vez na importação do
+módulo: cada unidade canônica tem uma família (massa, volume ou uma família
+própria para unidades contadas como lata e dente) e um fator para a unidade
+base da família (g, ml). Apelidos, abreviações e plurais apontam para a
+unidade canônica, então a consulta é um acesso a dicionário. Medidas
+caseiras (xícara, colheres) são volumes; massa e volume só se convertem
+quando a densidade do ingrediente (g/ml) é informada.
+"""
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+MASS = 'massa'
+VOLUME = 'volume'
+
+
+class Unit(NamedTuple):
+    symbol: str   # forma canônica exibida ("g", "xícara", "colher de sopa")
+    family: str   # massa, volume ou o próprio símbolo para unidades contadas
+    factor: float # quantidade da unidade base da família (g ou ml) em 1 unidade
+
+
+# símbolo: (família, fator, apelidos). Plurais são gerados automaticamente.
+_UNIT_DEFINITIONS = {
+    # Massa (base: g)
+    'mg': (MASS, 0.001, ['miligrama']),
+    'g': (MASS, 1, ['grama', 'gr', 'grs']),
+    'kg': (MASS, 1000, ['quilograma', 'quilo', 'kilo', 'kilograma']),
+    # Volume (base: ml)
+    'ml': (VOLUME, 1, ['mililitro']),
+    'cl': (VOLUME, 10, ['centilitro']),
+    'dl': (VOLUME, 100, ['decilitro']),
+    'l': (VOLUME, 1000, ['litro', 'lt', 'lts']),
+    # Medidas caseiras brasileiras
+    'xícara': (VOLUME, 240, ['xicara de cha', 'xicara cha', 'xic', 'xicara (cha)']),
+    'copo': (VOLUME, 200, ['copo americano', 'copo de requeijao']),
+    'colher de sopa': (VOLUME, 15, ['colher sopa', 'colher (sopa)', 'c. sopa', 'c sopa', 'cs', 'colher']),
+    'colher de sobremesa': (VOLUME, 10, ['colher sobremesa', 'colher (sobremesa)']),
+    'colher de chá': (VOLUME, 5, ['colher cha', 'colher (cha)', 'c. cha', 'c cha', 'cc']),
+    'colher de café': (VOLUME, 2.5, ['colher cafe', 'colher (cafe)']),
+    # Unidades contadas: cada uma é sua própria família
+    'unidade': ('unidade', 1, ['un', 'und', 'unid', 'u']),
+    'dúzia': ('unidade', 12, []),
+    'dente': ('dente', 1, []),
+    'lata': ('lata', 1, []),
+    'caixinha': ('caixinha', 1, ['caixa']),
+    'pacote': ('pacote', 1, ['pct']),
+    'fatia': ('fatia', 1, []),
+    'folha': ('folha', 1, []),
+    'maço': ('maço', 1, []),
+    'ramo': ('ramo', 1, []),
+    'pitada': ('pitada', 1, []),
+}
+
+
+def _strip_accents(text: str) -> str:
+    normalized = unicodedata.normalize('NFKD', text)
+    return normalized.encode('ASCII', 'ignore').decode('ASCII')
+
+
+def _pluralize_word(word: str) -> str:
+    # Abreviações ("ml", "cs") e palavras já no plural ficam iguais
+    if len(word) <= 2 or word.endswith('s'):
+        return word
+    if word.endswith('ao'):
+        return word[:-2] + 'oes'
+    if word.endswith(('r', 'z')):
+        return word + 'es'
+    if word.endswith('l'):
+        return word[:-1] + 'is'
+    return word + 's'
+
+
+def _plurals(alias: str) -> List[str]:
+    """Plurais do apelido: só a primeira palavra ("colheres de sopa") e todas ("copos americanos")"""
+    words = alias.split(' ')
+    first_only = ' '.join([_pluralize_word(words[0]), *words[1:]])
+    every_word = ' '.join(word if word.startswith('(') else _pluralize_word(word) for word in words)
+    return [first_only, every_word]
+
+
+def _unit_key(unit: str) -> str:
+    return ' '.join(_strip_accents(unit).lower().replace('.', '. ').split()).rstrip('.')
+
+
+def _build_registry() -> Dict[str, Unit]:
+    registry: Dict[str, Unit] = {}
+    for symbol, (family, factor, aliases) in _UNIT_DEFINITIONS.items():
+        unit = Unit(symbol, family, factor)
+        for alias in [symbol, *aliases]:
+            key = _unit_key(alias)
+            for variant in (key, *_plurals(key)):
+                # Apelidos explícitos têm prioridade sobre plurais gerados
+                registry.setdefault(variant, unit)
+    return registry
+
+
+UNIT_REGISTRY: Dict[str, Unit] = _build_registry()
+
+
+@lru_cache(maxsize=4096)
+def lookup_unit(unit: str) -> Optional[Unit]:
+    """Unidade canônica para qualquer grafia conhecida, ou None"""
+    if not unit:
+        return None
+    return UNIT_REGISTRY.get(_unit_key(unit))
+
+
+def unit_family(unit: str, density: Optional[float] = None) -> Optional[str]:
+    """Família da unidade; com densidade, volume conta como massa (são conversíveis)"""
+    info = lookup_unit(unit)
+    if info is None:
+        return None
+    if density and info.family == VOLUME:
+        return MASS
+    return info.family
+
+
+def convert_unit(quantity: float, from_unit: str, to_unit: str,
+                 density: Optional[float] = None) -> tuple[float, str]:
+    """Converte quantidade entre unidades compatíveis (massa↔volume se houver densidade em g/ml)"""
+    source = lookup_unit(from_unit)
+    target = lookup_unit(to_unit)
+    if source is None or target is None:
+        # Unidades incompatíveis ou desconhecidas
+        return quantity, from_unit
+
+    if source.family == target.family:
+        return quantity * source.factor / target.factor, to_unit
+
+    if density:
+        if source.family == VOLUME and target.family == MASS:
+            return quantity * source.factor * density / target.factor, to_unit
+        if source.family == MASS and target.family == VOLUME:
+            return quantity * source.factor / density / target.factor, to_unit
+
+    return quantity, from_unit
+
+
+def normalize_unit(unit: str) -> str:
+    """Normaliza unidade para forma padrão"""
+    info = lookup_unit(unit)
+    return info.symbol if info else unit
+
+
+def get_best_unit(quantity: float, unit: str) -> tuple[float, str]:
+    """Retorna a melhor unidade para display"""
+    unit_normalized = normalize_unit(unit)
+
+    # Para massa
+    if unit_normalized == 'g':
+        if quantity >= 1000:
+            return round(quantity / 1000, 2), 'kg'
+    elif unit_normalized == 'kg':
+        if quantity < 1:
+            return round(quantity * 1000, 2), 'g'
+
+    # Para volume
+    if unit_normalized == 'ml':
+        if quantity >= 1000:
+            return round(quantity / 1000, 2), 'l'
+    elif unit_normalized == 'l':
+        if quantity < 1:
+            return round(quantity * 1000, 2), 'ml'
+
+    # Arredonda para 2 casas decimais
+    return round(quantity, 2), unit_normalized
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """Normaliza nome do ingrediente removendo acentos e espaços extras"""
+    return ' '.join(_strip_accents(name).lower().strip().split())
@@ -0,0 +1,76 @@
+"""
+Catálogo global de receitas importadas da web (coleção web_recipes).
+
+Cada página é baixada e processada uma única vez; importações seguintes da
+mesma URL canônica são uma consulta pelo índice único em `url`. Entradas
+gravadas por uma versão anterior do parser são tratadas como ausentes e
+podem ser reprocessadas em lote pelo script reparse_web_catalog.py.
+"""
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from prometheus_client import Counter
+
+from tudogostoso import PARSER_VERSION
+
+WEB_CATALOG_LOOKUPS = Counter(
+    "web_catalog_lookups_total",
+    "Consultas ao catálogo de receitas importadas da web",
+    ["result"],  # hit, miss
+)
+
+# Campos de estimativa pré-calculados opcionalmente para cada receita
+ESTIMATE_FIELDS = ("tempo_preparo", "calorias_por_porcao", "custo_estimado", "restricoes")
+
+
+class WebRecipeCatalog:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("url", unique=True)
+        await self.collection.create_index("parser_version")
+
+    async def get(self, url: str) -> Optional[dict]:
+        """Entrada processada pela versão atual do parser, ou None"""
+        entry = await self.collection.find_one(
+            {"url": url, "parser_version": PARSER_VERSION}, {"_id": 0}
+        )
+        WEB_CATALOG_LOOKUPS.labels("hit" if entry else "miss").inc()
+        return entry
+
+    async def save(self, url: str, recipe: dict, scraped_at: Optional[datetime] = None,
+                   estimates: Optional[dict] = None):
+        """Grava o resultado do parser; estimativas antigas são descartadas se não vierem novas"""
+        now = datetime.now(timezone.utc)
+        update = {
+            "$set": {
+                "recipe": recipe,
+                "parser_version": PARSER_VERSION,
+                "scraped_at": (scraped_at or now).isoformat(),
+                "updated_at": now.isoformat(),
+            },
+            "$setOnInsert": {"created_at": now.isoformat()},
+        }
+        if estimates:
+            update["$set"]["estimates"] = estimates
+        else:
+            update["$unset"] = {"estimates": ""}
+        await self.collection.update_one({"url": url}, update, upsert=True)
+
+    async def set_estimates(self, url: str, estimates: dict):
+        await self.collection.update_one(
+            {"url": url},
+            {"$set": {"estimates": {field: estimates[field] for field in ESTIMATE_FIELDS if field in estimates}}}
+        )
+
+    async def entries(self, outdated_only: bool = True) -> AsyncIterator[dict]:
+        """Itera o catálogo (por padrão só as entradas de versões antigas do parser)"""
+        query = {"parser_version": {"$lt": PARSER_VERSION}} if outdated_only else {}
+        async for entry in self.collection.find(query, {"_id": 0}):
+            yield entry
+
+
+def catalog_recipe(entry: dict) -> dict:
+    """Receita do catálogo no formato da resposta de importação, com estimativas se houver"""
+    return {**entry["recipe"], **entry.get("estimates", {})}
@@ -0,0 +1,65 @@
+"""
+Script to backfill canonical ingredient ids on stored recipes and shopping lists
+
+Recipes and shopping list items written before ingredient ids existed get an
+ingredient_id resolved from their name by the canonical ingredient dictionary
+(backend/ingredients.py). Ids are derived from the canonical name, so running
+the script again (or after adding synonyms) only rewrites documents whose ids
+changed.
+
+Usage: python backfill_ingredient_ids.py
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+ROOT_DIR = Path(__file__).parent / 'backend'
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from ingredients import ingredient_id  # noqa: E402
+
+BATCH_SIZE = 500
+
+
+def with_ids(entries: list, name_field: str) -> list:
+    return [{**entry, 'ingredient_id': ingredient_id(entry.get(name_field, ''))} for entry in entries]
+
+
+async def backfill(collection, array_field: str, name_field: str) -> int:
+    updated = 0
+    operations = []
+    async for doc in collection.find({}, {"_id": 1, array_field: 1}):
+        entries = doc.get(array_field) or []
+        new_entries = with_ids(entries, name_field)
+        if new_entries == entries:
+            continue
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {array_field: new_entries}}))
+        if len(operations) >= BATCH_SIZE:
+            updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+    return updated
+
+
+async def backfill_ingredient_ids():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    print("Backfilling ingredient ids...")
+    recipes = await backfill(db.recipes, 'ingredients', 'name')
+    print(f"✓ Updated {recipes} recipes")
+    lists = await backfill(db.shopping_lists, 'items', 'ingredient_name')
+    print(f"✓ Updated {lists} shopping lists")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_ingredient_ids())
@@ -25,15 +25,11 @@ function Home({ userName, onLogout }) {
 
   const loadHomeData = async () => {
     try {
-      const [favRes, sugRes, trendRes] = await Promise.all([
-        axios.get(`${API}/home/favorites`),
-        axios.get(`${API}/home/suggestions`),
-        axios.get(`${API}/home/trending`)
-      ]);
+      const response = await axios.get(`${API}/home`);
       
-      setFavorites(favRes.data);
-      setSuggestions(sugRes.data);
-      setTrending(trendRes.data);
+      setFavorites(response.data.favorites);
+      setSuggestions(response.data.suggestions);
+      setTrending(response.data.trending);
     } catch (error) {
       console.error("Erro ao carregar dados da página inicial", error);
     } finally {
@@ -4,6 +4,7 @@ Focused test for automatic image generation functionality
 Based on the specific review request requirements
 """
 
+import os
 import requests
 import json
 import sys
@@ -11,7 +12,7 @@ import sys
 def test_image_generation_flow():
     """Test the complete image generation flow as specified in review request"""
     
-    base_url = "https://image-free-recipes.preview.emergentagent.com"
+    base_url = os.environ.get("BACKEND_URL", "https://image-free-recipes.preview.emergentagent.com")
     api_url = f"{base_url}/api"
     
     print("🧪 FOCUSED IMAGE GENERATION TEST")
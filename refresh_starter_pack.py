@@ -0,0 +1,95 @@
+"""
+Script to refresh the onboarding starter-recipe pool (starter_recipes collection)
+
+Generates recipes per category with the LLM, estimates their values once and
+replaces the pool. Onboarding then clones from this pool instead of calling
+the LLM for every new user.
+
+Usage: python refresh_starter_pack.py [--per-category 10]
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+from server import (  # noqa: E402
+    client, db, create_llm_chat, send_llm_message, sanitize_llm_recipe,
+    estimate_recipe_values, llm_configured,
+)
+from starter_pack import STARTER_CATEGORIES, replace_starter_pool  # noqa: E402
+
+CATEGORY_DESCRIPTIONS = {
+    "carne": "com carne, frango ou peixe",
+    "vegetariana": "vegetarianas (sem carne, frango ou peixe)",
+    "doce": "doces ou sobremesas",
+}
+
+
+async def generate_category(category: str, count: int) -> list:
+    """Generate and estimate `count` starter recipes for one category"""
+    prompt = f"""Você é um chef experiente. Crie {count} receitas brasileiras populares, fáceis de fazer e {CATEGORY_DESCRIPTIONS[category]}.
+
+Retorne APENAS um array JSON válido, sem texto adicional. Cada receita deve ter:
+- name: nome da receita
+- portions: número de porções (entre 2 e 4)
+- ingredients: array com pelo menos 5 ingredientes. Cada ingrediente deve ter:
+  * name: nome do ingrediente
+  * quantity: quantidade numérica
+  * unit: unidade de medida (g, kg, ml, l, xícara, colher, unidade)
+  * mandatory: true para ingredientes principais, false para opcionais
+- notes: modo de preparo detalhado passo a passo, começando com "Modo de Preparo:" e passos numerados"""
+
+    chat = create_llm_chat(
+        session_id=f"onboarding-starter-{category}-{uuid.uuid4()}",
+        system_message="Você é um chef brasileiro especialista. Retorne APENAS JSON válido."
+    )
+    response = await send_llm_message(chat, prompt, call_site="starter_pack_refresh")
+
+    json_match = re.search(r'\[.*\]', response, re.DOTALL)
+    if not json_match:
+        print(f"  ✗ No JSON array in LLM response for '{category}'")
+        return []
+
+    recipes = []
+    for recipe_data in json.loads(json_match.group(0))[:count]:
+        recipe = sanitize_llm_recipe(recipe_data)
+        recipe.update({
+            'link': '',
+            'imagem_url': '',
+            'tempo_preparo': 0,
+            'calorias_por_porcao': 0,
+            'custo_estimado': 0,
+            'restricoes': [],
+        })
+        recipes.append(recipe)
+
+    return list(await asyncio.gather(*(estimate_recipe_values(r) for r in recipes)))
+
+
+async def refresh_starter_pack(per_category: int):
+    if not llm_configured():
+        print("LLM not configured (set EMERGENT_LLM_KEY or LLM_PROVIDER=fake)")
+        return 1
+
+    for category in STARTER_CATEGORIES:
+        print(f"Generating '{category}' recipes...")
+        recipes = await generate_category(category, per_category)
+        stored = await replace_starter_pool(db, category, recipes)
+        print(f"  ✓ {stored} recipes stored")
+
+    total = await db.starter_recipes.count_documents({})
+    print(f"\nStarter pool now has {total} recipes")
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the onboarding starter-recipe pool")
+    parser.add_argument("--per-category", type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(refresh_starter_pack(args.per_category)))
@@ -0,0 +1,73 @@
+"""
+Script to re-parse the shared web recipe catalog (web_recipes collection)
+
+After a change to the TudoGostoso parser (and a PARSER_VERSION bump), entries
+written by older parser versions are re-parsed from the HTML kept in the
+on-disk HTTP cache, without hitting the site. Entries whose HTML is no longer
+cached are skipped unless --fetch is given.
+
+Usage: python reparse_web_catalog.py [--all] [--fetch] [--estimate]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+from server import client, fetcher, web_catalog, estimate_recipe_values  # noqa: E402
+from tudogostoso import PARSER_VERSION, parse_recipe_page  # noqa: E402
+from web_catalog import ESTIMATE_FIELDS  # noqa: E402
+
+
+async def cached_html(url: str, fetch: bool):
+    """Page HTML (stale copies included) and when it was downloaded, or (None, None)"""
+    cached = await fetcher.cache.lookup(url)
+    if cached is not None:
+        return cached.content, datetime.fromtimestamp(cached.stored_at, timezone.utc)
+    if not fetch:
+        return None, None
+    response = await fetcher.get(url)
+    response.raise_for_status()
+    return response.content, datetime.now(timezone.utc)
+
+
+async def reparse_catalog(reparse_all: bool, fetch: bool, estimate: bool):
+    print(f"Re-parsing {'all' if reparse_all else 'outdated'} catalog entries with parser v{PARSER_VERSION}...")
+    reparsed = skipped = failed = 0
+
+    async for entry in web_catalog.entries(outdated_only=not reparse_all):
+        url = entry['url']
+        try:
+            html, scraped_at = await cached_html(url, fetch)
+            if html is None:
+                skipped += 1
+                print(f"  - {url}: HTML not cached, skipped")
+                continue
+
+            recipe = parse_recipe_page(html, url)
+            estimates = None
+            if estimate:
+                estimated = await estimate_recipe_values(dict(recipe))
+                estimates = {field: estimated[field] for field in ESTIMATE_FIELDS if field in estimated}
+            await web_catalog.save(url, recipe, scraped_at=scraped_at, estimates=estimates)
+            reparsed += 1
+            print(f"  ✓ {url}: {len(recipe['ingredients'])} ingredients")
+        except Exception as e:
+            failed += 1
+            print(f"  ✗ {url}: {e}")
+
+    print(f"\nReparsed: {reparsed}  Skipped: {skipped}  Failed: {failed}")
+    fetcher.close()
+    client.close()
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-parse the web recipe catalog from cached HTML")
+    parser.add_argument("--all", action="store_true", help="re-parse every entry, not only outdated ones")
+    parser.add_argument("--fetch", action="store_true", help="download pages missing from the HTTP cache")
+    parser.add_argument("--estimate", action="store_true", help="pre-compute time, calories, cost and restrictions")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(reparse_catalog(args.all, args.fetch, args.estimate)))
@@ -1,8 +1,9 @@
+import os
 import requests
 import json
 
 # Test with different query
-base_url = "https://image-free-recipes.preview.emergentagent.com"
+base_url = os.environ.get("BACKEND_URL", "https://image-free-recipes.preview.emergentagent.com")
 api_url = f"{base_url}/api"
 
 # Login first
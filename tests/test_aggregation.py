@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from aggregation import aggregate, aggregate_items, aggregate_items_vectorized
+from shopping_items import ListItem
+
+# Grafias que resolvem para o mesmo ingredient_id, mas nem todas estão na tabela de nutrição
+NAMES = [
+    "farinha de trigo", "Farinha", "trigo", "Farinha de trigo peneirada",
+    "Açúcar", "açúcar refinado", "acucar cristal",
+    "Leite", "leite integral",
+    "Queijo parmesão ralado", "Parmesão", "queijo ralado",
+    "Cebola", "cebolas picadas",
+    "Tomate", "tomates maduros",
+    "Manteiga", "Óleo", "óleo de soja",
+    "Ingrediente desconhecido",
+]
+UNITS = ["g", "kg", "ml", "l", "xícara", "xícaras", "colher de sopa", "colheres de chá", "copo americano",
+         "unidade", "lata", "pitada", "punhado"]
+
+
+def _summary(items):
+    return [(item.ingredient_name, item.unit, round(item.quantity, 2)) for item in items]
+
+
+def _random_items(rng, count):
+    return [
+        ListItem(rng.choice(NAMES), rng.choice([0.5, 1, 2, 3, 100, 250]), rng.choice(UNITS),
+                 recipe_ids=[f"r{rng.randint(1, 5)}"], recipe_names=["Receita"])
+        for _ in range(count)
+    ]
+
+
+def test_aliased_name_with_mixed_units_is_converted():
+    items = [ListItem("farinha de trigo", 2, "colher de sopa"), ListItem("Farinha", 100, "g")]
+    for aggregated in (aggregate_items(items), aggregate_items_vectorized(items)):
+        # 100 g de farinha (0,53 g/ml) ~ 12,1 colheres de sopa, nunca 102
+        assert _summary(aggregated) == [("farinha de trigo", "colher de sopa", 14.12)]
+
+
+def test_unconvertible_units_stay_on_separate_lines():
+    items = [ListItem("Ingrediente desconhecido", 1, "xícara"), ListItem("Ingrediente desconhecido", 100, "g")]
+    assert _summary(aggregate_items(items)) == [
+        ("Ingrediente desconhecido", "xícara", 1.0), ("Ingrediente desconhecido", "g", 100.0)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_loop_and_vectorized_paths_agree(seed):
+    rng = random.Random(seed)
+    items = _random_items(rng, rng.randint(1, 60))
+    assert _summary(aggregate_items_vectorized(items)) == _summary(aggregate_items(items))
+
+
+def test_result_does_not_depend_on_list_size_threshold():
+    items = _random_items(random.Random(7), 40)
+    assert _summary(aggregate(items, vectorize_min_items=1)) == _summary(aggregate(items, vectorize_min_items=1000))
@@ -0,0 +1,24 @@
+import pytest
+
+from data_versions import RECIPES, SHOPPING_LISTS, etag_matches, make_etag
+
+
+def test_make_etag_is_weak_and_per_kind():
+    assert make_etag(RECIPES, 3) == 'W/"recipes-3"'
+    assert make_etag(RECIPES, 3) != make_etag(SHOPPING_LISTS, 3)
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    ('W/"recipes-3"', True),
+    ('"recipes-3"', True),
+    ('  W/"recipes-3"  ', True),
+    ('W/"recipes-2", W/"recipes-3"', True),
+    ('*', True),
+    ('W/"recipes-2"', False),
+    ('W/"shopping_lists-3"', False),
+    ('W/"recipes-30"', False),
+    ('', False),
+    (None, False),
+])
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, make_etag(RECIPES, 3)) is matches
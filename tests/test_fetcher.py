@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+import pytest
+
+from fetcher import FetchError, Fetcher, FetchResponse
+
+
+class SlowFetcher(Fetcher):
+    """Fetcher cuja requisição só termina quando o teste libera"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.finish = threading.Event()
+        self.timeouts = []
+
+    def _fetch_sync(self, url, headers, timeout):
+        self.timeouts.append(timeout)
+        self.finish.wait(5)
+        return FetchResponse(url, 200, b"ok", {})
+
+
+def test_host_slot_is_held_until_abandoned_request_finishes():
+    fetcher = SlowFetcher(per_host_limit=1, max_workers=2)
+
+    async def main():
+        with pytest.raises(FetchError):
+            await fetcher.get("https://example.com/a", timeout=0.05)
+        semaphore = fetcher._host_semaphores["example.com"]
+        # A thread ainda está com a requisição aberta: a vaga continua ocupada
+        assert semaphore.locked()
+
+        fetcher.finish.set()
+        for _ in range(100):
+            if not semaphore.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert not semaphore.locked()
+        return await fetcher.get("https://example.com/b", timeout=1)
+
+    try:
+        assert asyncio.run(main()).status == 200
+        assert fetcher.timeouts == [0.05, 1]
+    finally:
+        fetcher.close()
@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+from fuzzy_match import merge_similar, similarity, unmerge
+from shopping_items import ListItem
+
+MIN_SIMILARITY = 0.8
+
+
+def _item(name, quantity, unit, recipe_id="r1"):
+    return ListItem(name, quantity, unit, recipe_ids=[recipe_id], recipe_names=[f"Receita {recipe_id}"])
+
+
+def test_similarity_ignores_connectors():
+    assert similarity("azeite de oliva", "azeite oliva") == 1.0
+    assert similarity("cebola", "cenoura") < MIN_SIMILARITY
+
+
+@pytest.mark.parametrize("first, second", [
+    (("Tomate", 200, "g"), ("Tomatte", 100, "g")),
+    (("Manjericão", 1, "maço"), ("Manjericao fresco", 1, "maço")),
+])
+def test_typos_are_merged(first, second):
+    merged = merge_similar([_item(*first, "r1"), _item(*second, "r2")], MIN_SIMILARITY)
+    assert len(merged) == 1
+    assert merged[0].recipe_ids == ["r1", "r2"]
+    assert len(merged[0].merged_from) == 1
+
+
+@pytest.mark.parametrize("first, second", [
+    # Nomes parecidos (Dice 0,82), ingredientes diferentes
+    (("Pimentão", 5, "g"), ("Pimenta", 1, "colher de chá")),
+    (("Pimentão", 100, "g"), ("Pimenta", 5, "g")),
+    # Entradas diferentes da tabela de nutrição
+    (("Leite", 1, "l"), ("Leite condensado", 1, "lata")),
+    (("Leite", 500, "ml"), ("Leite condensado", 395, "g")),
+    # Famílias de unidade incompatíveis
+    (("Tomate", 2, "lata"), ("Tomatte", 200, "g")),
+    # Compostos que não podem virar o produto base
+    (("Carne", 500, "g"), ("Carne seca", 300, "g")),
+    (("Tomate", 200, "g"), ("Tomate seco", 100, "g")),
+])
+def test_different_ingredients_are_not_merged(first, second):
+    assert len(merge_similar([_item(*first, "r1"), _item(*second, "r2")], MIN_SIMILARITY)) == 2
+
+
+def test_keep_separate_is_respected():
+    separate = _item("Tomatte", 100, "g", "r2")
+    separate.keep_separate = True
+    assert len(merge_similar([_item("Tomate", 200, "g"), separate], MIN_SIMILARITY)) == 2
+
+
+def test_unmerge_restores_items():
+    merged = merge_similar([_item("Tomate", 200, "g", "r1"), _item("Tomatte", 100, "g", "r2")], MIN_SIMILARITY)
+    target = merged[0]
+    assert math.isclose(target.quantity, 300)
+
+    restored = unmerge(target)
+    assert [item.ingredient_name for item in restored] == ["Tomatte"]
+    assert restored[0].keep_separate
+    assert math.isclose(target.quantity, 200)
+    assert target.recipe_ids == ["r1"]
+    assert target.merged_from == []
@@ -0,0 +1,36 @@
+import pytest
+
+from ingredients import ingredient_id, resolve_ingredient
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("Cebolas", "cebola"),
+    ("cebola picada", "cebola"),
+    ("dentes de alho", "alho"),
+    ("Alho picado", "alho"),
+    ("Tomate maduro", "tomate"),
+    ("Queijo parmesão ralado", "queijo parmesao"),
+    ("Mussarela", "queijo mussarela"),
+    ("Aipim", "mandioca"),
+    ("Batata-doce", "batata doce"),
+    ("Ovos grandes", "ovo"),
+])
+def test_resolve_ingredient(name, canonical):
+    assert resolve_ingredient(name).name == canonical
+
+
+@pytest.mark.parametrize("compound, base", [
+    ("Carne seca", "carne"),
+    ("Tomate seco", "tomate"),
+    ("Cebola roxa", "cebola"),
+    ("Leite condensado", "leite"),
+    ("Batata-doce", "batata"),
+])
+def test_compounds_keep_their_own_id(compound, base):
+    # Produtos diferentes: somados exatamente, "unmerge" não teria como separá-los
+    assert ingredient_id(compound) != ingredient_id(base)
+
+
+def test_ingredient_id_is_stable_and_fits_a_json_number():
+    assert ingredient_id("Cebola picada") == ingredient_id("cebolas") == resolve_ingredient("CEBOLA").id
+    assert 0 <= ingredient_id("cebola") < 2 ** 53
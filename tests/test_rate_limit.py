@@ -0,0 +1,22 @@
+import pytest
+
+from rate_limit import RateLimiter, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate("30/60") == (30.0, 0.5)
+    assert parse_rate("5") == (5.0, 5.0)
+
+
+@pytest.mark.parametrize("spec", ["0/60", "5/0", "-1/60", "5/-10"])
+def test_parse_rate_rejects_non_positive(spec):
+    with pytest.raises(ValueError):
+        parse_rate(spec)
+
+
+def test_rate_limiter_rejects_after_user_bucket_is_drained():
+    limiter = RateLimiter({"llm": ("2/10", "100/10")})
+    assert limiter.check("llm", "u1") == 0
+    assert limiter.check("llm", "u1") == 0
+    assert limiter.check("llm", "u1") > 0
+    assert limiter.check("llm", "u2") == 0
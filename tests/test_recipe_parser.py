@@ -0,0 +1,83 @@
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from recipe_parser import DEFAULT_PORTIONS, parse_ingredient, parse_quantity, parse_recipe_text
+
+CORPUS_PATH = Path(__file__).resolve().parent.parent / 'backend' / 'benchmarks' / 'fixtures' / 'clipboard_corpus.json'
+THRESHOLD = 0.85
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2", 2.0),
+    ("0,5", 0.5),
+    ("1/2", 0.5),
+    ("1 1/2", 1.5),
+    ("2 e 1/2", 2.5),
+    ("1½", 1.5),
+    ("2 e ½", 2.5),
+])
+def test_parse_quantity(text, expected):
+    assert math.isclose(parse_quantity(text), expected)
+
+
+@pytest.mark.parametrize("line, name, quantity, unit", [
+    ("2 e 1/2 xícaras de farinha de trigo", "Farinha de trigo", 2.5, "xícara"),
+    ("1 e ½ xícara de açúcar", "Açúcar", 1.5, "xícara"),
+    ("2 ½ xícaras (chá) de farinha de trigo", "Farinha de trigo", 2.5, "xícara"),
+    ("3 dentes de alho", "Alho", 3, "dente"),
+])
+def test_parse_ingredient(line, name, quantity, unit):
+    ingredient = parse_ingredient(line)
+    assert ingredient['name'] == name
+    assert math.isclose(ingredient['quantity'], quantity)
+    assert ingredient['unit'] == unit
+
+
+def test_numbers_in_steps_are_not_portions():
+    result = parse_recipe_text(
+        "Brownie\n\nIngredientes:\n- 3 ovos\n- 1 xícara de açúcar\n- 200 g de chocolate\n\n"
+        "Modo de preparo:\n1. Misture tudo.\n2. Asse por 40 minutos e corte em 12 pedaços."
+    )
+    assert result.recipe['portions'] == DEFAULT_PORTIONS == 4
+    assert result.recipe['notes'].endswith("2. Asse por 40 minutos e corte em 12 pedaços.")
+
+
+def test_portion_line_before_sections():
+    result = parse_recipe_text(
+        "Bolo\nRende 8 fatias\n\nIngredientes:\n- 3 ovos\n- 1 xícara de açúcar\n\nModo de preparo:\n1. Asse."
+    )
+    assert result.recipe['name'] == "Bolo"
+    assert result.recipe['portions'] == 8
+
+
+def test_misread_quantity_lowers_confidence():
+    # "e meia" não é uma quantidade reconhecida: o nome fica "E meia xícara de leite"
+    result = parse_recipe_text(
+        "Bolo\n\nIngredientes:\n- 3 ovos\n- e meia xícara de leite\n- 1 xícara de açúcar\n\n"
+        "Modo de preparo:\n1. Misture."
+    )
+    assert result.confidence < THRESHOLD
+
+
+@pytest.mark.parametrize("entry", json.loads(CORPUS_PATH.read_text(encoding='utf-8')))
+def test_corpus(entry):
+    result = parse_recipe_text(entry['text'])
+    expected = entry['expected']
+    if expected is None:
+        assert result.confidence < THRESHOLD
+        return
+
+    assert result.confidence >= THRESHOLD
+    recipe = result.recipe
+    assert recipe['name'] == expected['name']
+    assert recipe['portions'] == expected['portions']
+    assert recipe['notes'].count('\n') == expected['steps']
+    assert len(recipe['ingredients']) == len(expected['ingredients'])
+    for parsed, (name, quantity, unit, *rest) in zip(recipe['ingredients'], expected['ingredients']):
+        assert parsed['name'].lower() == name.lower()
+        assert math.isclose(parsed['quantity'], quantity, rel_tol=0.01)
+        assert parsed['unit'] == unit
+        assert parsed['mandatory'] == (rest[0] if rest else True)
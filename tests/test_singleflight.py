@@ -0,0 +1,173 @@
+import asyncio
+import copy
+from datetime import datetime, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from singleflight import SingleFlight, SingleFlightError
+
+
+class FakeLeases:
+    """Subconjunto em memória da API do motor usado pelo SingleFlight"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def _matches(self, doc, query):
+        for field, cond in query.items():
+            if field == "$or":
+                if not any(self._matches(doc, sub) for sub in cond):
+                    return False
+            elif isinstance(cond, dict):
+                value = doc.get(field)
+                if "$lt" in cond and not (value is not None and value < cond["$lt"]):
+                    return False
+                if "$in" in cond and value not in cond["$in"]:
+                    return False
+                if "$ne" in cond and value == cond["$ne"]:
+                    return False
+            elif doc.get(field) != cond:
+                return False
+        return True
+
+    def _update(self, doc, update):
+        doc.update(copy.deepcopy(update.get("$set", {})))
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+
+    async def insert_one(self, doc):
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("duplicate key")
+        self.docs[doc["_id"]] = copy.deepcopy(doc)
+
+    async def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        return copy.deepcopy(doc) if doc is not None and self._matches(doc, query) else None
+
+    async def find_one_and_update(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is None or not self._matches(doc, query):
+            return None
+        before = copy.deepcopy(doc)
+        self._update(doc, update)
+        return before
+
+    async def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and self._matches(doc, query):
+            self._update(doc, update)
+
+    async def delete_one(self, query):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and self._matches(doc, query):
+            del self.docs[query["_id"]]
+
+
+def make_workers(count=2):
+    leases = FakeLeases()
+    return leases, [SingleFlight(leases, poll_interval=0.01, max_wait=2) for _ in range(count)]
+
+
+def test_concurrent_calls_across_workers_share_one_run():
+    _, (first, second) = make_workers()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(first.run("k", work), second.run("k", work))
+
+    assert asyncio.run(main()) == [1, 1]
+    assert len(calls) == 1
+
+
+def test_call_after_leader_finished_runs_again():
+    _, (first, second) = make_workers()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        return await first.run("k", work), await second.run("k", work)
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_leader_failure_is_propagated_to_remote_followers():
+    leases, (first, second) = make_workers()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("LLM indisponível")
+
+    async def main():
+        return await asyncio.gather(first.run("k", failing), second.run("k", failing), return_exceptions=True)
+
+    leader_error, follower_error = asyncio.run(main())
+    assert isinstance(leader_error, RuntimeError)
+    assert isinstance(follower_error, SingleFlightError)
+    assert "LLM indisponível" in str(follower_error)
+    assert len(calls) == 1
+    assert leases.docs["k"]["status"] == "failed"
+
+
+def test_leader_failure_is_propagated_to_local_followers():
+    _, (worker, _) = make_workers()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("LLM indisponível")
+
+    async def main():
+        return await asyncio.gather(worker.run("k", failing), worker.run("k", failing), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_fails_followers_instead_of_rerunning():
+    _, (first, second) = make_workers()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(1)
+
+    async def main():
+        leader = asyncio.create_task(first.run("k", slow))
+        local = asyncio.create_task(first.run("k", slow))
+        remote = asyncio.create_task(second.run("k", slow))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        return await asyncio.gather(leader, local, remote, return_exceptions=True)
+
+    leader_result, local_result, remote_result = asyncio.run(main())
+    assert isinstance(leader_result, asyncio.CancelledError)
+    assert isinstance(local_result, SingleFlightError)
+    assert isinstance(remote_result, SingleFlightError)
+    assert len(calls) == 1
+
+
+def test_expired_lease_of_dead_owner_is_taken_over():
+    leases, (worker, _) = make_workers()
+    leases.docs["k"] = {
+        "_id": "k", "owner": "morto", "run_id": "antigo", "status": "running",
+        "expires_at": datetime(2000, 1, 1, tzinfo=timezone.utc),
+    }
+
+    async def work():
+        return "novo"
+
+    assert asyncio.run(worker.run("k", work)) == "novo"
+    assert leases.docs["k"]["status"] == "done"
@@ -0,0 +1,90 @@
+import math
+
+import pytest
+
+from aggregation import aggregate_items, aggregate_items_vectorized
+from recipe_parser import parse_ingredient
+from shopping_items import ListItem
+from units import convert_unit, lookup_unit, normalize_unit
+
+
+@pytest.mark.parametrize("spelling, symbol", [
+    ("g", "g"),
+    ("gramas", "g"),
+    ("Quilos", "kg"),
+    ("xícaras (chá)", "xícara"),
+    ("xic.", "xícara"),
+    ("copo americano", "copo"),
+    ("copos americanos", "copo"),
+    ("colheres de sopa", "colher de sopa"),
+    ("colheres (chá)", "colher de chá"),
+    ("maços", "maço"),
+])
+def test_lookup_unit(spelling, symbol):
+    assert lookup_unit(spelling).symbol == symbol
+
+
+def test_unknown_unit():
+    assert lookup_unit("punhado") is None
+    assert normalize_unit("punhado") == "punhado"
+
+
+@pytest.mark.parametrize("line", [
+    "1 copo americano de leite",
+    "2 copos americanos de leite",
+    "1 copo de leite",
+])
+def test_parser_uses_unit_registry(line):
+    # O parser e a agregação precisam concordar sobre quanto vale um copo
+    ingredient = parse_ingredient(line)
+    assert ingredient['unit'] == "copo"
+    assert lookup_unit(ingredient['unit']).factor == 200
+
+
+@pytest.mark.parametrize("quantity, source, target, density, expected", [
+    (1, "kg", "g", None, 1000),
+    (2, "xícara", "ml", None, 480),
+    (1, "copo", "ml", None, 200),
+    (3, "colher de chá", "colher de sopa", None, 1),
+    (1, "xícara", "g", 0.5, 120),
+])
+def test_convert_unit(quantity, source, target, density, expected):
+    converted, unit = convert_unit(quantity, source, target, density=density)
+    assert unit == target
+    assert math.isclose(converted, expected)
+
+
+def test_incompatible_units_are_not_converted():
+    assert convert_unit(2, "lata", "g") == (2, "lata")
+
+
+def _items():
+    return [
+        ListItem("Farinha de trigo", 2, "xícaras", recipe_ids=["r1"], recipe_names=["Bolo"]),
+        ListItem("farinha de trigo", 100, "g", recipe_ids=["r2"], recipe_names=["Pão"]),
+        ListItem("Leite", 1, "copo americano", recipe_ids=["r1"], recipe_names=["Bolo"]),
+        ListItem("leite", 300, "ml", recipe_ids=["r2"], recipe_names=["Pão"]),
+        ListItem("Ovos", 3, "unidade", recipe_ids=["r1"], recipe_names=["Bolo"]),
+        ListItem("ovo", 2, "unidades", recipe_ids=["r2"], recipe_names=["Pão"]),
+        ListItem("Tomate", 1, "lata", recipe_ids=["r2"], recipe_names=["Pão"]),
+        ListItem("Tomates", 200, "g", recipe_ids=["r1"], recipe_names=["Bolo"]),
+    ]
+
+
+def _summary(items):
+    return sorted((item.ingredient_id, item.unit, round(item.quantity, 2), tuple(item.recipe_ids)) for item in items)
+
+
+def test_aggregation_sums_equivalent_units():
+    by_name = {item.ingredient_name: item for item in aggregate_items(_items())}
+    # Somado na unidade do primeiro item: 1 copo (200 ml) + 300 ml = 2,5 copos
+    assert by_name["Leite"].unit == "copo"
+    assert math.isclose(by_name["Leite"].quantity, 2.5)
+    assert by_name["Leite"].recipe_ids == ["r1", "r2"]
+    assert math.isclose(by_name["Ovos"].quantity, 5)
+    # Lata e gramas não se convertem: ficam em linhas separadas
+    assert len([item for item in by_name.values() if item.ingredient_name.startswith("Tomate")]) == 2
+
+
+def test_vectorized_aggregation_matches_loop():
+    assert _summary(aggregate_items_vectorized(_items())) == _summary(aggregate_items(_items()))
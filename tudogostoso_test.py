@@ -1,9 +1,10 @@
+import os
 import requests
 import sys
 import json
 
 class TudoGostosoTester:
-    def __init__(self, base_url="https://image-free-recipes.preview.emergentagent.com"):
+    def __init__(self, base_url=os.environ.get("BACKEND_URL", "https://image-free-recipes.preview.emergentagent.com")):
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
         self.token = None